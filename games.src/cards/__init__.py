@@ -30,6 +30,7 @@
     ------------
     CardFace : A class that describes a playing card by its rank
     and suit.
+    CardSet : A set of cards stored as a bitmask.
     DeckFactory : A protocol for classes that create decks of
     cards.
     SimpleDeckFactory : Creates decks of standard (French) playing
@@ -38,31 +39,50 @@
     game : A module that provides skeletal classes to help model
     card games.
     durak : A module that models the Durak game.
-    ... TODO: other modules, if any
+    simulation : A module that plays durak games between programmed
+    players.
 
-[    See Also
-    --------
-    <python_name> : <Description of code named on this line
-    and how it is related to the documented module.>
-    ... ]
+    Notes
+    -----
+    The engine does not depend on the web application's libraries,
+    so that simulations and robot players can load it quickly in
+    each of their processes. Cards are made serializable to JSON
+    by the web application, which registers `CardFace` with
+    ``comety.JSONSerializable`` when it loads.
 
-[    Examples
+    Examples
     --------
-    <In the doctest format, illustrate how to use this module.>
-]
+    Loading the engine leaves out the web application's modules,
+    and takes at most `IMPORT_BUDGET` times as long as loading
+    a few standard modules that the engine does not use:
+
+    >>> import os, subprocess, sys
+    >>> script = ('import sys, time; started = time.perf_counter();'
+    ...     ' import cards.simulation; elapsed = time.perf_counter() - started;'
+    ...     ' started = time.perf_counter();'
+    ...     ' import decimal, json, email.parser, xml.dom.minidom;'
+    ...     ' baseline = time.perf_counter() - started;'
+    ...     ' print([ name for name in ("comety", "django", "sqlite3")'
+    ...     ' if name in sys.modules ], elapsed < %r * baseline)'
+    ...     % IMPORT_BUDGET)
+    >>> print(subprocess.check_output([ sys.executable, '-c', script ],
+    ...     env = dict(os.environ, PYTHONPATH = os.pathsep.join(sys.path)),
+    ...     universal_newlines = True).strip())
+    [] True
 """
 
 import abc
 import collections
 import random
 
-import comety
 import mapping
 import version
 
 version.requirePythonVersion(3, 3)
 
-class CardFace(collections.Hashable, comety.JSONSerializable):
+IMPORT_BUDGET = 10
+
+class CardFace(collections.Hashable):
     """
     Describes a playing card by its rank and suit.
     
@@ -70,6 +90,10 @@ class CardFace(collections.Hashable, comety.JSONSerializable):
     information about a playing card. In addition, they provide
     equality and hashing operations for use of cards in data
     structures.
+
+    Cards are interned: each distinct card of a class is created
+    once, and constructor calls that identify it return the same
+    object. Its code, hash and ordinals are computed at that time.
     
     Parameters
     --------------------
@@ -92,6 +116,20 @@ class CardFace(collections.Hashable, comety.JSONSerializable):
         card's suit. For a joker (as determined by an `isJoker()`
         call, this may be a None, since jokers don't have a suit.
         Other cards are required to have a string value here. 
+    rankOrdinal : int
+        The position of card's rank in the ordering returned by
+        `_ordering`, counting from zero: ranks of `RANK_ORDER`
+        come first and jokers last.
+    suitOrdinal : int | None
+        The position of card's suit in the alphabetical order of
+        `suits`, or ``None`` for a card without a suit.
+    ordinal : int
+        A small number unique to each suited card of this class,
+        with jokers numbered after all suited cards. For standard
+        cards this is a number from 0 to 52.
+    RANK_ORDER : tuple
+        Ranks of suited cards from lowest to highest, used to
+        number the cards.
 
     Methods
     ---------------
@@ -103,6 +141,8 @@ class CardFace(collections.Hashable, comety.JSONSerializable):
         cards.
     isJoker()
         Tell whether this card is a joker.
+    fromOrdinal(ordinal)
+        Return the card of this class that has a specific `ordinal`.
 
     Raises
     ----------
@@ -142,6 +182,12 @@ class CardFace(collections.Hashable, comety.JSONSerializable):
     >>> card=CardFace('10S')
     >>> print('%s of %s' % (card.rank, card.suit))
     10 of spades
+    >>> CardFace('QH') is CardFace('queen', 'hearts')
+    True
+    >>> (card.rankOrdinal, card.suitOrdinal, card.ordinal)
+    (8, 3, 47)
+    >>> CardFace('*').ordinal
+    52
     >>> CardFace(-177)
     Traceback (most recent call last):
     ...
@@ -173,7 +219,35 @@ class CardFace(collections.Hashable, comety.JSONSerializable):
     __setattr__ = _readOnlyAttr
     __delattr__ = _readOnlyAttr
 
-    def __init__(self, *rankSuitOrCode):
+    __slots__ = ('rank', 'suit', 'rankOrdinal', 'suitOrdinal', 'ordinal',
+                 '_code', '_hash')
+
+    RANK_ORDER = tuple(str(num) for num in range(2, 11)) + (
+        'jack', 'queen', 'king', 'ace')
+
+    def __new__(cls, *rankSuitOrCode):
+        registry = cls.__dict__.get('_registry')
+        if registry is None:
+            registry = {}
+            type.__setattr__(cls, '_registry', registry)
+        try:
+            return registry[rankSuitOrCode]
+        except KeyError:
+            pass
+        except TypeError:
+            # unhashable arguments are rejected by the parser below
+            return cls._parse(rankSuitOrCode)
+        card = cls._parse(rankSuitOrCode)
+        return registry.setdefault(rankSuitOrCode, card)
+
+    @classmethod
+    def _parse(cls, rankSuitOrCode):
+        """
+        Validate constructor arguments and return the interned card
+        they identify, creating it on the first request.
+        """
+
+        self = object.__new__(cls)
         argc = len(rankSuitOrCode)
         if 1 == argc:
             rankSuitOrCode = rankSuitOrCode[0]
@@ -186,30 +260,158 @@ class CardFace(collections.Hashable, comety.JSONSerializable):
                 suits = self.suits.reverse()
                 if suitCode not in suits:
                     raise ValueError("Unrecognized suit code: " + suitCode)
-                self.__dict__['suit'] = suits[suitCode]
+                suit = suits[suitCode]
                 rankCode = rankSuitOrCode[:-1]
             else:
                 rankCode = rankSuitOrCode
-                self.__dict__['suit'] = None
+                suit = None
             ranks = self.ranks.reverse()
             if rankCode not in ranks:
                 raise ValueError("Unrecognized rank code: " + rankCode)
-            self.__dict__['rank'] = ranks[rankCode]
-            if self.suit is None and not self.isJoker():
+            rank = ranks[rankCode]
+            object.__setattr__(self, 'rank', rank)
+            object.__setattr__(self, 'suit', suit)
+            if suit is None and not self.isJoker():
                 raise ValueError("Suit information missing from code: " + rankSuitOrCode)
         elif 2 == argc:
-            if type(rankSuitOrCode[0]) is not str:
-                rankSuitOrCode = (str(rankSuitOrCode[0]), rankSuitOrCode[1]) 
-            self.__dict__['rank'], self.__dict__['suit'] = rankSuitOrCode
-            if self.rank not in self.ranks:
-                raise ValueError("Unrecognized rank '%s'" % self.rank)
-            if self.suit is None:
+            rank, suit = rankSuitOrCode
+            if type(rank) is not str:
+                rank = str(rank)
+            if rank not in self.ranks:
+                raise ValueError("Unrecognized rank '%s'" % rank)
+            object.__setattr__(self, 'rank', rank)
+            object.__setattr__(self, 'suit', suit)
+            if suit is None:
                 if not self.isJoker():
-                    raise ValueError("Suit argument missing for card with rank '%s'" % self.rank)
-            elif self.suit not in self.suits:
-                raise ValueError("Unrecognized suit '%s'" % self.suit)
+                    raise ValueError("Suit argument missing for card with rank '%s'" % rank)
+            elif suit not in self.suits:
+                raise ValueError("Unrecognized suit '%s'" % suit)
         else:
             raise TypeError("CardFace.__init__() takes 1 or 2 arguments (%d given)" % argc)
+        card = cls._registry.get((rank, suit))
+        if card is None:
+            self._precompute()
+            card = cls._registry.setdefault((rank, suit), self)
+        return card
+
+    def _precompute(self):
+        """
+        Fill in the derived slots of a newly parsed card.
+        """
+
+        set_ = object.__setattr__
+        code = self.ranks[self.rank]
+        if self.suit is not None:
+            code += self.suits[self.suit]
+        set_(self, '_code', code)
+        hash_ = hash(self.rank)
+        hash_ -= hash_ << 5
+        if self.suit is not None:
+            hash_ -= hash(self.suit)
+        set_(self, '_hash', -hash_)
+        rankOrder, suitOrder = self._ordering()
+        suited = len(rankOrder) - rankOrder.count('joker')
+        set_(self, 'rankOrdinal', rankOrder.index(self.rank))
+        set_(self, 'suitOrdinal',
+             None if self.suit is None else suitOrder.index(self.suit))
+        if self.suit is not None and self.rankOrdinal < suited:
+            set_(self, 'ordinal', self.suitOrdinal * suited + self.rankOrdinal)
+        else:
+            set_(self, 'ordinal', len(suitOrder) * suited
+                  + self.rankOrdinal - suited)
+
+    @classmethod
+    def _ordering(cls):
+        """
+        Return the ordered ranks and suits used to number cards of
+        this class.
+
+        Suited ranks follow `RANK_ORDER`, then any other ranks in
+        alphabetical order, and jokers come last. Suits are numbered
+        in alphabetical order.
+
+        Returns
+        -------
+        (tuple, tuple)
+            Suited ranks followed by jokers, and suits, in the
+            order of their ordinals.
+        """
+
+        ordering = cls.__dict__.get('_ordering_')
+        if ordering is None:
+            ranks = cls.ranks_()
+            rankOrder = [ rank for rank in cls.RANK_ORDER if rank in ranks ]
+            rankOrder.extend(sorted(
+                rank for rank in ranks
+                if rank not in cls.RANK_ORDER and 'joker' != rank
+            ))
+            if 'joker' in ranks:
+                rankOrder.append('joker')
+            ordering = (tuple(rankOrder), tuple(sorted(cls.suits_())))
+            type.__setattr__(cls, '_ordering_', ordering)
+        return ordering
+
+    @classmethod
+    def fromOrdinal(cls, ordinal):
+        """
+        Return the card of this class that has a specific `ordinal`.
+
+        Parameters
+        ----------
+        ordinal : int
+            The ordinal of a card to return.
+
+        Returns
+        -------
+        CardFace
+            The interned card with that ordinal.
+
+        Raises
+        ------
+        ValueError
+            If no card of this class has that ordinal.
+
+        Examples
+        --------
+        >>> CardFace.fromOrdinal(CardFace('JD').ordinal)
+        CardFace('JD')
+        >>> CardFace.fromOrdinal(52)
+        CardFace('*')
+        >>> CardFace.fromOrdinal(53)
+        Traceback (most recent call last):
+        ...
+        ValueError: Unknown card ordinal: 53
+        """
+
+        table = cls._cardsByOrdinal()
+        if 0 <= ordinal < len(table):
+            return table[ordinal]
+        raise ValueError('Unknown card ordinal: %d' % ordinal)
+
+    @classmethod
+    def _cardsByOrdinal(cls):
+        """
+        Return a tuple of all distinct cards of this class
+        indexed by their ordinals.
+        """
+
+        table = cls.__dict__.get('_byOrdinal')
+        if table is None:
+            rankOrder, suitOrder = cls._ordering()
+            suited = len(rankOrder) - rankOrder.count('joker')
+            table = [ cls(rank, suit)
+                     for suit in suitOrder for rank in rankOrder[:suited] ]
+            table.extend(cls(rank, None) for rank in rankOrder[suited:])
+            table = tuple(table)
+            type.__setattr__(cls, '_byOrdinal', table)
+        return table
+
+    def __init__(self, *rankSuitOrCode):
+        # the card is fully initialized by __new__
+        pass
+
+    def __reduce__(self):
+        return (type(self), (self.code,))
 
     def __eq__(self, other):
         """
@@ -217,6 +419,8 @@ class CardFace(collections.Hashable, comety.JSONSerializable):
 
         To be equal to a card, another object must also
         be a `CardFace` with the same `rank` and `suit`.
+        Cards are interned, so a card is usually equal
+        only to itself.
 
         Examples
         ----------------
@@ -238,10 +442,14 @@ class CardFace(collections.Hashable, comety.JSONSerializable):
         True
         >>> CardFace('queen', 'hearts') == hq
         True
+        >>> CardFace('queen', 'hearts') is hq
+        True
         >>> CardFace('queen', 'spades') == hq
         False
         """
 
+        if self is other:
+            return True
         return  (isinstance(other, CardFace) 
                 and other.rank == self.rank 
                 and other.suit == self.suit
@@ -254,6 +462,8 @@ class CardFace(collections.Hashable, comety.JSONSerializable):
         Hash codes of this type of objects are based on
         `rank` and `suit`. When both properties are equal
         in two objects, their hash codes are the same.
+        The hash code is computed once, when the card is
+        first created.
 
         See Also
         --------
@@ -271,17 +481,15 @@ class CardFace(collections.Hashable, comety.JSONSerializable):
         -1449699717559581882
         """
 
-        hash_ = hash(self.rank)
-        hash_ -= hash_ << 5
-        if self.suit is not None:
-            hash_ -= hash(self.suit)
-        return -hash_
+        return self._hash
 
     def _json_data_(self):
         """
         The JSON representation of a card is a ``dict``
         with its `code`, `rank`, and `suit` properties,
         and a `class` entry with this object's class name.
+        It is used by ``comety`` once this class is registered
+        as ``comety.JSONSerializable``.
         """
     
         return {
@@ -319,10 +527,7 @@ class CardFace(collections.Hashable, comety.JSONSerializable):
         `suits` mappings.
         """
 
-        code = self.ranks[self.rank]
-        if self.suit is not None:
-            code += self.suits[self.suit]
-        return code
+        return self._code
 
     def isJoker(self):
         """
@@ -436,6 +641,296 @@ class CardFace(collections.Hashable, comety.JSONSerializable):
                  )
         return type(self)._suits
 
+class CardSet(collections.MutableSet):
+    """
+    A mutable set of cards stored as a bitmask of their ordinals.
+
+    Each card of the set's card class is represented by a bit at
+    the position of its `CardFace.ordinal`, so a set of standard
+    cards fits in 53 bits. Membership tests, insertions and
+    removals take constant time, while unions, intersections and
+    differences of two card sets are single integer operations.
+    Cards are iterated in the order of their ordinals, that is, by
+    suit in alphabetical order, then by rank in the order of
+    `CardFace.RANK_ORDER`.
+
+    A card set stores each card at most once, thus it cannot hold
+    two jokers at the same time.
+
+    Parameters
+    --------------------
+    cards_ : collections.Iterable, optional
+        The cards to put into the new set.
+    cardClass : type, optional
+        The class of cards in this set, `CardFace` by default.
+
+    Attributes
+    -----------------
+    bits
+    cardClass : type
+        The class of cards in this set.
+
+    Methods
+    ---------------
+    ofSuit(suit)
+        Return a new set with the cards of a suit from this set.
+    ofRank(rank)
+        Return a new set with the cards of a rank from this set.
+    fromBits(bits[, cardClass])
+        Create a set from a bitmask of card ordinals.
+
+    Raises
+    ----------
+    TypeError
+        If an object offered for the set is not a card of its
+        `cardClass`.
+
+    Examples
+    ----------------
+    >>> hand = CardSet(CardFace(code) for code in ('QH', '6S', '10D', 'QS'))
+    >>> hand
+    CardSet(CardFace('10D'), CardFace('QH'), CardFace('6S'), CardFace('QS'))
+    >>> len(hand)
+    4
+    >>> CardFace('QH') in hand, CardFace('QC') in hand
+    (True, False)
+    >>> hand.ofRank('queen')
+    CardSet(CardFace('QH'), CardFace('QS'))
+    >>> hand.ofSuit('spades')
+    CardSet(CardFace('6S'), CardFace('QS'))
+    >>> hand - hand.ofSuit('spades')
+    CardSet(CardFace('10D'), CardFace('QH'))
+    >>> hand.discard(CardFace('QH'))
+    >>> hand.add(CardFace('*'))
+    >>> hand
+    CardSet(CardFace('10D'), CardFace('6S'), CardFace('QS'), CardFace('*'))
+    >>> hand == { CardFace('10D'), CardFace('6S'), CardFace('QS'), CardFace('*') }
+    True
+    >>> CardSet.fromBits(hand.bits) == hand
+    True
+    >>> hand.add('QH')
+    Traceback (most recent call last):
+    ...
+    TypeError: Unsupported card type: str
+    """
+
+    __slots__ = ('_bits', 'cardClass')
+
+    def __init__(self, cards_ = (), cardClass = CardFace):
+        self._bits = 0
+        self.cardClass = cardClass
+        if isinstance(cards_, CardSet) and cards_.cardClass is cardClass:
+            self._bits = cards_._bits
+        else:
+            for card in cards_:
+                self.add(card)
+
+    @classmethod
+    def fromBits(class_, bits, cardClass = CardFace):
+        """
+        Create a set from a bitmask of card ordinals.
+
+        Parameters
+        ----------
+        bits : int
+            A non-negative number with bits set at the ordinals
+            of cards in the new set.
+        cardClass : type, optional
+            The class of cards in the new set, `CardFace` by default.
+
+        Returns
+        -------
+        CardSet
+            The new set of cards.
+        """
+
+        set_ = class_((), cardClass)
+        set_._bits = bits
+        return set_
+
+    @property
+    def bits(self):
+        """
+        Read-only property with the bitmask of card ordinals in
+        this set.
+        """
+
+        return self._bits
+
+    def _bitOf(self, card):
+        if not isinstance(card, self.cardClass):
+            raise TypeError('Unsupported card type: %s' % type(card).__name__)
+        return 1 << card.ordinal
+
+    def _maskOf(self, key, predicate):
+        key = (self.cardClass, key)
+        mask = self._MASKS.get(key)
+        if mask is None:
+            mask = 0
+            for card in self.cardClass._cardsByOrdinal():
+                if predicate(card):
+                    mask |= 1 << card.ordinal
+            mask = self._MASKS.setdefault(key, mask)
+        return mask
+
+    _MASKS = {}
+
+    def __contains__(self, card):
+        return (isinstance(card, self.cardClass)
+                and bool(self._bits >> card.ordinal & 1))
+
+    def __iter__(self):
+        bits = self._bits
+        fromOrdinal = self.cardClass.fromOrdinal
+        while bits:
+            low = bits & -bits
+            yield fromOrdinal(low.bit_length() - 1)
+            bits ^= low
+
+    def __len__(self):
+        return bin(self._bits).count('1')
+
+    def __bool__(self):
+        return 0 != self._bits
+
+    def __repr__(self):
+        return '%s(%s)' % (type(self).__name__,
+                           ', '.join(repr(card) for card in self))
+
+    def __eq__(self, other):
+        if isinstance(other, CardSet) and other.cardClass is self.cardClass:
+            return self._bits == other._bits
+        return super().__eq__(other)
+
+    __hash__ = None
+
+    def _sameKind(self, other):
+        return isinstance(other, CardSet) and other.cardClass is self.cardClass
+
+    def _fromBits(self, bits):
+        return type(self).fromBits(bits, self.cardClass)
+
+    def _from_iterable(self, iterable):
+        return type(self)(iterable, self.cardClass)
+
+    def __and__(self, other):
+        if self._sameKind(other):
+            return self._fromBits(self._bits & other._bits)
+        return super().__and__(other)
+
+    def __or__(self, other):
+        if self._sameKind(other):
+            return self._fromBits(self._bits | other._bits)
+        return super().__or__(other)
+
+    def __sub__(self, other):
+        if self._sameKind(other):
+            return self._fromBits(self._bits & ~other._bits)
+        return super().__sub__(other)
+
+    def __xor__(self, other):
+        if self._sameKind(other):
+            return self._fromBits(self._bits ^ other._bits)
+        return super().__xor__(other)
+
+    def __le__(self, other):
+        if self._sameKind(other):
+            return 0 == self._bits & ~other._bits
+        return super().__le__(other)
+
+    def __ge__(self, other):
+        if self._sameKind(other):
+            return 0 == other._bits & ~self._bits
+        return super().__ge__(other)
+
+    def isdisjoint(self, other):
+        if self._sameKind(other):
+            return 0 == self._bits & other._bits
+        return super().isdisjoint(other)
+
+    def __ior__(self, other):
+        if self._sameKind(other):
+            self._bits |= other._bits
+            return self
+        return super().__ior__(other)
+
+    def __iand__(self, other):
+        if self._sameKind(other):
+            self._bits &= other._bits
+            return self
+        return super().__iand__(other)
+
+    def __isub__(self, other):
+        if self._sameKind(other):
+            self._bits &= ~other._bits
+            return self
+        return super().__isub__(other)
+
+    def __ixor__(self, other):
+        if self._sameKind(other):
+            self._bits ^= other._bits
+            return self
+        return super().__ixor__(other)
+
+    def add(self, card):
+        self._bits |= self._bitOf(card)
+
+    def discard(self, card):
+        self._bits &= ~self._bitOf(card)
+
+    def clear(self):
+        self._bits = 0
+
+    def update(self, cards_):
+        """
+        Add cards from an iterable to this set.
+        """
+
+        if self._sameKind(cards_):
+            self._bits |= cards_._bits
+        else:
+            for card in cards_:
+                self.add(card)
+
+    def copy(self):
+        return self._fromBits(self._bits)
+
+    def ofSuit(self, suit):
+        """
+        Return a new set with the cards of a suit from this set.
+
+        Parameters
+        ----------
+        suit : str | None
+            The suit of cards to select, ``None`` for the jokers.
+
+        Returns
+        -------
+        CardSet
+            The cards of that suit found in this set.
+        """
+
+        return self._fromBits(self._bits & self._maskOf(
+            ('suit', suit), lambda card: suit == card.suit))
+
+    def ofRank(self, rank):
+        """
+        Return a new set with the cards of a rank from this set.
+
+        Parameters
+        ----------
+        rank : str
+            The rank of cards to select.
+
+        Returns
+        -------
+        CardSet
+            The cards of that rank found in this set.
+        """
+
+        return self._fromBits(self._bits & self._maskOf(
+            ('rank', rank), lambda card: rank == card.rank))
+
 class DeckFactory(collections.Iterable, metaclass=abc.ABCMeta):
     """
     A protocol for classes that create decks of cards.
@@ -636,23 +1131,34 @@ class Dealer:
     Each object of this class contains its own source of randomness,
     which is created and seeded by the constructor.
     
-[    Parameters
-    --------------------
-    <var>[, <var>] : <type | value-list>[, optional]
-        <Description of constructor's parameter(s), except ``self``>
-    ...]
+    Parameters
+    ----------
+    seed : int, optional
+        The seed of this object's source of randomness. Dealers with
+        equal seeds shuffle decks the same way, which allows to repeat
+        a game. A random seed is chosen if this is omitted.
+    fast : bool, optional
+        Shuffle decks with a single pass of the Fisher-Yates algorithm
+        implemented by `random.Random.shuffle`, which is faster than
+        the default algorithm and gives all orders of cards the same
+        chance. Dealers in this mode shuffle decks differently from
+        the default mode with the same `seed`.
 
-[    Attributes
-    -----------------
-    <name_of_a_property_having_its_own_docstring> # or #
-    <var>[, <var>] : <type | value-list>
-        <Description of an attribute>
-    ...]
+    Attributes
+    ----------
+    seed : int
+        The seed of this object's source of randomness.
+    fast : bool
+        Tells whether this object shuffles decks in the fast mode.
+    random : random.Random
+        This object's source of randomness.
 
     Methods
     ---------------
     shuffle(deck, times)
         Shuffle a collection (deck) of objects such as cards.
+    shuffleMany(deck, count)
+        Shuffle many copies of a deck for simulations.
     deal(deck, handCount, cardsPerHand, cardsPerBatch, stockOffset)
         Deal hands from a collection of objects (deck of cards).
 
@@ -682,10 +1188,21 @@ class Dealer:
     >>> deck[0].isJoker()
     False
     
-    TODO: <In the doctest format, illustrate how to use this class.>
+    >>> dealer = Dealer()
+    >>> Dealer(dealer.seed).shuffle(factory) == dealer.shuffle(factory)
+    True
+    >>> dealer = Dealer(fast = True)
+    >>> Dealer(dealer.seed, True).shuffle(factory) == dealer.shuffle(factory)
+    True
     """
-    def __init__(self):
-        self.random = random.Random()
+    def __init__(self, seed = None, fast = False):
+        if seed is None:
+            seed = self._SEEDS.getrandbits(64)
+        self.seed = seed
+        self.fast = fast
+        self.random = random.Random(seed)
+
+    _SEEDS = random.SystemRandom()
 
     def shuffle(self, deck, times = 1):
         """
@@ -700,7 +1217,8 @@ class Dealer:
             A source of objects to shuffle.
         times : int, optional
             The number of times the deck is to be shuffled, must be
-            positive.
+            positive. Decks are shuffled once in the `fast` mode
+            regardless of this number.
     
         Returns
         -------
@@ -721,6 +1239,14 @@ class Dealer:
         Cards are stored in a list, then shuffled by swapping all its
         elements in a linear sequence with random peers. This object's
         own source of randomness is used to determine the peers.
+        Since any element may be swapped with any peer, some orders
+        of cards come out more often than others after one pass.
+        The `fast` mode uses `random.Random.shuffle` instead, which
+        is Python's own Fisher-Yates shuffle: it only swaps each
+        element with a peer that precedes it, so a single pass gives
+        all orders the same chance and `times` is ignored. It runs
+        in the interpreter just like the default mode, and is faster
+        only because it makes one pass with cheaper random numbers.
     
         Examples
         --------
@@ -761,6 +1287,9 @@ class Dealer:
                 shuffled[i] = card
                 i += 1
         count = i
+        if self.fast:
+            self.random.shuffle(shuffled)
+            return shuffled
         while 0 < times:
             i = count
             while 0 < i:
@@ -770,6 +1299,81 @@ class Dealer:
             times -= 1 
         return shuffled
 
+    def shuffleMany(self, deck, count):
+        """
+        Shuffle many copies of a deck at once for simulations.
+
+        Shuffled decks are returned as rows of card ordinals, which
+        are the `CardFace.ordinal` values of the cards in the `deck`.
+        Use `CardFace.fromOrdinal` to turn them back into cards.
+        Rows are generated by NumPy when it is installed, which is
+        much faster than shuffling the decks one at a time. Otherwise,
+        each row is shuffled by `random.Random.shuffle`. Either way,
+        the rows are determined by this object's `seed` and the number
+        of its earlier calls.
+
+        Parameters
+        ----------
+        deck : DeckFactory | collections.Iterable
+            A source of `CardFace` objects to shuffle.
+        count : int
+            The number of shuffled decks to return.
+
+        Returns
+        -------
+        numpy.ndarray | list
+            A ``(count, len(deck))`` array of the smallest unsigned
+            integer type that holds the ordinals, or a list of lists
+            of ordinals if NumPy is not installed.
+
+        Raises
+        ------
+        ValueError
+            If `count` is negative.
+
+        Examples
+        --------
+        >>> dealer = Dealer()
+        >>> factory = SimpleDeckFactory(6,0)
+        >>> ordinals = sorted(card.ordinal for card in factory.makeDeck())
+        >>> decks = dealer.shuffleMany(factory, 1000)
+        >>> len(decks), len(decks[0])
+        (1000, 36)
+        >>> all(sorted(deck) == ordinals for deck in decks)
+        True
+        >>> len(set(tuple(deck) for deck in decks))
+        1000
+        >>> set(CardFace.fromOrdinal(ordinal) for ordinal in decks[0]) \\
+        ...  == set(factory.makeDeck())
+        True
+        >>> again = Dealer(dealer.seed).shuffleMany(factory, 1000)
+        >>> all(list(a) == list(b) for a, b in zip(again, decks))
+        True
+        """
+
+        if 0 > count:
+            raise ValueError("Value of 'count' must not be negative, got: %d"
+                % count)
+        if isinstance(deck, DeckFactory):
+            deck = deck.makeDeck()
+        ordinals = [ card.ordinal for card in deck ]
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        if numpy is None:
+            decks = []
+            for i in range(count):
+                shuffled = list(ordinals)
+                self.random.shuffle(shuffled)
+                decks.append(shuffled)
+            return decks
+        keys = numpy.random.RandomState(self.random.getrandbits(32)) \
+            .random_sample((count, len(ordinals)))
+        ordinals = numpy.asarray(ordinals, dtype = numpy.min_scalar_type(
+            max(ordinals) if ordinals else 0))
+        return ordinals[keys.argsort(axis = 1)]
+
     def deal(self,
              deck,
              handCount,
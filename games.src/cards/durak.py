@@ -59,7 +59,6 @@ import os
 
 import version
 import mapping
-import sets
 
 import cards.game
 from cards import CardFace
@@ -118,6 +117,11 @@ class Game(cards.game.Game):
     stockCount : int
         The number of cards remaining in stock, including the trump
         card.
+    ranksOnTable : frozenset
+        Ranks of the cards played during the current turn.
+    stateVersion : int
+        The version of this game's state, which changes with
+        every move.
     rankKeys : collections.Mapping
         Maps known card ranks to integer values for ordering
         within a suit. Jokers do not have a rank.
@@ -131,6 +135,18 @@ class Game(cards.game.Game):
     ---------------
     cardsOnTable(self):
         Takes a snapshot of the cards played during the current turn.
+    snapshot(self):
+        Takes an immutable snapshot of the game's visible state.
+    clone(self):
+        Makes a copy of the game for looking ahead at its moves.
+    pushPosition(self), popPosition(self):
+        Save the game's state and restore it after trying some moves.
+    canBeat(self, card, target):
+        Tells whether a card beats another card in this game.
+    legalMoves(self, player):
+        Determines the moves that a player may make at this time.
+    beatersOf(self, card):
+        Returns all cards of this game's deck that beat a card.
     createDeckFactory(settings):
         Creates a factory object according to this game's configuration.
     rankKey(rank):
@@ -186,6 +202,8 @@ TODOdoc:
         self._firstAttackClaims = None
         self._cardsOnTable = None
         self._turn = None
+        self._stateVersion = 0
+        self._positions = []
         playerCount = len(self.players)
         playerCountRange = self.playerCountRange
         if playerCountRange[0] > playerCount:
@@ -566,7 +584,7 @@ TODOdoc:
         newGame.result = self.result
         return newGame
 
-    def start(self, dealer=None):
+    def start(self, dealer=None, attacker=None):
         """
         Establish initial state of a game in progress.
         
@@ -583,6 +601,9 @@ TODOdoc:
             A dealer that will deal cards for this game. If omitted,
             a new `cards.Dealer` object with default settings will be
             created.
+        attacker : int, optional
+            The index of the first attacker, which overrides the rules
+            of choosing one, e.g. to replay a recorded game.
 
         Returns
         -------
@@ -598,7 +619,7 @@ TODOdoc:
             type.
         ValueError
             If ``FIRSTATTACKER`` environment variable is not an integer
-            or out of range.
+            or out of range, or the `attacker` is out of range.
     
         Examples
         --------
@@ -638,7 +659,8 @@ TODOdoc:
         if dealer is None:
             dealer = cards.Dealer()
         deck = dealer.shuffle(self.deckFactory.makeDeck(), 3)
-        deal = dealer.deal(deck, len(self.players), self.cardsPerHand)
+        cardsPerHand = self._settings.cardsPerHand
+        deal = dealer.deal(deck, len(self.players), cardsPerHand)
 #        if os.environ.get('TESTHANDOVERFLOW'):
 #            self._stock = deal[0][:1]
 #            deal[-1].extend(deal[0][1:])
@@ -655,8 +677,15 @@ TODOdoc:
                 ('Cannot extract suit information from the trump card' +
                 ', cards of type %s are not supported') % type(last))
         self.trumpCard = last
+        self._stockSet = cards.CardSet(self._stock)
+        deckSet = self._stockSet.copy()
+        for hand in deal[1:]:
+            deckSet.update(hand)
+        self._beats = self._beatsTable(last.suit, deckSet)
         self._cardsOnTable = collections.OrderedDict()
-        self._discarded = set()
+        self._tableSet = cards.CardSet()
+        self._ranksOnTable = set()
+        self._discarded = cards.CardSet()
         self._turn = 0
         self._quits = set() 
         i = 1
@@ -665,9 +694,17 @@ TODOdoc:
             self._dealt.append(deal[i])
             player._receiveCards(tuple(deal[i]))
             i += 1
-        self._cardsDefending = self.cardsPerHand
+        self._cardsDefending = cardsPerHand
         index = os.environ.get('FIRSTATTACKER') 
-        if index:
+        if attacker is not None:
+            if 0 <= attacker < len(self.players):
+                self.attacker = attacker
+            else:
+                raise ValueError(
+                    'attacker %d is out of range (0, %d)'
+                    % (attacker, len(self.players))
+                )
+        elif index:
             index = int(index)
             if 0 <= index < len(self.players):
                 self.attacker = index
@@ -683,7 +720,7 @@ TODOdoc:
                 )[1] if self._firstAttackClaims else \
                     random.randrange(len(self.players))
             self.attacker = index
-        elif self.settings['loserDefends']:
+        elif self._settings.loserDefends:
             # make the fool first defendant
             self.attacker = self.nextPlayersIndex(self.result[1], reverse = True)
         else:
@@ -693,8 +730,520 @@ TODOdoc:
         del self._dealt
         self._firstAttackClaims = None
         self.result = (None, None)
+        self._stateVersion += 1
+        return self
+
+    @property
+    def stateVersion(self):
+        """
+        Read-only property with the version of this game's state.
+
+        The version starts at zero and grows by one each time the
+        game is started or a move changes its state, so equal
+        versions of a game imply equal state.
+
+        Returns
+        -------
+        int
+            The current state version.
+        """
+
+        return self._stateVersion
+
+    Snapshot = collections.namedtuple('Snapshot',
+        ('version', 'cardsOnTable', 'stockCount', 'trumpCard',
+         'cardCounts', 'statuses', 'attacker', 'defendant', 'playing'))
+
+    def snapshot(self):
+        """
+        Take an immutable snapshot of the publicly visible state of
+        this game.
+
+        The snapshot does not reference any mutable objects of the
+        game, so it may be shared with other threads while the game
+        goes on. Callers must not modify the game while this method
+        runs.
+
+        Returns
+        -------
+        Game.Snapshot
+            A named tuple with the `stateVersion` as ``version``,
+            a tuple of `cardsOnTable` pairs, the `stockCount`, the
+            `trumpCard`, tuples with the number of cards on each
+            player's hand and each player's status indexed by seat,
+            and the values of `attacker`, `defendant` and `playing`.
+
+        Raises
+        ------
+        RuntimeError
+            If the game has not been started yet.
+
+        Examples
+        --------
+        >>> def factory(game, playerNo):
+        ...   return Player()
+        >>> game = Game(factory).start()
+        >>> snapshot = game.snapshot()
+        >>> snapshot.version == game.stateVersion
+        True
+        >>> snapshot.cardsOnTable, snapshot.stockCount, snapshot.cardCounts
+        ((), 24, (6, 6))
+        >>> snapshot.statuses[game.attacker], snapshot.playing
+        ('attacking', True)
+        >>> attacker = game.players[game.attacker]
+        >>> card = next(iter(attacker.hand))
+        >>> attacker.attack([card]) == {card}
+        True
+        >>> game.stateVersion > snapshot.version
+        True
+        >>> snapshot.cardsOnTable
+        ()
+        >>> game.snapshot().cardsOnTable == ((card,),)
+        True
+        """
+
+        if self._turn is None:
+            raise RuntimeError("The game hasn't been started yet")
+        return self.Snapshot(
+            self._stateVersion,
+            tuple(self.cardsOnTable()),
+            len(self._stock),
+            self.trumpCard,
+            tuple(len(player._hand) for player in self.players),
+            tuple(player.status for player in self.players),
+            self.attacker,
+            self.defendant,
+            self.playing
+        )
+
+    STATE_FORMAT = 1
+
+    def saveState(self):
+        """
+        Record the complete state of this game in a compact form
+        that can be converted to JSON.
+
+        The state includes the cards in stock in the order they
+        will be dealt, the cards on the table, discarded and held
+        by each player, as well as the turn, players that quit it,
+        the attacker, defendant, and results and scores of the
+        players. Game settings and player names are not included.
+        Callers must not modify the game while this method runs.
+
+        Returns
+        -------
+        dict
+            A dictionary of lists, strings, numbers and ``None``
+            values, with cards represented by their codes.
+
+        Raises
+        ------
+        RuntimeError
+            If the game has not been started yet.
+
+        See Also
+        --------
+        restoreState : Restores a game from the value returned here.
+
+        Examples
+        --------
+        >>> import json
+        >>> def factory(game, playerNo):
+        ...   return Player()
+        >>> game = Game(factory).start()
+        >>> attacker = game.players[game.attacker]
+        >>> card = next(iter(attacker.hand))
+        >>> attacker.attack([card]) == {card}
+        True
+        >>> state = game.saveState()
+        >>> json.loads(json.dumps(state)) == state
+        True
+        >>> state['table'] == [[card.code, None]], len(state['stock'])
+        (True, 24)
+        >>> copy = Game(factory).restoreState(state)
+        >>> copy.saveState() == state
+        True
+        >>> copy.snapshot() == game.snapshot()
+        True
+        >>> defendant = copy.players[copy.defendant]
+        >>> tuple(defendant.hand) == tuple(game.players[game.defendant].hand)
+        True
+        >>> copy.legalMoves(defendant).quitTurn
+        True
+        """
+
+        if self._turn is None:
+            raise RuntimeError("The game hasn't been started yet")
+        return {
+            'format' : self.STATE_FORMAT,
+            'stateVersion' : self._stateVersion,
+            'turn' : self._turn,
+            'attacker' : self.attacker,
+            'defendant' : self.defendant,
+            'result' : None if self.result is None else list(self.result),
+            'cardsDefending' : getattr(self, '_cardsDefending', None),
+            'trump' : self.trumpCard.code,
+            'stock' : [ card.code for card in self._stock ],
+            'table' : [ [ attack.code, None if defense is None else defense.code ]
+                        for attack, defense in self._cardsOnTable.items() ],
+            'discarded' : [ card.code for card in self._discarded ],
+            'quits' : sorted(self._quits),
+            'hands' : [ [ card.code for card in player._hand ]
+                        for player in self.players ],
+            'scores' : [ [ player.wins, player.losses, player.gamesPlayed ]
+                         for player in self.players ],
+        }
+
+    def restoreState(self, state):
+        """
+        Restore a game recorded by `saveState` into this object.
+
+        This object must have the same settings and number of players
+        as the game that was saved, and must not have been started.
+        Players' hands and scores are replaced with the saved values.
+
+        Parameters
+        ----------
+        state : collections.Mapping
+            A value returned by `saveState`, or its copy
+            converted from JSON.
+
+        Returns
+        -------
+        Game
+            A reference to this object.
+
+        Raises
+        ------
+        Error
+            If this game has already been started.
+        ValueError
+            If the `state` has an unknown format or doesn't
+            match the number of players in this game.
+        """
+
+        if self._turn is not None:
+            raise Error(
+                'A game is in progress or ended at bout #%d,'
+                ' cannot restore it'
+                % ( self._turn + 1 )
+            )
+        if state.get('format') != self.STATE_FORMAT:
+            raise ValueError('Unknown format of game state: %r'
+                             % state.get('format'))
+        if len(state['hands']) != len(self.players):
+            raise ValueError(
+                'Saved game has %d player(s), this game has %d'
+                % (len(state['hands']), len(self.players)))
+        self.trumpCard = CardFace(state['trump'])
+        self._stock = [ CardFace(code) for code in state['stock'] ]
+        self._stockSet = cards.CardSet(self._stock)
+        self._cardsOnTable = collections.OrderedDict(
+            (CardFace(attack), None if defense is None else CardFace(defense))
+            for attack, defense in state['table'])
+        self._tableSet = cards.CardSet(
+            card for pair in self._cardsOnTable.items()
+            for card in pair if card is not None)
+        self._ranksOnTable = { card.rank for card in self._tableSet }
+        self._discarded = cards.CardSet(
+            CardFace(code) for code in state['discarded'])
+        deckSet = self._stockSet | self._tableSet | self._discarded
+        for player, hand, scores in zip(
+                self.players, state['hands'], state['scores']):
+            player._hand = cards.CardSet(CardFace(code) for code in hand)
+            player.modCount += 1
+            deckSet |= player._hand
+            player.wins, player.losses, player._gamesPlayed = scores
+        self._beats = self._beatsTable(self.trumpCard.suit, deckSet)
+        self._quits = set(state['quits'])
+        self._turn = state['turn']
+        self.attacker = state['attacker']
+        self.defendant = state['defendant']
+        self.result = (None if state['result'] is None
+                       else tuple(state['result']))
+        if state['cardsDefending'] is not None:
+            self._cardsDefending = state['cardsDefending']
+        self._firstAttackClaims = None
+        self._stateVersion = state['stateVersion']
         return self
 
+    def clone(self):
+        """
+        Make a copy of this game for looking ahead at its moves.
+
+        The copy is a plain `Game` that shares this game's settings,
+        deck factory and the table of cards that beat other cards,
+        and has plain `Player` objects with copies of the players'
+        hands, names and scores in the same seats. Thus, moves made
+        on the copy do not notify this game's players or observers.
+        Callers must not modify this game while this method runs.
+
+        Returns
+        -------
+        Game
+            The copy of this game.
+
+        Raises
+        ------
+        RuntimeError
+            If the game has not been started yet.
+
+        See Also
+        --------
+        pushPosition : Saves the position of a game to be restored
+            after trying moves on it.
+
+        Examples
+        --------
+        >>> def factory(game, playerNo):
+        ...   return Player()
+        >>> game = Game(factory).start()
+        >>> copy = game.clone()
+        >>> copy.saveState() == game.saveState()
+        True
+        >>> attacker = copy.players[copy.attacker]
+        >>> card = next(iter(attacker.hand))
+        >>> attacker.attack([card]) == {card}
+        True
+        >>> copy.countPairsOnTable(), game.countPairsOnTable()
+        (1, 0)
+        >>> card in game.players[game.attacker].hand
+        True
+        """
+
+        if self._turn is None:
+            raise RuntimeError("The game hasn't been started yet")
+        copy = Game.__new__(Game)
+        copy._settings = self._settings
+        copy.deckFactory = self.deckFactory
+        copy.players = []
+        for seat, player in enumerate(self.players):
+            twin = Player()
+            twin._game = copy
+            twin._seat = seat
+            twin._name = player._name
+            twin._gamesPlayed = player._gamesPlayed
+            twin.wins, twin.losses = player.wins, player.losses
+            twin._hand = player._hand.copy()
+            copy.players.append(twin)
+        copy.attacker = self.attacker
+        copy.defendant = self.defendant
+        copy.result = self.result
+        copy.trumpCard = self.trumpCard
+        copy._firstAttackClaims = None
+        copy._turn = self._turn
+        copy._stateVersion = self._stateVersion
+        copy._beats = self._beats
+        copy._stock = list(self._stock)
+        copy._stockSet = self._stockSet.copy()
+        copy._cardsOnTable = collections.OrderedDict(self._cardsOnTable)
+        copy._tableSet = self._tableSet.copy()
+        copy._ranksOnTable = set(self._ranksOnTable)
+        copy._discarded = self._discarded.copy()
+        copy._quits = set(self._quits)
+        if hasattr(self, '_cardsDefending'):
+            copy._cardsDefending = self._cardsDefending
+        copy._positions = []
+        return copy
+
+    Position = collections.namedtuple('Position',
+        ('stock', 'stockBits', 'table', 'discarded', 'hands', 'quits',
+         'attacker', 'defendant', 'result', 'turn', 'cardsDefending',
+         'scores'))
+
+    def position(self):
+        """
+        Record the state of this game in a compact immutable form.
+
+        Unlike `saveState`, this method keeps card objects as they are
+        and represents sets of cards by their bitmasks, so that it is
+        cheap enough to call before every move tried by a search.
+
+        Returns
+        -------
+        Game.Position
+            A named tuple with a tuple of cards in ``stock`` and their
+            ``stockBits``, a tuple of card pairs on the ``table``,
+            bitmasks of ``discarded`` cards and the players' ``hands``,
+            a frozenset of seats that ``quits`` the turn, the `attacker`,
+            `defendant`, `result`, ``turn`` number and the number of
+            ``cardsDefending`` in the turn, and the ``scores`` of the
+            players.
+
+        Raises
+        ------
+        RuntimeError
+            If the game has not been started yet.
+
+        See Also
+        --------
+        setPosition : Restores the state recorded here.
+        """
+
+        if self._turn is None:
+            raise RuntimeError("The game hasn't been started yet")
+        players = self.players
+        return self.Position(
+            tuple(self._stock),
+            self._stockSet.bits,
+            tuple(self._cardsOnTable.items()),
+            self._discarded.bits,
+            tuple(player._hand.bits for player in players),
+            frozenset(self._quits),
+            self.attacker,
+            self.defendant,
+            self.result,
+            self._turn,
+            getattr(self, '_cardsDefending', None),
+            tuple((player.wins, player.losses, player._gamesPlayed)
+                  for player in players)
+        )
+
+    def setPosition(self, position):
+        """
+        Restore the state of this game recorded by `position`.
+
+        The position must have been recorded by this game or by its
+        `clone`. The `stateVersion` keeps growing when a position is
+        restored, so that equal versions still imply equal state.
+
+        Parameters
+        ----------
+        position : Game.Position
+            A value returned by `position`.
+
+        Raises
+        ------
+        RuntimeError
+            If the game has not been started yet.
+        """
+
+        if self._turn is None:
+            raise RuntimeError("The game hasn't been started yet")
+        self._stock = list(position.stock)
+        self._stockSet = cards.CardSet.fromBits(position.stockBits)
+        self._cardsOnTable = collections.OrderedDict(position.table)
+        tableSet = self._tableSet
+        tableSet.clear()
+        for attack, defense in position.table:
+            tableSet.add(attack)
+            if defense is not None:
+                tableSet.add(defense)
+        self._ranksOnTable = { card.rank for card in tableSet }
+        self._discarded = cards.CardSet.fromBits(position.discarded)
+        for player, bits, scores in zip(
+                self.players, position.hands, position.scores):
+            hand = player._hand
+            if hand.bits != bits:
+                hand.clear()
+                hand |= cards.CardSet.fromBits(bits, hand.cardClass)
+                player.modCount += 1
+            player.wins, player.losses, player._gamesPlayed = scores
+        self._quits = set(position.quits)
+        self.attacker = position.attacker
+        self.defendant = position.defendant
+        self.result = position.result
+        self._turn = position.turn
+        if position.cardsDefending is None:
+            if hasattr(self, '_cardsDefending'):
+                del self._cardsDefending
+        else:
+            self._cardsDefending = position.cardsDefending
+        self._stateVersion += 1
+
+    def pushPosition(self):
+        """
+        Save the current state of this game to be restored by
+        `popPosition` after trying some moves.
+
+        Saved positions are kept on a stack, so that a search can
+        make moves deeper down a line of play and unmake them
+        one by one on its way back.
+
+        Returns
+        -------
+        int
+            The number of positions on the stack, including the
+            one just saved.
+
+        Raises
+        ------
+        RuntimeError
+            If the game has not been started yet.
+
+        Notes
+        -----
+        The stack keeps whole positions rather than the changes made
+        by each move. A position is a dozen small values, as cards
+        are shared and card sets are stored as bitmasks, so saving
+        and restoring it costs a few microseconds, while undoing
+        the moves would have to be taught to every kind of move.
+        Run ``python -m cards.simulation --rollouts N`` to see the
+        rate of rollouts and the share of time taken by the stack,
+        see `cards.simulation.measureRollouts`.
+
+        Examples
+        --------
+        >>> def factory(game, playerNo):
+        ...   return Player()
+        >>> game = Game(factory).start().clone()
+        >>> state = game.saveState()
+        >>> game.pushPosition()
+        1
+        >>> attacker = game.players[game.attacker]
+        >>> defendant = game.players[game.defendant]
+        >>> card = next(iter(attacker.hand))
+        >>> attacker.attack([card]) == {card}
+        True
+        >>> game.pushPosition()
+        2
+        >>> defendant.quitTurn()
+        >>> attacker.quitTurn()
+        >>> len(defendant.hand), game.countPairsOnTable()
+        (7, 0)
+        >>> game.popPosition()
+        1
+        >>> len(defendant.hand), game.countPairsOnTable()
+        (6, 1)
+        >>> game.popPosition()
+        0
+        >>> del state['stateVersion']
+        >>> restored = game.saveState()
+        >>> restored['stateVersion'] > 2
+        True
+        >>> del restored['stateVersion']
+        >>> restored == state
+        True
+        >>> game.popPosition()
+        Traceback (most recent call last):
+        ...
+        cards.durak.Error: There are no saved positions of the game
+        """
+
+        self._positions.append(self.position())
+        return len(self._positions)
+
+    def popPosition(self):
+        """
+        Restore the state of this game saved by the latest call of
+        `pushPosition` and remove it from the stack.
+
+        Returns
+        -------
+        int
+            The number of positions remaining on the stack.
+
+        Raises
+        ------
+        Error
+            If there are no saved positions of this game.
+        """
+
+        if not self._positions:
+            raise Error('There are no saved positions of the game')
+        self.setPosition(self._positions.pop())
+        return len(self._positions)
+
     def cardsOnTable(self):
         """
         Take a snapshot of the cards played during the current turn.
@@ -750,6 +1299,46 @@ TODOdoc:
             raise RuntimeError("The game hasn't been started yet")
         return len(self._cardsOnTable)
 
+    @property
+    def ranksOnTable(self):
+        """
+        Read-only property with the ranks of cards played during the
+        current turn.
+
+        The ranks of attacking and defending cards on the table are
+        indexed as they are played, and the index is cleared when the
+        turn ends. Cards thrown into an attack must have one of
+        these ranks.
+
+        Returns
+        -------
+        frozenset
+            Ranks of all cards currently laying on the table.
+
+        Raises
+        ------
+        RuntimeError
+            If the game has not been started yet.
+
+        Examples
+        --------
+        >>> def factory(game, playerNo):
+        ...   return Player()
+        >>> game = Game(factory).start()
+        >>> game.ranksOnTable
+        frozenset()
+        >>> attacker = game.players[game.attacker]
+        >>> card = next(iter(attacker.hand))
+        >>> attacker.attack([card]) == {card}
+        True
+        >>> game.ranksOnTable == {card.rank}
+        True
+        """
+
+        if self._cardsOnTable is None:
+            raise RuntimeError("The game hasn't been started yet")
+        return frozenset(self._ranksOnTable)
+
     @property
     def stockCount(self):
         """
@@ -861,7 +1450,7 @@ TODOdoc:
                 + ' trump card')
         if self.attacker is not None or lowTrump.suit != self.trumpCard.suit:
             return
-        index = self.players.index(player)
+        index = self._seatOf(player)
         if lowTrump not in self._dealt[index]:
             raise Error(
                 'Card %s is not on the hand dealt to player #%d'
@@ -871,12 +1460,252 @@ TODOdoc:
             self._firstAttackClaims = [ ]
         self._firstAttackClaims.append((lowTrump.rank, index))
 
-    def _isCardLimitReached(self):
+    _beatsTables = {}
+
+    @classmethod
+    def _beatsTable(class_, trumpSuit, deck):
+        """
+        Return a tuple indexed by card ordinals with bitmasks of
+        cards from ``deck`` that beat each card of ``deck`` when
+        ``trumpSuit`` is the trump. Tables are shared by games that
+        play the same deck with the same trump.
+        """
+
+        key = (trumpSuit, deck.bits)
+        table = class_._beatsTables.get(key)
+        if table is None:
+            table = [ 0 ] * len(deck.cardClass._cardsByOrdinal())
+            ranked = [ card for card in deck if card.rank in class_.rankKeys ]
+            for target in ranked:
+                mask = 0
+                for card in ranked:
+                    if card.suit == target.suit:
+                        if class_.rankKey(card.rank) > class_.rankKey(target.rank):
+                            mask |= 1 << card.ordinal
+                    elif card.suit == trumpSuit:
+                        mask |= 1 << card.ordinal
+                table[target.ordinal] = mask
+            table = class_._beatsTables.setdefault(key, tuple(table))
+        return table
+
+    def canBeat(self, card, target):
+        """
+        Tell whether a card beats another card in this game.
+
+        A card beats a higher card of the same suit, and a trump
+        beats any card of another suit. The answer is looked up in
+        a table built by `start` for the game's deck and trump.
+
+        Parameters
+        ----------
+        card : cards.CardFace
+            The defending card.
+        target : cards.CardFace
+            The attacking card.
+
+        Returns
+        -------
+        bool
+            Whether ``card`` beats ``target``. Cards that are not
+            in this game's deck beat nothing and cannot be beaten.
+
+        Raises
+        ------
+        RuntimeError
+            If the game has not been started yet.
+        TypeError
+            If either argument is not a card.
+
+        See Also
+        --------
+        beatersOf : Returns all cards that beat a card.
+
+        Examples
+        --------
+        >>> def factory(game, playerNo):
+        ...   return Player()
+        >>> game = Game(factory).start()
+        >>> trump = game.trumpCard.suit
+        >>> other = next(suit for suit in Game.defaultSuitOrder if suit != trump)
+        >>> game.canBeat(CardFace('ace', other), CardFace('6', other))
+        True
+        >>> game.canBeat(CardFace('6', other), CardFace('ace', other))
+        False
+        >>> game.canBeat(CardFace('6', trump), CardFace('ace', other))
+        True
+        >>> game.canBeat(CardFace('ace', other), CardFace('6', trump))
+        False
+        >>> game.canBeat(CardFace('ace', other), CardFace('2', other))
+        False
+        """
+
+        if self._turn is None:
+            raise RuntimeError("The game hasn't been started yet")
+        for arg in (card, target):
+            if not isinstance(arg, cards.CardFace):
+                raise TypeError('received card of an unsupported %s' % type(arg))
+        return bool(self._beats[target.ordinal] >> card.ordinal & 1)
+
+    def beatersOf(self, card):
+        """
+        Return all cards of this game's deck that beat a card.
+
+        Parameters
+        ----------
+        card : cards.CardFace
+            The attacking card.
+
+        Returns
+        -------
+        cards.CardSet
+            A new set of cards that beat ``card``.
+
+        Raises
+        ------
+        RuntimeError
+            If the game has not been started yet.
+        TypeError
+            If the argument is not a card.
+
+        See Also
+        --------
+        canBeat : Tells whether a card beats another card.
+
+        Examples
+        --------
+        >>> def factory(game, playerNo):
+        ...   return Player()
+        >>> game = Game(factory).start()
+        >>> trump = game.trumpCard.suit
+        >>> other = next(suit for suit in Game.defaultSuitOrder if suit != trump)
+        >>> len(game.beatersOf(CardFace('ace', other)))
+        9
+        >>> game.beatersOf(CardFace('king', trump)) == {CardFace('ace', trump)}
+        True
+        >>> game.beatersOf(CardFace('QS')) >= game.beatersOf(CardFace('KS'))
+        True
+        """
+
+        if self._turn is None:
+            raise RuntimeError("The game hasn't been started yet")
+        if not isinstance(card, cards.CardFace):
+            raise TypeError('received card of an unsupported %s' % type(card))
+        return cards.CardSet.fromBits(self._beats[card.ordinal])
+
+    def _isPlayed(self, card):
+        # tell whether a card is on the table, discarded, or in stock
+        return (card in self._tableSet
+                or card in self._discarded
+                or card in self._stockSet)
+
+    def _cardLimit(self):
         # cap the limit at the actual number of defenders' cards
         # in the beginning of a turn
-        limit = min(self.cardsPerHand, self._cardsDefending) - (
+        return min(self._settings.cardsPerHand, self._cardsDefending) - (
              0 if self._turn else 1)
-        return len(self._cardsOnTable) >= limit
+
+    def _isCardLimitReached(self):
+        return len(self._cardsOnTable) >= self._cardLimit()
+
+    LegalMoves = collections.namedtuple('LegalMoves',
+        ('attack', 'throwIn', 'defense', 'quitTurn', 'cardLimit'))
+
+    def legalMoves(self, player):
+        """
+        Determine the moves that a player may make at this time.
+
+        Parameters
+        ----------
+        player : Player
+            Reference to a player attached to this game.
+
+        Returns
+        -------
+        Game.LegalMoves
+            A named tuple with the following elements:
+
+            attack : cards.CardSet
+                Cards that the player may lay to open an attack.
+                All cards laid in one move must have the same rank.
+            throwIn : cards.CardSet
+                Cards that the player may throw into an attack
+                already on the table.
+            defense : dict
+                Maps each unbeaten card on the table to a
+                `cards.CardSet` of the player's cards that beat it,
+                when the player defends. Cards that the player cannot
+                beat are omitted.
+            quitTurn : bool
+                Whether the player may quit the turn, which is how a
+                defendant concedes.
+            cardLimit : int
+                The number of cards that may still be laid in the
+                current turn.
+
+        Raises
+        ------
+        ValueError
+            If referenced `Player` object is not attached to this game.
+
+        See Also
+        --------
+        canBeat : Tells whether a card beats another card.
+
+        Examples
+        --------
+        >>> def factory(game, playerNo):
+        ...   return Player()
+        >>> game = Game(factory).start()
+        >>> attacker = game.players[game.attacker]
+        >>> defendant = game.players[game.defendant]
+        >>> moves = game.legalMoves(attacker)
+        >>> moves.attack == set(attacker.hand)
+        True
+        >>> moves.throwIn, moves.defense, moves.quitTurn, moves.cardLimit
+        (CardSet(), {}, False, 5)
+        >>> game.legalMoves(defendant)
+        LegalMoves(attack=CardSet(), throwIn=CardSet(), defense={}, quitTurn=False, cardLimit=5)
+        >>> card = next(iter(attacker.hand))
+        >>> attacker.attack([card]) == {card}
+        True
+        >>> moves = game.legalMoves(defendant)
+        >>> moves.defense.get(card, set()) == set(defendant.hand) & game.beatersOf(card)
+        True
+        >>> moves.quitTurn, moves.cardLimit
+        (True, 4)
+        >>> moves = game.legalMoves(attacker)
+        >>> moves.attack
+        CardSet()
+        >>> moves.throwIn == { card2 for card2 in attacker.hand if card2.rank == card.rank }
+        True
+        """
+
+        playerIndex = self._seatOf(player)
+        attack = cards.CardSet()
+        throwIn = cards.CardSet()
+        defense = {}
+        quitTurn = False
+        cardLimit = 0
+        if self.attacker is not None and self.defendant is not None:
+            cardLimit = max(0, self._cardLimit() - len(self._cardsOnTable))
+            quitTurn = bool(self._cardsOnTable)
+            hand = player._hand
+            if playerIndex in self._quits:
+                pass
+            elif playerIndex == self.defendant:
+                for card, beat in self._cardsOnTable.items():
+                    if beat is None:
+                        beaters = hand.bits & self._beats[card.ordinal]
+                        if beaters:
+                            defense[card] = cards.CardSet.fromBits(beaters)
+            elif not cardLimit:
+                pass
+            elif self._cardsOnTable:
+                for rank in self._ranksOnTable:
+                    throwIn |= hand.ofRank(rank)
+            elif playerIndex == self.attacker:
+                attack = hand.copy()
+        return self.LegalMoves(attack, throwIn, defense, quitTurn, cardLimit)
 
     def _attack(self, player, cards_):
         """
@@ -931,7 +1760,7 @@ TODOdoc:
         """
 
         # check that this attack is appropriate
-        playerIndex = self.players.index(player)
+        playerIndex = self._seatOf(player)
         if self.defendant is None or self.attacker is None:
             raise Error(
                 'attack by %s cannot be started at this time' % player
@@ -958,12 +1787,7 @@ TODOdoc:
             for card in cards_:
                 if not isinstance(card, cards.CardFace):
                     raise TypeError('received card of an unsupported %s' % type(cards_))
-                if not (
-                    any(card.rank == card2.rank for card2 in self._cardsOnTable.keys())
-                    or
-                    any(card.rank == card2.rank for card2 in self._cardsOnTable.values()
-                        if card2 is not None)
-                ):
+                if card.rank not in self._ranksOnTable:
                     raise Error(
                         "Rank of card '%s' does not match any of the cards on the table: %s"
                         % (card, self.cardsOnTable()) 
@@ -986,19 +1810,22 @@ TODOdoc:
         for card in cards_:
             if self._isCardLimitReached():
                 break
-            if (card in self._cardsOnTable
-             or card in self._cardsOnTable.values()
-             or card in self._discarded
-             or card in self._stock):
+            if self._isPlayed(card):
                 for card2 in laid:
                     del self._cardsOnTable[card2]
+                    self._tableSet.discard(card2)
+                self._ranksOnTable = { card2.rank for card2 in self._tableSet }
                 raise Error("card '%s' has already been played" % card.code)
             self._cardsOnTable[card] = None
+            self._tableSet.add(card)
+            self._ranksOnTable.add(card.rank)
             laid.add(card)
         if not self._stock and self.result[0] is None \
-            and set(self.players[playerIndex].hand) == laid:
+            and self.players[playerIndex]._hand == laid:
                 # this player may have won
                 self.result = (playerIndex, self.result[1])
+        if laid:
+            self._stateVersion += 1
         return laid
 
     def _defense(self, player, cardsMap):
@@ -1045,7 +1872,7 @@ TODOdoc:
         """
 
         # check that this move is appropriate
-        playerIndex = self.players.index(player)
+        playerIndex = self._seatOf(player)
         if self.defendant is None or self.attacker is None:
             raise Error(
                 'defense by %s is not allowed at this time' % player
@@ -1061,6 +1888,8 @@ TODOdoc:
     
         laid = set()
         was = collections.OrderedDict(self._cardsOnTable)
+        wasSet = self._tableSet.copy()
+        wasRanks = set(self._ranksOnTable)
         # check the cards laid
         for pair in cardsMap.items():
             card2 = pair[0]
@@ -1068,20 +1897,19 @@ TODOdoc:
              or self._cardsOnTable[card2] is not None):
                 continue
             card = pair[1]
-            if (card in self._cardsOnTable
-             or card in self._cardsOnTable.values()
-             or card in self._discarded
-             or card in self._stock):
+            if self._isPlayed(card):
                 self._cardsOnTable = was
+                self._tableSet = wasSet
+                self._ranksOnTable = wasRanks
                 raise Error("card '%s' has already been played" % card.code)
-            if card2.suit != card.suit:
-                if self.trumpCard.suit != card.suit:
-                    continue    # exclude non-trumps beating a different suit
-                # trump card always beats non-trump
-            elif self.rankKey(card.rank) <= self.rankKey(card2.rank):
-                continue # exclude lower card beating the same suit
+            if not self._beats[card2.ordinal] >> card.ordinal & 1:
+                continue # exclude cards that won't beat the attack
             self._cardsOnTable[card2] = card
+            self._tableSet.add(card)
+            self._ranksOnTable.add(card.rank)
             laid.add(card)
+        if laid:
+            self._stateVersion += 1
         return laid
 
     def _quitTurn(self, player):
@@ -1113,7 +1941,7 @@ TODOdoc:
             called.
         """
     
-        playerIndex = self.players.index(player)
+        playerIndex = self._seatOf(player)
         unbeat = any( card is None for card in self._cardsOnTable.values() )
         oldDefendant, oldAttacker = self.defendant, self.attacker
         if oldDefendant is None or oldAttacker is None \
@@ -1136,11 +1964,10 @@ TODOdoc:
               i in self._quits for i in range(0, len(self.players)) ):
             # abandoned defense - give the cards to ex-defendant
             defendant = self.players[self.defendant]
-            for pair in self._cardsOnTable.items():
-                defendant._receiveCards(pair[0])
-                if pair[1] is not None:
-                    defendant._receiveCards(pair[1])
+            defendant._receiveCards(self._tableSet)
             self._cardsOnTable.clear()
+            self._tableSet.clear()
+            self._ranksOnTable.clear()
             self.attacker = self.nextPlayersIndex(self.defendant)
             self.defendant = None
         elif not unbeat and (
@@ -1152,6 +1979,8 @@ TODOdoc:
                 assert pair[1] is not None
                 self._discarded.update(pair)
             self._cardsOnTable.clear()
+            self._tableSet.clear()
+            self._ranksOnTable.clear()
             self.attacker = self.defendant
             self.defendant = None
 
@@ -1202,6 +2031,7 @@ TODOdoc:
                     self._cardsDefending = len(self.players[i].hand)
                     self._turn += 1
 
+        self._stateVersion += 1
         if self.attacker is None:
             # end game
             del self._cardsDefending
@@ -1216,12 +2046,16 @@ TODOdoc:
         """
         
         hand = player.hand
-        while self.cardsPerHand > len(hand) and self._stock:
-            card = self._stock.pop()
-            player._receiveCards(card)
+        cardsPerHand = self._settings.cardsPerHand
+        count = min(cardsPerHand - len(hand), len(self._stock))
+        if 0 < count:
+            dealt = self._stock[-count:]
+            del self._stock[-count:]
+            self._stockSet -= cards.CardSet(dealt)
+            player._receiveCards(dealt)
         if not hand and self.result[0] is None:
             # this player may have won
-            playerIndex = self.players.index(player)
+            playerIndex = self._seatOf(player)
             self.result = (playerIndex, self.result[1])
 
     # TODO: player notifications (provide notes for recursion avoidance)
@@ -1513,12 +2347,10 @@ class Player(cards.game.Player, metaclass=abc.ABCMeta):
         super().__init__(*pos, **kw)
         self._emptyHand()  
         self.wins = self.losses = self.modCount = 0
+        self._status = None # (game, state version, status) cached
 
     def _emptyHand(self):
-        self._hand = {} # a dictionary of sorted lists
-        cardRank = lambda card:Game.rankKey(card.rank)
-        for suit in cards.CardFace.suits_():
-            self._hand[suit] = sets.SortedListSet(key=cardRank)
+        self._hand = cards.CardSet()
 
 
     def _detachFromGame(self):
@@ -1558,6 +2390,10 @@ class Player(cards.game.Player, metaclass=abc.ABCMeta):
         Read-only property that contains player's status in
         the current turn of the game.
 
+        The status is computed once for each state of the game,
+        as tracked by the game's internal state version, and cached
+        until the next move.
+
         
         Returns
         -------
@@ -1575,13 +2411,20 @@ class Player(cards.game.Player, metaclass=abc.ABCMeta):
         Player : Examples section lists usage examples
         """
         
-        if self.game is None:
+        game = self.game
+        if game is None:
             raise RuntimeError(
                 'Cannot determine status of unattached player'
             )
-        index = self.game.players.index(self)
+        version = game._stateVersion
+        cached = self._status
+        if cached is not None and cached[0] is game \
+             and cached[1] == version:
+            return cached[2]
+        index = self.seat
         for status in self.STATUM:
-            if status[1](self.game, index):
+            if status[1](game, index):
+                self._status = (game, version, status[0])
                 return status[0]
         raise RuntimeError(
             'None of the STATUM conditions match %s' % self
@@ -1651,7 +2494,7 @@ class Player(cards.game.Player, metaclass=abc.ABCMeta):
 
         handBySuit = []
         for suit in Game.defaultSuitOrder:
-            cards = self._hand[suit]
+            cards = self._hand.ofSuit(suit)
             if cards:
                 handBySuit.append((suit, list(cards)))
         return handBySuit
@@ -1670,7 +2513,8 @@ class Player(cards.game.Player, metaclass=abc.ABCMeta):
             the same suit currently held by this player.
         """
 
-        return max(len(cards) for cards in self._hand.values())
+        return max(len(self._hand.ofSuit(suit))
+                   for suit in Game.defaultSuitOrder)
  
     def _receiveCards(self, cards_):
         """
@@ -1698,28 +2542,61 @@ class Player(cards.game.Player, metaclass=abc.ABCMeta):
         Error
             If the player already has one of the cards offered.
 
-    [   Examples
+        Notes
+        -----
+        A batch of cards is validated before any of them is added, so
+        that a rejected batch leaves the hand unchanged. The whole batch
+        counts as one modification of the hand, and the claim of first
+        attack is evaluated once per batch.
+
+        Examples
         --------
-        <In the doctest format, illustrate how to use this method.>
-         ]
+        >>> player=Player()
+        >>> player._receiveCards(cards.CardSet(
+        ...     cards.CardFace(code) for code in ('6H', 'JS', '10C')))
+        >>> player.modCount, len(player.hand)
+        (1, 3)
+        >>> player._receiveCards([cards.CardFace('AD'), cards.CardFace('AD')])
+        Traceback (most recent call last):
+        ...
+        cards.durak.Error: new player already has card AD on its hand
+        >>> player._receiveCards([cards.CardFace('AD'), 'KD'])
+        Traceback (most recent call last):
+        ...
+        TypeError: received card of an unsupported <class 'str'>
+        >>> player.modCount, len(player.hand)
+        (1, 3)
         """
         
         if isinstance(cards_, collections.Iterable):
+            hand = self._hand
+            batch = 0
             for card in cards_:
-                self._receiveCards(card)
+                if not isinstance(card, cards.CardFace):
+                    raise TypeError(
+                        'received card of an unsupported %s' % type(card))
+                bit = hand._bitOf(card)
+                if (hand.bits | batch) & bit:
+                    raise Error(
+                        '%s already has card %s on its hand'
+                        % ( self, card.code )
+                    )
+                batch |= bit
+            if batch:
+                self.modCount += 1
+                hand.update(cards.CardSet.fromBits(batch, hand.cardClass))
             if self.game and self.game.attacker is None:
-                trumps = self._hand[self.game.trumpCard.suit]
+                trumps = self._hand.ofSuit(self.game.trumpCard.suit)
                 if trumps:
                     self.game._claimFirstAttack(self, next(iter(trumps)))
         elif isinstance(cards_, cards.CardFace):
-            suit = self._hand[cards_.suit]
-            if cards_ in suit:
+            if cards_ in self._hand:
                 raise Error(
                     '%s already has card %s on its hand'
                     % ( self, cards_.code )
                 )
             self.modCount += 1
-            suit.add(cards_)
+            self._hand.add(cards_)
         else:
             raise TypeError('received card of an unsupported %s' % type(cards_))
 
@@ -1784,13 +2661,13 @@ class Player(cards.game.Player, metaclass=abc.ABCMeta):
             if not isinstance(card, cards.CardFace):
                 raise TypeError('trying to play card of an unsupported %s'
                 % type(cards_))
-            elif card not in self._hand[card.suit]:
+            elif card not in self._hand:
                 raise ValueError("%s does not have card '%s' on her hand"
                 % (self, card))
         laid = self.game._attack(self, cards_)
         for card in laid:
             self.modCount += 1
-            self._hand[card.suit].discard(card)
+            self._hand.discard(card)
         # quit the attack when there are no more cards to play
         if not self.hand:
             self.game._quitTurn(self)
@@ -1855,13 +2732,13 @@ class Player(cards.game.Player, metaclass=abc.ABCMeta):
             if not isinstance(card, cards.CardFace):
                 raise TypeError('trying to play card of an unsupported %s'
                 % type(card))
-            elif card not in self._hand[card.suit]:
+            elif card not in self._hand:
                 raise ValueError("%s does not have card '%s' on her hand"
                 % (self, card))
         laid = game._defense(self, cardsMap)
         for card in laid:
             self.modCount += 1
-            self._hand[card.suit].discard(card)
+            self._hand.discard(card)
         # end turn when there are no unbeaten cards and either:
         # -- the limit is reached, or
         # -- all other players quit
@@ -1925,14 +2802,14 @@ class Player(cards.game.Player, metaclass=abc.ABCMeta):
             return type(self).__name__ + str(self)
 
         def __len__(self):
-            return sum( len(self._internal[suit]) for suit in self._order ) 
+            return len(self._internal)
 
         def __contains__(self, value):
             if not isinstance(value, cards.CardFace):
                 raise TypeError(
                     ('Cannot extract suit information from card' +
                     ', cards of type %s are not supported') % type(value))
-            return any( card == value for card in self._internal[value.suit] )
+            return value in self._internal
 
         def __iter__(self):
             return self.Iterator(self)
@@ -1953,7 +2830,8 @@ class Player(cards.game.Player, metaclass=abc.ABCMeta):
                     )
                 while True:
                     if self._iter is None:
-                        self._iter = iter(self._hand._internal[next(self._suits)])
+                        self._iter = iter(
+                            self._hand._internal.ofSuit(next(self._suits)))
                     try:
                         return next(self._iter)
                     except StopIteration:
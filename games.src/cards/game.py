@@ -29,6 +29,7 @@
     ------------
     Game : Abstract base class for card games.
     Player : Abstract base class for a card game player.
+    Settings : Immutable record of a game's settings.
     settingAccessor : Decorator of a callable that fetches or computes
         values based on a game's `settings`.
 
@@ -52,7 +53,7 @@
 """
 import abc
 import collections
-import mapping
+import keyword
 
 from callables import prepare_call
 
@@ -167,6 +168,121 @@ def settingAccessor(globals_ = {}):
         return with_globals(target)
         
 
+class Settings(collections.Mapping):
+    """
+    Immutable record of a game's settings.
+
+    Each setting is stored in a slot of the record, so that game
+    code can read it as a plain attribute, such as
+    ``game._settings.players``, which is much faster than looking
+    it up by name. The record is also a `collections.Mapping` of
+    settings' names to their values, which is how `Game.settings`
+    and `settingAccessor` functions use it.
+
+    Records are created by `of`. Records with the same names of
+    settings share a subclass of this class, which is compiled
+    when such record is first created.
+
+    Methods
+    -------
+    of(settings)
+        Create a record with a copy of settings.
+
+    Examples
+    --------
+    >>> settings = Settings.of({ 'players': 3, 'cardsPerHand': 6 })
+    >>> settings.players, settings['cardsPerHand']
+    (3, 6)
+    >>> sorted(settings.items())
+    [('cardsPerHand', 6), ('players', 3)]
+    >>> settings == { 'players': 3, 'cardsPerHand': 6 }
+    True
+    >>> type(Settings.of({ 'cardsPerHand': 4, 'players': 2 })) is type(settings)
+    True
+    >>> settings.players = 4
+    Traceback (most recent call last):
+    ...
+    AttributeError: Settings are read-only
+    >>> settings['lowestRank']
+    Traceback (most recent call last):
+    ...
+    KeyError: 'lowestRank'
+    >>> Settings.of({ 'class': None })
+    Traceback (most recent call last):
+    ...
+    ValueError: Name of a setting is not an identifier: 'class'
+    """
+
+    __slots__ = ()
+
+    _records = {}
+
+    @classmethod
+    def of(class_, settings):
+        """
+        Create a record with a copy of settings.
+
+        Parameters
+        ----------
+        settings : collections.Mapping
+            Values of settings keyed by their names.
+
+        Returns
+        -------
+        Settings
+            A record of the `settings`.
+
+        Raises
+        ------
+        ValueError
+            If a name of a setting is not a valid Python identifier.
+        """
+
+        names = tuple(sorted(settings))
+        record = class_._records.get((class_, names))
+        if record is None:
+            for name in names:
+                if not isinstance(name, str) or not name.isidentifier() \
+                        or keyword.iskeyword(name) or name.startswith('__'):
+                    raise ValueError(
+                        'Name of a setting is not an identifier: %r' % (name,))
+            record = type(class_.__name__, (class_,), {
+                '__slots__' : names,
+                '__module__' : class_.__module__,
+                '_names' : frozenset(names),
+            })
+            class_._records[(class_, names)] = record
+        self = object.__new__(record)
+        for name in names:
+            object.__setattr__(self, name, settings[name])
+        return self
+
+    def __getitem__(self, name):
+        if name in self._names:
+            return getattr(self, name)
+        raise KeyError(name)
+
+    def __iter__(self):
+        return iter(self.__slots__)
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def __contains__(self, name):
+        return name in self._names
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Settings are read-only')
+
+    def __delattr__(self, name):
+        raise AttributeError('Settings are read-only')
+
+    def __reduce__(self):
+        return (type(self).__mro__[1].of, (dict(self),))
+
+    def __repr__(self):
+        return '%s(%r)' % (type(self).__name__, dict(self))
+
 class Game(object, metaclass=abc.ABCMeta):
     """
     Abstract base class for card games.
@@ -205,9 +321,10 @@ class Game(object, metaclass=abc.ABCMeta):
 
     Attributes
     ----------
-    settings : mapping.ImmutableMap
+    settings : Settings
         Effective values of this game's settings supplied via its
-        constructor or `defaults`().
+        constructor or `defaults`(). Code of game classes may read
+        them faster as attributes of the ``_settings`` record.
     players : collections.Sequence
         A list of players in this game.
     playing
@@ -317,7 +434,7 @@ class Game(object, metaclass=abc.ABCMeta):
                     )
                 self.players[seat] = player
         # Make settings immutable
-        self._settings = mapping.ImmutableMap(settings)
+        self._settings = Settings.of(settings)
         # Check player objects and attach them to the game
         seat = 0
         for player in self.players:
@@ -330,10 +447,25 @@ class Game(object, metaclass=abc.ABCMeta):
                     )
                 )
             player.game = self
+            player._seat = seat
             seat += 1
         del self.playerFactory
         # TODO: more initialization work
 
+    def _seatOf(self, player):
+        """
+        Return the seat number of a player attached to this game.
+
+        Raises
+        ------
+        ValueError
+            If the player is not attached to this game.
+        """
+
+        if player.game is not self:
+            raise ValueError('%s is not attached to %s' % (player, self))
+        return player.seat
+
     def playAgain(self, *args, **kwargs):
         """
         Create a new game using this object as a template.
@@ -592,6 +724,7 @@ class Player:
 
     def __init__(self):       
         self._game = None
+        self._seat = None
         self._name = None
         self._gamesPlayed = 0
         # TODO: more
@@ -632,6 +765,7 @@ class Player:
                 'Attempt to detach %s from active %s' %
                  (self, self._game))
         self._game = None
+        self._seat = None
         return self
 
     def attachToGame(self, game):
@@ -701,6 +835,10 @@ class Player:
     def seat(self):
         """
         Return the player's seat number starting from 0.
+
+        The seat number is recorded when the `Game` attaches this
+        player and is looked up in the game's list of players only
+        if that record is missing or outdated.
         
         Raises
         ------
@@ -708,9 +846,14 @@ class Player:
             if this player is not (yet) attached to a `Game` 
         """
 
-        if self.game is None:
+        game = self.game
+        if game is None:
             raise AttributeError('This player is not in a game yet.')
-        return self.game.players.index(self)
+        seat = self._seat
+        if seat is None or seat >= len(game.players) \
+             or game.players[seat] is not self:
+            seat = self._seat = game.players.index(self)
+        return seat
 
     def getName(self):
         """
@@ -0,0 +1,639 @@
+# vim:fileencoding=UTF-8
+#
+# Copyright © 2019 Stan Livitski
+#
+# Licensed under the Apache License, Version 2.0 with modifications
+# and the "Commons Clause" Condition, (the "License"); you may not
+# use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#  https://raw.githubusercontent.com/StanLivitski/cards.webapp/master/LICENSE
+#
+# The grant of rights under the License will not include, and the License
+# does not grant to you, the right to Sell the Software, or use it for
+# gambling, with the exception of certain additions or modifications
+# to the Software submitted to the Licensor by third parties.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""
+    Headless simulation of durak games between programmed players.
+
+    Games are played by `Policy` objects, which are players that
+    choose their own moves. The `Simulation` runner plays many games
+    across a pool of processes and reports the throughput of the game
+    engine along with the outcomes of the games. That makes it both a
+    benchmark of the engine and a testbed for players' strategies.
+
+    The module can also be run as a script, see `main`.
+
+    Key elements
+    ------------
+    Policy : Abstract base class for players that choose their moves.
+    RandomPolicy : Player that makes random legal moves.
+    LowestCardPolicy : Player that plays the cheapest cards it can.
+    playGame : Play one game between policies to the end.
+    measureRollouts : Measure the rate of look-ahead rollouts.
+    SimulationStats : Aggregates the outcomes of simulated games.
+    Simulation : Plays many games in a pool of processes.
+
+    Examples
+    --------
+    >>> simulation = Simulation((RandomPolicy, LowestCardPolicy),
+    ...                         games = 20, processes = 1, seed = 7)
+    >>> report = simulation.run()
+    >>> report['games'], report['seed']
+    (20, 7)
+    >>> sum(report['losses']) + report['ties'] == 20
+    True
+    >>> report['moves'] == simulation.run()['moves']
+    True
+"""
+import abc
+import argparse
+import concurrent.futures
+import os
+import random
+import sys
+import time
+
+import version
+
+import cards
+import cards.durak
+
+version.requirePythonVersion(3, 3)
+
+class Policy(cards.durak.Player):
+    """
+    Abstract base class for durak players that choose their
+    own moves.
+
+    Subclasses must implement `act`, which is called by `playGame`
+    whenever the player has legal moves to make.
+
+    Attributes
+    ----------
+    random : random.Random
+        The player's source of randomness, seeded by `playGame`
+        so that games can be repeated.
+
+    Methods
+    -------
+    act(moves)
+        Make a move, or decline to.
+    """
+
+    def __init__(self, *pos, **kw):
+        super().__init__(*pos, **kw)
+        self.random = random.Random()
+
+    @abc.abstractmethod
+    def act(self, moves):
+        """
+        Make a move by calling `attack`, `defend`, or `quitTurn`,
+        or decline to move at this time.
+
+        A player that declines to move while nobody else moves
+        is made to quit the turn.
+
+        Parameters
+        ----------
+        moves : cards.durak.Game.LegalMoves
+            The moves this player may make.
+
+        Returns
+        -------
+        bool
+            Whether the player has made a move.
+        """
+
+        raise NotImplementedError()
+
+class RandomPolicy(Policy):
+    """
+    Player that picks one of its legal moves at random, with
+    an equal chance for each kind of move.
+    """
+
+    def act(self, moves):
+        choices = []
+        if moves.attack:
+            choices.append(self._attack)
+        if moves.throwIn:
+            choices.append(self._throwIn)
+        if moves.defense:
+            choices.append(self._defend)
+        if moves.quitTurn:
+            choices.append(self._quit)
+        if not choices:
+            return False
+        self.random.choice(choices)(moves)
+        return True
+
+    def _pick(self, cardSet):
+        return self.random.choice(sorted(cardSet, key = str))
+
+    def _attack(self, moves):
+        card = self._pick(moves.attack)
+        ofRank = [ other for other in sorted(moves.attack, key = str)
+                   if other.rank == card.rank ]
+        self.attack(self.random.sample(ofRank,
+            self.random.randint(1, min(len(ofRank), moves.cardLimit))))
+
+    def _throwIn(self, moves):
+        self.attack((self._pick(moves.throwIn),))
+
+    def _defend(self, moves):
+        target = self._pick(moves.defense)
+        self.defend({ target: self._pick(moves.defense[target]) })
+
+    def _quit(self, moves):
+        self.quitTurn()
+
+class LowestCardPolicy(Policy):
+    """
+    Player that attacks and throws in its lowest cards, saving
+    trumps, and beats each card with the cheapest card that can.
+    A defendant that cannot beat all cards on the table concedes
+    the turn.
+    """
+
+    def _cost(self, card):
+        game = self.game
+        return (card.suit == game.trumpCard.suit,
+                cards.durak.Game.rankKey(card.rank))
+
+    def act(self, moves):
+        if moves.defense:
+            unbeaten = [ pair for pair in self.game.cardsOnTable()
+                         if 1 == len(pair) ]
+            plan = {}
+            for target in sorted(moves.defense,
+                                 key = lambda target: len(moves.defense[target])):
+                beaters = [ card for card in moves.defense[target]
+                            if card not in plan.values() ]
+                if not beaters:
+                    break
+                plan[target] = min(beaters, key = self._cost)
+            if len(plan) < len(unbeaten):
+                self.quitTurn()
+            else:
+                self.defend(plan)
+            return True
+        elif moves.attack:
+            card = min(moves.attack, key = self._cost)
+            self.attack(tuple(other for other in moves.attack
+                              if other.rank == card.rank)[:moves.cardLimit])
+            return True
+        elif moves.throwIn:
+            cheap = [ card for card in moves.throwIn
+                      if card.suit != self.game.trumpCard.suit ]
+            if cheap:
+                self.attack((min(cheap, key = self._cost),))
+                return True
+        if moves.quitTurn and self.seat != self.game.defendant:
+            self.quitTurn()
+            return True
+        return False
+
+QUIT_STATUSES = frozenset(('quit', 'collecting'))
+
+def playGame(policies, seed, **settings):
+    """
+    Play one game between policies to the end.
+
+    Players that haven't quit the turn are offered to move in the
+    order of their seats, starting with the attacker, until a full
+    round passes without moves. Then the players that may quit the
+    turn are made to.
+
+    Parameters
+    ----------
+    policies : collections.Sequence
+        `Policy` subclasses, one for each seat at the table.
+    seed : int
+        The seed of the game's `cards.Dealer` and the players'
+        sources of randomness. The module-level generator of
+        `random`, which the engine uses to choose the first attacker
+        when nobody holds a trump, is seeded for the deal and then
+        restored to its previous state.
+    settings : dict
+        Other settings of the `cards.durak.Game`.
+
+    Returns
+    -------
+    (cards.durak.Game, int)
+        The finished game and the number of moves made in it.
+
+    Raises
+    ------
+    RuntimeError
+        If the game stops before it is over.
+
+    Examples
+    --------
+    >>> game, moves = playGame((LowestCardPolicy, LowestCardPolicy), 1)
+    >>> game.playing, 0 < moves
+    (False, True)
+    >>> again, same = playGame((LowestCardPolicy, LowestCardPolicy), 1)
+    >>> same == moves and again.result == game.result
+    True
+    >>> state = random.getstate()
+    >>> game = playGame((RandomPolicy, RandomPolicy), 2)
+    >>> random.getstate() == state
+    True
+    """
+
+    game = _newGame(policies, seed, settings)
+    return game, _playOut(game, seed)
+
+def _newGame(policies, seed, settings):
+    game = cards.durak.Game(lambda game, seat: policies[seat](),
+                            players = len(policies), **settings)
+    for player in game.players:
+        player.random.seed('%d:%d' % (seed, player.seat))
+    state = random.getstate()
+    random.seed(seed)
+    try:
+        game.start(cards.Dealer(seed, fast = True))
+    finally:
+        random.setstate(state)
+    return game
+
+def _playOut(game, seed):
+    players = game.players
+    count = len(players)
+    moves = 0
+    while game.playing:
+        moved = False
+        first = game.attacker
+        for i in range(count):
+            player = players[(first + i) % count]
+            if player.status in QUIT_STATUSES:
+                continue
+            legal = game.legalMoves(player)
+            if (legal.attack or legal.throwIn or legal.defense
+                    or legal.quitTurn) and player.act(legal):
+                moves += 1
+                moved = True
+                if game.attacker != first:
+                    break
+        if moved or not game.playing:
+            continue
+        for player in players:
+            if game.playing and player.status not in QUIT_STATUSES \
+                    and game.legalMoves(player).quitTurn:
+                player.quitTurn()
+                moves += 1
+                moved = True
+        if not moved:
+            raise RuntimeError('Game #%d has stopped at %s'
+                               % (seed, game.snapshot()))
+    return moves
+
+def measureRollouts(policies, rollouts, seed, **settings):
+    """
+    Measure the rate of rollouts that play a game out from the same
+    position again and again, as a look-ahead search would.
+
+    The game is dealt once, its position is saved with
+    `cards.durak.Game.pushPosition`, and then it is played to the
+    end and restored with `cards.durak.Game.popPosition` for each
+    rollout. Players keep drawing from their sources of randomness,
+    so that rollouts of random policies take different lines of play.
+
+    Parameters
+    ----------
+    policies : collections.Sequence
+        `Policy` subclasses, one for each seat at the table.
+    rollouts : int
+        The number of times to play the game out.
+    seed : int
+        The seed of the game, as in `playGame`.
+    settings : dict
+        Other settings of the `cards.durak.Game`.
+
+    Returns
+    -------
+    dict
+        The number of ``rollouts`` and ``moves`` made in them, the
+        elapsed ``seconds``, ``rolloutsPerSecond``, and the
+        ``stackSeconds`` spent saving and restoring the position.
+
+    Examples
+    --------
+    >>> report = measureRollouts((RandomPolicy, RandomPolicy), 20, 5)
+    >>> report['rollouts'], 0 < report['moves']
+    (20, True)
+    >>> 0 < report['stackSeconds'] < report['seconds']
+    True
+    """
+
+    game = _newGame(policies, seed, settings)
+    moves = 0
+    stackSeconds = 0.
+    started = time.perf_counter()
+    game.pushPosition()
+    for i in range(rollouts):
+        moves += _playOut(game, seed)
+        mark = time.perf_counter()
+        game.popPosition()
+        game.pushPosition()
+        stackSeconds += time.perf_counter() - mark
+    elapsed = time.perf_counter() - started
+    game.popPosition()
+    return {
+        'rollouts' : rollouts,
+        'moves' : moves,
+        'seconds' : elapsed,
+        'rolloutsPerSecond' : rollouts / elapsed if elapsed else None,
+        'stackSeconds' : stackSeconds,
+    }
+
+class SimulationStats:
+    """
+    Aggregates the outcomes of simulated games.
+
+    Parameters
+    ----------
+    seats : int
+        The number of seats at the table.
+
+    Attributes
+    ----------
+    games : int
+        The number of games played.
+    moves : int
+        The number of moves made in those games.
+    maxMoves : int
+        The largest number of moves made in a game.
+    ties : int
+        The number of games that ended in a tie.
+    wins : list
+        The numbers of games that players at each seat were
+        the first to leave.
+    losses : list
+        The numbers of games lost by players at each seat.
+
+    Examples
+    --------
+    >>> stats = SimulationStats(2)
+    >>> stats.record(playGame((RandomPolicy, RandomPolicy), 3)[0], 40)
+    >>> other = SimulationStats(2)
+    >>> other.merge(stats.summary())
+    >>> other.summary() == stats.summary()
+    True
+    >>> other.games, other.moves
+    (1, 40)
+    """
+
+    def __init__(self, seats):
+        self.games = self.moves = self.maxMoves = self.ties = 0
+        self.wins = [ 0 ] * seats
+        self.losses = [ 0 ] * seats
+
+    def record(self, game, moves):
+        """
+        Record the outcome of a finished game.
+
+        Parameters
+        ----------
+        game : cards.durak.Game
+            The game that is over.
+        moves : int
+            The number of moves made in the game.
+        """
+
+        self.games += 1
+        self.moves += moves
+        self.maxMoves = max(self.maxMoves, moves)
+        if game.result is None:
+            self.ties += 1
+        else:
+            self.wins[game.result[0]] += 1
+            self.losses[game.result[1]] += 1
+
+    def summary(self):
+        """
+        Return the statistics as a dictionary that can be passed
+        between processes and merged with `merge`.
+
+        Returns
+        -------
+        dict
+            Values of this object's attributes keyed by their names.
+        """
+
+        return {
+            'games' : self.games,
+            'moves' : self.moves,
+            'maxMoves' : self.maxMoves,
+            'ties' : self.ties,
+            'wins' : list(self.wins),
+            'losses' : list(self.losses),
+        }
+
+    def merge(self, summary):
+        """
+        Add statistics returned by `summary` of another object
+        to this object.
+
+        Parameters
+        ----------
+        summary : collections.Mapping
+            A value returned by `summary`.
+        """
+
+        self.games += summary['games']
+        self.moves += summary['moves']
+        self.maxMoves = max(self.maxMoves, summary['maxMoves'])
+        self.ties += summary['ties']
+        for i, count in enumerate(summary['wins']):
+            self.wins[i] += count
+        for i, count in enumerate(summary['losses']):
+            self.losses[i] += count
+
+def _playBatch(policies, seeds, settings):
+    stats = SimulationStats(len(policies))
+    for seed in seeds:
+        stats.record(*playGame(policies, seed, **settings))
+    return stats.summary()
+
+class Simulation:
+    """
+    Plays many durak games between policies in a pool of processes.
+
+    Games are split into batches of `BATCH_SIZE` that are played
+    by separate processes. Each game gets its own seed drawn from
+    the simulation's `seed`, so that a simulation with the same seed
+    plays the same games regardless of the number of processes.
+
+    Parameters
+    ----------
+    policies : collections.Sequence
+        `Policy` subclasses, one for each seat at the table. The
+        classes must be defined at the top level of a module, so
+        that other processes can find them.
+    games : int
+        The number of games to play.
+    processes : int, optional
+        The number of processes to play the games. Defaults to the
+        number of CPUs. With one process, games are played in the
+        calling process, which is convenient for profiling.
+    seed : int, optional
+        The seed of the games' seeds, chosen at random if omitted.
+    settings : dict
+        Other settings of the games, see `cards.durak.Game`.
+
+    Attributes
+    ----------
+    BATCH_SIZE : int
+        The largest number of games sent to a process at once.
+
+    Methods
+    -------
+    run()
+        Play the games and report the results.
+    """
+
+    BATCH_SIZE = 50
+
+    def __init__(self, policies, games, processes = None, seed = None,
+                 **settings):
+        self.policies = tuple(policies)
+        self.games = games
+        self.processes = os.cpu_count() if processes is None else processes
+        self.seed = random.SystemRandom().getrandbits(32) \
+            if seed is None else seed
+        self.settings = settings
+
+    def run(self):
+        """
+        Play the games and report the results.
+
+        Returns
+        -------
+        dict
+            The statistics of `SimulationStats.summary`, with the
+            ``seed`` of the simulation, the number of ``processes``,
+            the elapsed ``seconds``, ``gamesPerSecond``, and
+            ``movesPerSecond``.
+        """
+
+        source = random.Random(self.seed)
+        seeds = [ source.getrandbits(32) for i in range(self.games) ]
+        batches = [ seeds[i:i + self.BATCH_SIZE]
+                    for i in range(0, len(seeds), self.BATCH_SIZE) ]
+        stats = SimulationStats(len(self.policies))
+        started = time.perf_counter()
+        if 1 >= self.processes:
+            for batch in batches:
+                stats.merge(_playBatch(self.policies, batch, self.settings))
+        else:
+            with concurrent.futures.ProcessPoolExecutor(self.processes) \
+                    as executor:
+                for summary in executor.map(_playBatch,
+                        *zip(*[ (self.policies, batch, self.settings)
+                                for batch in batches ])):
+                    stats.merge(summary)
+        elapsed = time.perf_counter() - started
+        report = stats.summary()
+        report.update(
+            seed = self.seed,
+            processes = max(1, self.processes),
+            seconds = elapsed,
+            gamesPerSecond = stats.games / elapsed if elapsed else None,
+            movesPerSecond = stats.moves / elapsed if elapsed else None,
+        )
+        return report
+
+POLICIES = {
+    'random' : RandomPolicy,
+    'lowest' : LowestCardPolicy,
+}
+
+def main(args = None):
+    """
+    Run a simulation from the command line and print its report.
+
+    Parameters
+    ----------
+    args : collections.Sequence, optional
+        Command-line arguments, taken from `sys.argv` by default.
+        Run the module with ``--help`` for their description.
+
+    Returns
+    -------
+    int
+        The exit status of the script.
+    """
+
+    parser = argparse.ArgumentParser(
+        prog = 'python -m cards.simulation',
+        description = 'Play durak games between programmed players'
+                      ' and report the throughput and outcomes.')
+    parser.add_argument('policies', nargs = '*', metavar = 'POLICY',
+                        help = 'players at the table in the order of their'
+                        ' seats, any of: %s (default: random random)'
+                        % ', '.join(sorted(POLICIES)))
+    parser.add_argument('-g', '--games', type = int, default = 1000,
+                        help = 'number of games to play (default: 1000)')
+    parser.add_argument('-p', '--processes', type = int,
+                        help = 'number of processes (default: CPU count)')
+    parser.add_argument('-s', '--seed', type = int,
+                        help = 'seed for repeating a simulation')
+    parser.add_argument('-r', '--lowest-rank', type = int,
+                        help = 'lowest rank of cards in the deck')
+    parser.add_argument('--rollouts', type = int,
+                        help = 'instead of playing games, measure the rate'
+                        ' of playing one game out from the same position'
+                        ' this many times')
+    options = parser.parse_args(args)
+    if not options.policies:
+        options.policies = [ 'random' ] * 2
+    elif 2 > len(options.policies):
+        parser.error('at least two players are needed')
+    unknown = sorted(set(options.policies) - set(POLICIES))
+    if unknown:
+        parser.error('unknown policies: %s' % ', '.join(unknown))
+    settings = {}
+    if options.lowest_rank is not None:
+        settings['lowestRank'] = options.lowest_rank
+    policies = [ POLICIES[name] for name in options.policies ]
+    if options.rollouts is not None:
+        seed = random.SystemRandom().getrandbits(32) \
+            if options.seed is None else options.seed
+        report = measureRollouts(policies, options.rollouts, seed,
+                                 **settings)
+        print('Seed: %d' % seed)
+        print('Played %d rollouts with %d moves in %.3f s'
+              % (report['rollouts'], report['moves'], report['seconds']))
+        print('Rollouts per second: %.1f, saving and restoring the'
+              ' position took %.1f%% of the time'
+              % (report['rolloutsPerSecond'] or 0, 100 *
+                 report['stackSeconds'] / (report['seconds'] or 1)))
+        return 0
+    report = Simulation(policies, options.games, options.processes,
+                        options.seed, **settings).run()
+    print('Seed: %d, processes: %d' % (report['seed'], report['processes']))
+    print('Played %d games with %d moves (at most %d in a game) in %.3f s'
+          % (report['games'], report['moves'], report['maxMoves'],
+             report['seconds']))
+    print('Games per second: %.1f, moves per second: %.1f'
+          % (report['gamesPerSecond'] or 0, report['movesPerSecond'] or 0))
+    for seat, name in enumerate(options.policies):
+        print('Seat %d (%s): left first in %d, lost %d'
+              % (seat + 1, name, report['wins'][seat], report['losses'][seat]))
+    print('Ties: %d' % report['ties'])
+    return 0
+
+if __name__ == "__main__":
+    # run the imported module, so that worker processes can unpickle
+    # references to its functions and classes
+    import cards.simulation
+    sys.exit(cards.simulation.main())
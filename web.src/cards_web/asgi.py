@@ -0,0 +1,52 @@
+# vim:fileencoding=UTF-8 
+#
+# Copyright © 2019 Stan Livitski
+# 
+# Licensed under the Apache License, Version 2.0 with modifications
+# and the "Commons Clause" Condition, (the "License"); you may not
+# use this file except in compliance with the License. You may obtain
+# a copy of the License at
+# 
+#  https://raw.githubusercontent.com/StanLivitski/cards.webapp/master/LICENSE
+# 
+# The grant of rights under the License will not include, and the License
+# does not grant to you, the right to Sell the Software, or use it for
+# gambling, with the exception of certain additions or modifications
+# to the Software submitted to the Licensor by third parties.
+# 
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# 
+"""
+ASGI config for cards_web project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+This entry point is optional and requires Django 3.0 or newer. With
+Django 4.2 or newer, event streams served over ASGI wait for events on
+the event loop and hold no thread per client. With older versions, as
+with WSGI, each open event stream holds a server thread for up to
+`durak_ws.stream.EventStreamView.MAX_DURATION` seconds.
+"""
+
+import os
+
+try:
+    from django.core.asgi import get_asgi_application
+except ImportError:
+    raise ImportError(
+        'ASGI entry point requires Django 3.0 or newer,'
+        ' use cards_web.wsgi with older versions'
+    )
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "cards_web.settings")
+
+application = get_asgi_application()
+
+# Restore saved games in server processes only, so that management
+# commands do not take over the games of a running server
+from durak_ws.models import PlayerCheckIn
+
+PlayerCheckIn.warmStart()
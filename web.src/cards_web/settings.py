@@ -56,6 +56,48 @@ EXTERNAL_URL_PREFIX_ = ( urlsplit(EXTERNAL_URL_PREFIX, '', False)
             if isinstance(EXTERNAL_URL_PREFIX, str)
             else EXTERNAL_URL_PREFIX )
 
+# Strategy for delivering players' moves to games: 'pool' shares
+# CARDS_DELIVERY_WORKERS threads among all games, while 'thread'
+# runs a dedicated thread for each game.
+CARDS_DELIVERY = 'pool'
+CARDS_DELIVERY_WORKERS = 4
+
+# Limits of the chat history kept for each game: the oldest
+# messages are dropped once either limit is exceeded.
+CARDS_CHAT_HISTORY_MESSAGES = 200
+CARDS_CHAT_HISTORY_BYTES = 256 * 1024
+
+# Chat transcripts are saved to the default database when this is True,
+# or to an SQLite database file with the name given as a string.
+# Saved messages are loaded into the history of a game with the same id.
+CARDS_CHAT_TRANSCRIPT = False
+
+# Multi-process mode: URL prefixes of worker processes keyed by worker
+# names, such as {'w1': 'http://localhost:8001', ...}, and the name of the
+# worker in this process. Each worker is started with its name in the
+# CARDS_WORKER environment variable. Workers share the registry of game
+# tokens in CARDS_WORKER_REGISTRY SQLite file, or in the default database
+# if that is None. An empty mapping runs the application in one process.
+CARDS_WORKERS = dict(
+    entry.split('=', 1)
+    for entry in os.environ.get('CARDS_WORKERS', '').split(',')
+    if '=' in entry
+)
+CARDS_WORKER = os.environ.get('CARDS_WORKER')
+CARDS_WORKER_REGISTRY = None
+
+# Games are saved every CARDS_SNAPSHOT_INTERVAL seconds and on shutdown,
+# and restored when a server starts (see wsgi.py and asgi.py), when this is
+# True, using the default database, or when it's the name of an SQLite
+# database file. Management commands other than runserver don't touch them.
+CARDS_SNAPSHOTS = False
+CARDS_SNAPSHOT_INTERVAL = 30
+
+# Moves accepted between snapshots are appended to a journal and replayed
+# on startup when this is True, using a directory next to the snapshots'
+# database, or when it's the name of a directory. Requires CARDS_SNAPSHOTS.
+CARDS_JOURNAL = False
+
 # Construct paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -147,6 +189,10 @@ SESSION_ENGINE = "django.contrib.sessions.backends.cache"
 
 SESSION_COOKIE_AGE = 10800
 
+# Sessions of different workers on the same host must not share cookies
+if CARDS_WORKERS and CARDS_WORKER:
+    SESSION_COOKIE_NAME = 'sessionid-%s' % CARDS_WORKER
+
 # Application components
 
 # TODO: clean this up
@@ -162,6 +208,7 @@ INSTALLED_APPS = (
 
 # TODO: clean this up
 MIDDLEWARE = (
+    'durak_ws.cluster.AffinityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.locale.LocaleMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -190,7 +237,8 @@ TEMPLATES = [
     },
 ]
 
-#WSGI_APPLICATION = 'cards_web.wsgi.application'
+# The development server loads this application to restore saved games
+WSGI_APPLICATION = 'cards_web.wsgi.application'
 
 # Database
 
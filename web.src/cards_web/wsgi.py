@@ -36,3 +36,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "cards_web.settings")
 
 application = get_wsgi_application()
+
+# Restore saved games in server processes only, so that management
+# commands do not take over the games of a running server
+from durak_ws.models import PlayerCheckIn
+
+PlayerCheckIn.warmStart()
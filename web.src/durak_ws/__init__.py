@@ -54,7 +54,7 @@ class Application(AppConfig):
     Methods
     ---------------
     ready()
-        Registers the application's signals.
+        Registers the application's signals and checks the settings.
 [
     <name>([<param>, ...])
         <One-line description of a method to be emphasized among many others.>
@@ -85,8 +85,12 @@ class Application(AppConfig):
         """
         Initialize this application.
         
-        Registers the application's signals and configures the 
-        ``staticfiles`` app to enable client-side caching.
+        Registers the application's signals, checks the settings of
+        the multi-process mode, and configures the ``staticfiles``
+        app to enable client-side caching. Saved games
+        are not restored here, since this method also runs for
+        management commands; server entry points restore them by
+        calling `models.PlayerCheckIn.warmStart`.
         
     [    Raises
         ------
@@ -104,6 +108,8 @@ class Application(AppConfig):
         
         super().ready()
         from . import signals, graphics
+        from .cluster import WorkerRegistry
+        WorkerRegistry.checkSettings()
         static_app = None
         try:
             static_app = apps.get_app_config('staticfiles')
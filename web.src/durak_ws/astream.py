@@ -0,0 +1,166 @@
+# vim:fileencoding=UTF-8
+#
+# Copyright © 2019 Stan Livitski
+#
+# Licensed under the Apache License, Version 2.0 with modifications
+# and the "Commons Clause" Condition, (the "License"); you may not
+# use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#  https://raw.githubusercontent.com/StanLivitski/cards.webapp/master/LICENSE
+#
+# The grant of rights under the License will not include, and the License
+# does not grant to you, the right to Sell the Software, or use it for
+# gambling, with the exception of certain additions or modifications
+# to the Software submitted to the Licensor by third parties.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""
+    Asynchronous bodies of the event streams served over ASGI.
+
+    Django 4.2 and newer streams asynchronous iterators from ASGI
+    servers without holding a thread, while synchronous iterators
+    are read to the end in a thread and buffered. The generators
+    in this module check the dispatchers of `stream.EventStreamView`
+    channels with short calls that do not wait for events, and sleep
+    on the event loop in between, so that an open stream costs no
+    thread while it waits. This module requires Python 3.6 or newer
+    and is imported by `stream` only when it serves ASGI requests.
+
+    Key elements
+    ------------
+    stream : generates the body of an `stream.EventStreamView`
+        response.
+    multiplex : generates the body of a `stream.MultiplexStreamView`
+        response.
+"""
+
+import asyncio
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+
+async def stream(view, request, channel, lastId):
+    """
+    Generate the body of an event stream asynchronously.
+
+    Parameters
+    ----------
+    view : stream.EventStreamView
+        The view serving the stream.
+    request : django.http.HttpRequest
+        The web request being processed.
+    channel : stream.EventStreamView.Channel
+        The source of events to stream.
+    lastId : int | NoneType
+        The id of the last event received by the client
+        before reconnecting, if any.
+
+    Yields
+    ------
+    str
+        Fragments of the event stream.
+    """
+
+    poll = sync_to_async(view._pollChannel)
+    confirm = sync_to_async(view._confirmBatch)
+    deadline = time.monotonic() + view.MAX_DURATION
+    try:
+        if lastId is not None:
+            await sync_to_async(channel.dispatcher.confirmEvents)(
+                channel.userId, lastId)
+        yield 'retry: %d\n\n' % view.RETRY_DELAY
+        written = time.monotonic()
+        while written < deadline:
+            batch = await poll(request, channel, 0)
+            if batch is not None:
+                yield view._formatEvent(str(batch[0]), channel.name,
+                                        batch[0], batch[1])
+                await confirm(request, channel, batch[0])
+                written = time.monotonic()
+                continue
+            if written + view.POLL_SLICE < time.monotonic():
+                yield ':\n\n'
+                written = time.monotonic()
+            await asyncio.sleep(view.ASYNC_POLL_SLICE)
+    except (GeneratorExit, asyncio.CancelledError):
+        raise
+    except:
+        log = logging.getLogger(type(view).__module__)
+        log.error('Error streaming events of %s to user "%s"',
+                  type(channel.view).__name__, channel.userId,
+                  exc_info=True)
+    finally:
+        await sync_to_async(channel.view.trackHeartbeat)(request)
+
+async def multiplex(view, request, channels, lastIds):
+    """
+    Generate the body of a multiplexed event stream asynchronously.
+
+    Parameters
+    ----------
+    view : stream.MultiplexStreamView
+        The view serving the stream.
+    request : django.http.HttpRequest
+        The web request being processed.
+    channels : collections.Sequence
+        `stream.EventStreamView.Channel` objects with sources of
+        events to stream.
+    lastIds : collections.MutableMapping
+        The ids of the last events received by the client on
+        each channel before reconnecting, keyed by channel names.
+
+    Yields
+    ------
+    str
+        Fragments of the event stream.
+    """
+
+    poll = sync_to_async(view._pollChannel)
+    confirm = sync_to_async(view._confirmBatch)
+    deadline = time.monotonic() + view.MAX_DURATION
+    try:
+        for channel in channels:
+            if channel.name in lastIds:
+                await sync_to_async(channel.dispatcher.confirmEvents)(
+                    channel.userId, lastIds[channel.name])
+        yield 'retry: %d\n\n' % view.RETRY_DELAY
+        written = time.monotonic()
+        while written < deadline:
+            sent = False
+            for channel in channels:
+                batch = await poll(request, channel, 0)
+                if batch is None:
+                    continue
+                lastIds[channel.name] = batch[0]
+                yield view._formatEvent(
+                    ';'.join('%s:%d' % (other.name, lastIds[other.name])
+                             for other in channels
+                             if other.name in lastIds),
+                    channel.name, batch[0], batch[1])
+                await confirm(request, channel, batch[0])
+                written = time.monotonic()
+                sent = True
+            if sent:
+                continue
+            if written + view.POLL_SLICE < time.monotonic():
+                yield ':\n\n'
+                written = time.monotonic()
+            await asyncio.sleep(view.ASYNC_POLL_SLICE)
+    except (GeneratorExit, asyncio.CancelledError):
+        raise
+    except:
+        log = logging.getLogger(type(view).__module__)
+        log.error('Error streaming events of %s to user "%s"',
+                  ', '.join(name for name, source in view.sources),
+                  channels[0].userId if channels else None,
+                  exc_info=True)
+    finally:
+        for channel in channels:
+            await sync_to_async(channel.view.trackHeartbeat)(request)
@@ -24,20 +24,17 @@ import logging
 import math
 
 from django.http.response import \
-    JsonResponse, HttpResponse, \
+    HttpResponse, \
     HttpResponseForbidden, HttpResponseServerError # HttpResponseNotFound
 from django.shortcuts import render
 from django.utils.decorators import method_decorator
 from django.utils.translation import ugettext as _
 from django.views.decorators.clickjacking import xframe_options_sameorigin
 
-from comety import FilterByTargetUser
-from comety.django.views import ViewWithEvents, JSONEncoder
+from comety.django.views import ViewWithEvents
 
 from durak_ws.models import PlayerCheckIn
 from .intro import IntroView
-import comety
-import collections
 
 """
     The back-end for application's chat facilities.
@@ -118,6 +115,7 @@ class ChatView(ViewWithEvents):
 #        pass    # TODO: implement
 
     updateMode = False
+    historyMode = False
     http_method_names = ['get', 'post']
 
     def _externalizeUserInfo(self, userId):
@@ -148,9 +146,10 @@ class ChatView(ViewWithEvents):
                 raise ValueError('Message text is too long: 8000 < %d', len(text))
             targetUser = request.POST.get('to')
             targetUser = checkIn.getId(int(targetUser)) if targetUser else None
-            self.cometyDispatcher.postEvent(self._externalizeUserInfo(userId),
-                           event = self.MESSAGE_EVENT,
-                           text=text, targetUsers=targetUser)
+            checkIn.chatRoom.post(self._externalizeUserInfo(userId), text,
+                None if targetUser is None else
+                { targetUser: self._externalizeUserInfo(targetUser) },
+                userId)
             return True
         except:
             log = logging.getLogger(type(self).__module__)
@@ -175,7 +174,7 @@ class ChatView(ViewWithEvents):
 
         userId = request.session[self.PLAYER_IN_SESSION]
         try:
-            chat = self.cometyDispatcher
+            chat = self.eventSourceFor(request)
             expectedDelay = self.expectedDelay(request.session)
             maximumTimeout = float(request.GET['timeout'])
             if maximumTimeout is None:
@@ -196,37 +195,62 @@ class ChatView(ViewWithEvents):
                        '"confirm" is negative: %d' % confirm)
                 else:
                     chat.confirmEvents(userId, confirm)
-            filter_ = FilterByTargetUser(userId)
-            events = chat.pollEvents(userId, timeout, filter_, True)
-            if events[1]:
-                eventList = []
-                for event in events[1]:
-                    targetUsers = event.arg('targetUsers')
-                    if targetUsers is not None:
-                        kwargs = dict(event.kwargs)
-                        if isinstance(targetUsers, str):
-                            targetUsers = self._externalizeUserInfo(targetUsers)
-                        elif isinstance(targetUsers, collections.Iterable):
-                            raise NotImplementedError('Cannot send message to multiple users') 
-                        else:
-                            raise ValueError('Unknown target user object %s' % type(targetUsers))                             
-                        kwargs['targetUsers'] = [ targetUsers ]
-                        event = comety.Dispatcher.Event(event.sender, **kwargs)
-                    eventList.append(event)
-                events = (events[0], eventList)
-            return JsonResponse(
-                {
-                    'lastId': events[0],
-                    'events': events[1] if events[1] else None  
-                },
-                encoder=JSONEncoder
-            )
+            lastId, events = chat.pollEvents(userId, timeout)
+            return HttpResponse(events.toJson(lastId),
+                                content_type='application/json')
         except:
             log = logging.getLogger(type(self).__module__)
             log.error('Error serving %s to user "%s"', type(self).__name__,
                       userId, exc_info=True)
             return HttpResponseServerError()
 
+    def _admittedHistory(self, request):
+        """
+        Return a page of the chat history to an admitted player.
+
+        The ``before`` query parameter, if present, is the id of the
+        message that follows the page. The ``limit`` parameter, if
+        present, is the maximum number of messages on the page, which
+        cannot exceed the chat room's history limit.
+
+        Parameters
+        ----------
+        request : django.http.HttpRequest
+            The web request being processed.
+
+        Returns
+        -------
+        django.http.HttpResponse
+            JSON object with the ``firstId`` of the page, its
+            ``events`` in the order they were posted, and the
+            ``more`` flag telling whether there are earlier messages.
+        """
+
+        userId = request.session[self.PLAYER_IN_SESSION]
+        try:
+            chat = self.eventSourceFor(request)
+            beforeId = request.GET.get('before')
+            beforeId = int(beforeId) if beforeId else None
+            limit = request.GET.get('limit')
+            limit = int(limit) if limit else None
+            if limit is not None and not 0 < limit <= chat.maxMessages:
+                raise ValueError(
+                    '"limit" must be a positive number no greater than %d,'
+                    ' got %d' % (chat.maxMessages, limit))
+            firstId, events, more = chat.history(userId, beforeId, limit)
+            return HttpResponse(
+                '{"firstId": %s, "more": %s, "events": %s}' % (
+                    'null' if firstId is None else '%d' % firstId,
+                    'true' if more else 'false',
+                    events.eventsJson()
+                ),
+                content_type='application/json')
+        except:
+            log = logging.getLogger(type(self).__module__)
+            log.error('Error serving chat history to user "%s"',
+                      userId, exc_info=True)
+            return HttpResponseServerError()
+
     def _isRequestAdmitted(self, request, *args):
         """
         Determines whether this session belongs to an admitted player and
@@ -292,6 +316,33 @@ class ChatView(ViewWithEvents):
                 if checkIn is not None 
                 else None)
 
+    def eventSourceFor(self, request, *args, **kwargs):
+        """
+        Locate the inboxes of chat messages for a request by querying
+        active `PlayerCheckIn` model.
+
+        Parameters
+        ----------
+        request : django.http.request.HttpRequest
+            HTTP request served by this view.
+        *args : list
+            Optional positional arguments passed to the view.
+        ***kwargs : dict
+            Optional keyword arguments passed to the view.
+
+        Returns
+        -------
+        durak_ws.models.ChatRoom | NoneType
+            Chat room of the requesting player's game, or ``None``
+            if there is no such game.
+        """
+
+        id_ = request.session.get(self.PLAYER_IN_SESSION)
+        checkIn = None if id_ is None else PlayerCheckIn.FACILITIES.get(id_)
+        return (checkIn.chatRoom
+                if checkIn is not None
+                else None)
+
     def identifyUser(self, request, *args, **kwargs):
         """
         Determine user's identity from the session.
@@ -323,6 +374,8 @@ class ChatView(ViewWithEvents):
             return HttpResponseForbidden()
         elif self.updateMode:
             return self._admittedUpdate(request)
+        elif self.historyMode:
+            return self._admittedHistory(request)
         else:
             userId = request.session[self.PLAYER_IN_SESSION]
             checkIn = PlayerCheckIn.FACILITIES[userId]
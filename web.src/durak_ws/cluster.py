@@ -0,0 +1,350 @@
+# vim:fileencoding=UTF-8
+#
+# Copyright © 2019 Stan Livitski
+#
+# Licensed under the Apache License, Version 2.0 with modifications
+# and the "Commons Clause" Condition, (the "License"); you may not
+# use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#  https://raw.githubusercontent.com/StanLivitski/cards.webapp/master/LICENSE
+#
+# The grant of rights under the License will not include, and the License
+# does not grant to you, the right to Sell the Software, or use it for
+# gambling, with the exception of certain additions or modifications
+# to the Software submitted to the Licensor by third parties.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""
+    Support for running game apps in several worker processes
+    on one host.
+
+    Games and their players' sessions live in the memory of the
+    worker process that created them. Workers record the tokens
+    of their games in a shared SQLite registry, and route each
+    join request to the worker that owns its token. Once redirected,
+    a player's browser talks to the owning worker directly.
+
+    The multi-process mode is enabled by the ``CARDS_WORKERS``
+    setting, which maps worker names to the URL prefixes of their
+    processes, and the ``CARDS_WORKER`` setting, which names the
+    worker running in the current process.
+
+    Key elements
+    ------------
+    WorkerRegistry : Maps game and player tokens to the workers
+        that own them.
+    AffinityMiddleware : Redirects join requests to the workers
+        that own their tokens.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponseRedirect
+from django.urls import resolve, Resolver404
+
+class WorkerRegistry:
+    """
+    Maps game and player tokens to the worker processes that own
+    them in an SQLite database shared by the workers.
+
+    Tokens missing from the registry are assigned to workers by
+    their hash values, so that requests with any token are routed
+    to the same worker regardless of the worker that receives them.
+
+    Parameters
+    ----------
+    path : str
+        The name of the database file.
+    worker : str
+        The name of the worker running in this process.
+    workers : collections.Mapping
+        URL prefixes of all worker processes, keyed by
+        worker names.
+
+    Raises
+    ------
+    ValueError
+        If `worker` is not one of the `workers`.
+
+    Examples
+    --------
+    >>> import os.path, tempfile
+    >>> path = os.path.join(tempfile.mkdtemp(), 'workers.sqlite3')
+    >>> workers = { 'a': 'http://localhost:8001', 'b': 'http://localhost:8002' }
+    >>> registry = WorkerRegistry(path, 'a', workers)
+    >>> registry.claim(('abcd', 'efgh'))
+    >>> registry.ownerOf('abcd'), registry.urlOf('efgh')
+    ('a', 'http://localhost:8001')
+    >>> WorkerRegistry(path, 'b', workers).ownerOf('abcd')
+    'a'
+    >>> registry.ownerOf('xyzw') == registry.workerFor('xyzw')
+    True
+    >>> registry.release(('abcd',))
+    >>> registry.ownerOf('abcd') == registry.workerFor('abcd')
+    True
+    """
+
+    SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS durak_ws_worker_token ('
+        ' token TEXT PRIMARY KEY,'
+        ' worker TEXT NOT NULL,'
+        ' claimed REAL NOT NULL)',
+        'CREATE INDEX IF NOT EXISTS durak_ws_worker_token_worker'
+        ' ON durak_ws_worker_token (worker)',
+    )
+
+    TIMEOUT = 5.
+
+    _default = None
+    _defaultLock = threading.Lock()
+
+    def __init__(self, path, worker, workers):
+        if worker not in workers:
+            raise ValueError('Worker "%s" is not listed among: %s'
+                             % (worker, ', '.join(sorted(workers))))
+        self.path = path
+        self.worker = worker
+        self.workers = dict(workers)
+        self._names = sorted(self.workers)
+        with self._connect() as connection:
+            for statement in self.SCHEMA:
+                connection.execute(statement)
+
+    @classmethod
+    def default(class_):
+        """
+        Return the registry configured for this application,
+        creating it when first called.
+
+        The registry is kept in the database file named by the
+        ``CARDS_WORKER_REGISTRY`` setting, or in the default
+        database if that setting is missing or ``None``.
+
+        Returns
+        -------
+        WorkerRegistry | NoneType
+            The shared registry, or ``None`` if the application
+            runs in a single process.
+        """
+
+        workers = getattr(settings, 'CARDS_WORKERS', None)
+        if not workers:
+            return None
+        with class_._defaultLock:
+            if WorkerRegistry._default is None:
+                path = getattr(settings, 'CARDS_WORKER_REGISTRY', None)
+                if path is None:
+                    path = settings.DATABASES['default']['NAME']
+                WorkerRegistry._default = class_(
+                    path, settings.CARDS_WORKER, workers)
+            return WorkerRegistry._default
+
+    @staticmethod
+    def checkSettings():
+        """
+        Make sure that the worker running in this process is listed
+        among the workers of the multi-process mode, if it is on.
+
+        This is called once when the application loads, so that a
+        misconfigured server stops at startup rather than failing
+        every request that consults the registry.
+
+        Raises
+        ------
+        django.core.exceptions.ImproperlyConfigured
+            If ``CARDS_WORKERS`` is not empty and ``CARDS_WORKER``
+            is missing or not one of its keys.
+        """
+
+        workers = getattr(settings, 'CARDS_WORKERS', None)
+        if not workers:
+            return
+        worker = getattr(settings, 'CARDS_WORKER', None)
+        if worker not in workers:
+            raise ImproperlyConfigured(
+                'CARDS_WORKER must name one of the CARDS_WORKERS (%s)'
+                ' in the multi-process mode, got: %r'
+                % (', '.join(sorted(workers)), worker))
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=self.TIMEOUT)
+
+    def workerFor(self, token):
+        """
+        Choose the worker for a token by its hash value.
+
+        Parameters
+        ----------
+        token : str
+            A game or player token.
+
+        Returns
+        -------
+        str
+            The name of the worker.
+        """
+
+        return self._names[
+            zlib.crc32(token.encode('utf-8')) % len(self._names)]
+
+    def claim(self, tokens):
+        """
+        Record the tokens of a game owned by this process's worker.
+
+        Parameters
+        ----------
+        tokens : collections.Iterable
+            The tokens being claimed.
+        """
+
+        now = time.time()
+        connection = self._connect()
+        try:
+            with connection:
+                connection.executemany(
+                    'INSERT OR REPLACE INTO durak_ws_worker_token'
+                    ' (token, worker, claimed) VALUES (?, ?, ?)',
+                    [ (token, self.worker, now) for token in tokens ])
+        finally:
+            connection.close()
+
+    def release(self, tokens):
+        """
+        Remove the tokens of an expired game owned by this process's
+        worker from the registry.
+
+        Parameters
+        ----------
+        tokens : collections.Iterable
+            The tokens being released.
+        """
+
+        connection = self._connect()
+        try:
+            with connection:
+                connection.executemany(
+                    'DELETE FROM durak_ws_worker_token'
+                    ' WHERE token = ? AND worker = ?',
+                    [ (token, self.worker) for token in tokens ])
+        finally:
+            connection.close()
+
+    def ownerOf(self, token):
+        """
+        Find the worker that owns a token.
+
+        Parameters
+        ----------
+        token : str
+            A game or player token.
+
+        Returns
+        -------
+        str
+            The name of the worker that claimed the token, or
+            the worker chosen by `workerFor` if the token has not
+            been claimed.
+        """
+
+        connection = self._connect()
+        try:
+            row = connection.execute(
+                'SELECT worker FROM durak_ws_worker_token WHERE token = ?',
+                (token,)).fetchone()
+        finally:
+            connection.close()
+        if row is None or row[0] not in self.workers:
+            return self.workerFor(token)
+        return row[0]
+
+    def urlOf(self, token):
+        """
+        Find the URL prefix of the worker that owns a token.
+
+        Parameters
+        ----------
+        token : str
+            A game or player token.
+
+        Returns
+        -------
+        str
+            The URL prefix of the owner's process.
+        """
+
+        return self.workers[self.ownerOf(token)]
+
+class AffinityMiddleware:
+    """
+    Redirects join requests to the worker processes that own
+    their tokens.
+
+    Requests to the ``intro`` view with a token argument, such as
+    ``/durak/join/<token>``, are served by the receiving worker if
+    it owns the token. Otherwise, the client is redirected to the
+    same path on the owning worker. The middleware passes all
+    requests through when the application runs in a single process.
+
+    Parameters
+    ----------
+    get_response : callable
+        The next handler in the middleware chain.
+    """
+
+    VIEW_NAME = 'intro'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        registry = WorkerRegistry.default()
+        token = None if registry is None else self.tokenOf(request)
+        if token is not None:
+            try:
+                owner = registry.ownerOf(token)
+            except:
+                log = logging.getLogger(type(self).__module__)
+                log.error('Error looking up the owner of token "%s"',
+                          token, exc_info=True)
+                owner = registry.worker
+            if owner != registry.worker:
+                return HttpResponseRedirect(
+                    registry.workers[owner].rstrip('/')
+                    + request.get_full_path())
+        return self.get_response(request)
+
+    def tokenOf(self, request):
+        """
+        Extract a token from a join request.
+
+        Parameters
+        ----------
+        request : django.http.HttpRequest
+            The web request being processed.
+
+        Returns
+        -------
+        str | NoneType
+            The token from the request's path, or ``None`` if this
+            is not a join request.
+        """
+
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return None
+        if match.url_name != self.VIEW_NAME or not match.args:
+            return None
+        return match.args[0] or None
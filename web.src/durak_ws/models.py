@@ -59,6 +59,7 @@
 
 import cards.game
 import cards.durak
+from .cluster import WorkerRegistry
 from cards_web.connect import InboundAddressEnumerator
 
 import comety
@@ -66,17 +67,28 @@ import mapping
 
 from comety.django.views import ViewWithEvents
 
+import atexit
 import collections
+import concurrent.futures
+import json
 import logging
 import math
+import os
 import queue
 import random
+import sqlite3
 import sys
 import threading
+import time
 
+from django.conf import settings
 from django.utils import timezone
 from django.utils.translation import pgettext_lazy
 
+# The cards engine doesn't depend on comety, so that simulations
+# can load it without the web stack. Cards become serializable here.
+comety.JSONSerializable.register(cards.CardFace)
+
 class PlayerCheckIn:
     """
     Admits players into this web application and sets up a new game.
@@ -92,6 +104,10 @@ class PlayerCheckIn:
         A concrete class that implements the game to be played.
         This must be a subclass of `cards.game.Game` with a constructor
         having the same signature. Defaults to `WebGame` if omitted. 
+    tokens : collections.Sequence, optional
+        Tokens of the players to be admitted, usually those of a game
+        being restored. By default, new tokens are created for the
+        default number of players.
 
     Attributes
     -----------------
@@ -106,10 +122,15 @@ class PlayerCheckIn:
     tokens
     uiDispatcher
     chatDispatcher : comety.Dispatcher
-        Comety dispatcher for sending chat messages between players.
+        Comety dispatcher that tracks players' connections to the chat.
         Players registered with the dispatcher using their tokens, when
-        such tokens are created, and never unregistered, so messages from
-        a player who left may still be delivered.
+        such tokens are created, and never unregistered.
+    chatRoom : ChatRoom
+        Inboxes and bounded history of chat messages sent between
+        players, keyed by their tokens. Inboxes are created along with
+        the tokens and never removed, so messages from a player who left
+        may still be delivered. Messages are also saved to the default
+        `ChatTranscript`, if enabled.
     FACILITIES : collections.Mapping
         A class variable containing player ids mapped to objects of this
         type used to set up games for those players. Since a game id is
@@ -244,26 +265,80 @@ class PlayerCheckIn:
         else:
             return cls.FACILITIES[cls._activeFacilityId]
 
+    @classmethod
+    def deliveryStats(cls):
+        """
+        Collect the statistics of message delivery to all games
+        set up by objects in `FACILITIES`.
+
+        Returns
+        -------
+        dict
+            A `DeliveryStats.summary` of the totals over all games,
+            with the number of games keyed by ``'gameCount'``, and
+            the summaries for individual games keyed by their ids
+            in a dictionary keyed by ``'games'``.
+
+        See Also
+        --------
+        DropBox.stats : Statistics of an individual game.
+        """
+
+        total = DeliveryStats()
+        games = {}
+        seen = set()
+        for checkIn in list(cls.FACILITIES.values()):
+            if id(checkIn) in seen:
+                continue
+            seen.add(id(checkIn))
+            game = checkIn._game
+            if isinstance(game, DropBox):
+                summary = game.stats.summary()
+                games[checkIn.id] = summary
+                total.merge(summary)
+        result = total.summary()
+        result['gameCount'] = len(games)
+        result['games'] = games
+        return result
+
     def __str__(self):
         return type(self).__name__
 
-    def __init__(self, gameType = None):
+    def __init__(self, gameType = None, tokens = None):
         self._gameType = WebGame if gameType is None else gameType
         self._comety = self._game = self._expiryTask = None
+        self._gameCount = 0
+        self._gameLock = threading.Lock()
+        self._journal = MoveJournal.default()
         self._settings = self._gameType.defaults() 
-        count = self._settings['players'] # documented at `getCapacity`
+        if tokens is None:
+            count = self._settings['players'] # documented at `getCapacity`
+            tokens = self.createTokens(count)
+        else:
+            taken = [ token for token in tokens if token in self.FACILITIES ]
+            if taken:
+                raise ValueError('Tokens are already in use: %s' % taken)
+            count = self._settings['players'] = len(tokens)
         self._players = [ None ] * count
         # values are tuples of ``(token, player object)`` for established sessions,
         # tuples of ``(token,)`` otherwise
         self.chatDispatcher = comety.Dispatcher(self.TIMER)
+        self.chatRoom = ChatRoom.fromSettings()
         self._tokens = {} # values are players' positions at the table
         i = 0
-        for token in self.createTokens(count):
+        for token in tokens:
             self._tokens[token] = i
             self._players[i] = (token,)
             self.FACILITIES[token] = self
             self.chatDispatcher.registerUser(token, False)
+            self.chatRoom.registerUser(token)
             i += 1
+        registry = WorkerRegistry.default()
+        if registry is not None:
+            registry.claim(self._tokens)
+        transcript = ChatTranscript.default()
+        if transcript is not None:
+            self.chatRoom.attachTranscript(transcript, self.id)
         cls = type(self)
         if getattr(cls, '_activeFacilityId', None) is None:
             cls._activeFacilityId = self.id
@@ -703,6 +778,294 @@ class PlayerCheckIn:
         else:
             raise ValueError('Unknown token: "%s"' % token)       
 
+    STATE_FORMAT = 1
+    SAVE_TIMEOUT = 1.
+    RESTORE_TIMEOUT = 600.
+
+    def saveState(self, timeout = None):
+        """
+        Record the state of this object and its game in a form
+        that can be converted to JSON.
+
+        The game's state is recorded by a message to the game, so that
+        it doesn't change while being saved. Once the game stops
+        accepting messages, its state is recorded directly.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            The longest time to wait for the game to record its
+            state, `SAVE_TIMEOUT` seconds by default.
+
+        Returns
+        -------
+        dict
+            The tokens and names of the players, settings of the game,
+            the host and port values, the number of games started,
+            and the state of the current game saved by
+            `cards.durak.Game.saveState`, or ``None`` if no game
+            has been started.
+
+        Raises
+        ------
+        concurrent.futures.TimeoutError
+            If the game doesn't record its state within the `timeout`.
+
+        See Also
+        --------
+        fromState : Restores an object from the value returned here.
+        """
+
+        with self._gameLock:
+            game, gameNo = self._game, self._gameCount
+        gameState = None
+        if game is not None:
+            try:
+                gameState = game.submitMessage(game.saveState).result(
+                    self.SAVE_TIMEOUT if timeout is None else timeout)
+            except (RuntimeError, concurrent.futures.CancelledError):
+                gameState = game.saveState()
+        return self._saveCheckInState(gameNo, gameState)
+
+    def _saveCheckInState(self, gameNo, gameState = None):
+        settings = dict(self._settings)
+        del settings['players']
+        return {
+            'format' : self.STATE_FORMAT,
+            'seats' : [ [ info[0] ] + ([ info[1].name ] if 1 < len(info) else [])
+                        for info in self._players ],
+            'settings' : settings,
+            'host' : self._host,
+            'port' : self._port,
+            'gameNo' : gameNo,
+            'game' : gameState,
+        }
+
+    @classmethod
+    def fromState(cls, state):
+        """
+        Create an object with a game restored from a saved state.
+
+        Players of the restored game are offline until they join it
+        again using their tokens. If none of them return within
+        `RESTORE_TIMEOUT` seconds, the restored object expires.
+
+        Parameters
+        ----------
+        state : collections.Mapping
+            A value returned by `saveState`, or its copy
+            converted from JSON.
+
+        Returns
+        -------
+        PlayerCheckIn
+            The restored object, registered in `FACILITIES`.
+
+        Raises
+        ------
+        ValueError
+            If the `state` has an unknown format, or its tokens
+            are already in use.
+        """
+
+        if state.get('format') != cls.STATE_FORMAT:
+            raise ValueError('Unknown format of check-in state: %r'
+                             % state.get('format'))
+        seats = state['seats']
+        checkIn = cls(tokens = [ seat[0] for seat in seats ])
+        try:
+            checkIn._settings.update(state['settings'])
+            checkIn._host = state['host']
+            checkIn._port = state['port']
+            for playerNo, seat in enumerate(seats):
+                if 1 < len(seat):
+                    player = checkIn.createPlayer(playerNo, seat[0])
+                    player.name = seat[1]
+                    player.offline = True
+                    checkIn._players[playerNo] = (seat[0], player)
+            checkIn._gameCount = state.get('gameNo',
+                                           int(state['game'] is not None))
+            if state['game'] is not None:
+                game = checkIn._gameType(None,
+                    uiDispatcher=checkIn.uiDispatcher, **checkIn.gameSettings)
+                checkIn._game = game.restoreState(state['game'])
+                if checkIn._journal is not None and isinstance(game, WebGame):
+                    game.attachJournal(checkIn._journal, checkIn.id,
+                                       checkIn._gameCount)
+            checkIn._expiryTask = cls.TIMER.start(
+                cls.RESTORE_TIMEOUT, checkIn.expire)
+        except:
+            checkIn.expire()
+            raise
+        return checkIn
+
+    @classmethod
+    def saveAll(cls, failed=None):
+        """
+        Record the states of all objects in `FACILITIES`.
+
+        Objects that fail to record their state are logged
+        and left out.
+
+        Parameters
+        ----------
+        failed : collections.MutableSet, optional
+            A set that receives the ids of objects that failed
+            to record their state.
+
+        Returns
+        -------
+        dict
+            States returned by `saveState`, keyed by the ids
+            of their objects.
+        """
+
+        states = {}
+        for checkIn in list(cls.FACILITIES.values()):
+            id_ = checkIn.id
+            if id_ in states or cls.FACILITIES.get(id_) is not checkIn:
+                continue
+            try:
+                states[id_] = checkIn.saveState()
+            except:
+                log = logging.getLogger(cls.__module__)
+                log.error('Error saving state of game "%s"',
+                          id_, exc_info=True)
+                if failed is not None:
+                    failed.add(id_)
+        return states
+
+    def replayJournal(self, entries):
+        """
+        Repeat the starts of games and moves recorded in a journal
+        after the state of this object was saved.
+
+        Records that are already reflected in the state of this
+        object are skipped. Replay stops at the first move that
+        has an outcome different from the recorded one.
+
+        Parameters
+        ----------
+        entries : collections.Iterable
+            Records of games at this object's table in the order
+            they were written, as loaded by `MoveJournal.load`.
+
+        Returns
+        -------
+        int
+            The number of records replayed.
+
+        Raises
+        ------
+        ValueError
+            If a recorded move is out of sequence or has
+            a different outcome.
+        """
+
+        journal, self._journal = self._journal, None
+        replayed = 0
+        try:
+            for entry in entries:
+                game = self._game
+                if 'start' == entry['type']:
+                    if entry['game'] <= self._gameCount:
+                        continue
+                    self.close(cards.Dealer(entry['seed'], entry['fast']),
+                               entry['attacker'])
+                    game = self._game
+                    if game.defendant != entry['defendant']:
+                        raise ValueError(
+                            'Replayed game #%d has defendant #%d,'
+                            ' recorded: #%d'
+                            % (entry['game'], game.defendant + 1,
+                               entry['defendant'] + 1))
+                elif 'move' == entry['type']:
+                    if game is None or (entry['game'], entry['version']) \
+                            <= (self._gameCount, game.stateVersion):
+                        continue
+                    elif entry['game'] != self._gameCount:
+                        raise ValueError(
+                            'Move of game #%d is recorded without its start,'
+                            ' game #%d is in progress'
+                            % (entry['game'], self._gameCount))
+                    player = game.players[entry['seat']]
+                    args = entry['cards']
+                    if 'defend' == entry['move']:
+                        args = (dict((cards.CardFace(target), cards.CardFace(card))
+                                     for target, card in args),)
+                    elif args:
+                        args = (tuple(cards.CardFace(code) for code in args),)
+                    else:
+                        args = ()
+                    response = getattr(player, entry['move'])(*args)
+                    if response is not None:
+                        response = sorted(card.code for card in response)
+                    if (game.stateVersion, response) != \
+                            (entry['version'], entry['result']):
+                        raise ValueError(
+                            'Replayed move %s by player #%d resulted in'
+                            ' version %d with cards %r, recorded: %d with %r'
+                            % (entry['move'], entry['seat'] + 1,
+                               game.stateVersion, response,
+                               entry['version'], entry['result']))
+                else:
+                    continue
+                replayed += 1
+        finally:
+            self._journal = journal
+            game = self._game
+            if isinstance(game, WebGame):
+                game._publishSnapshot()
+                game.attachJournal(journal, self.id, self._gameCount)
+        return replayed
+
+    @classmethod
+    def warmStart(cls):
+        """
+        Restore the games saved in the default `GameArchive`, and
+        start saving the games to it periodically and on shutdown.
+
+        Moves recorded in the default `MoveJournal` after the games
+        were saved are replayed on top of the restored games. Games
+        started after the last snapshot are restored from the journal
+        alone. Does nothing unless the archive is enabled. Games that
+        fail to restore are logged and skipped, while a game with
+        moves that fail to replay is kept in the state reached before
+        the failed move.
+        """
+
+        archive = GameArchive.default()
+        if archive is None:
+            return
+        journal = MoveJournal.default()
+        log = logging.getLogger(cls.__module__)
+        journaled = collections.OrderedDict() if journal is None \
+            else journal.load()
+        restored = replayed = 0
+        states = [ (id_, state, journaled.pop(id_, ()))
+                   for id_, state in archive.load() ]
+        for id_, entries in journaled.items():
+            if entries and 'start' == entries[0]['type']:
+                states.append((id_, entries[0]['checkIn'], entries))
+        for id_, state, entries in states:
+            if any('expire' == entry['type'] for entry in entries):
+                continue
+            try:
+                checkIn = cls.fromState(state)
+                restored += 1
+            except:
+                log.error('Error restoring game "%s"', id_, exc_info=True)
+                continue
+            try:
+                replayed += checkIn.replayJournal(entries)
+            except:
+                log.error('Error replaying journal of game "%s"',
+                          id_, exc_info=True)
+        if restored:
+            log.info('Restored %d game(s) from %s, replayed %d record(s)'
+                     ' of their journal', restored, archive.path, replayed)
+        archive.start(cls.saveAll, journal)
+
     def expire(self):
         """
         Process expiration of all related players' sessions.
@@ -720,7 +1083,16 @@ class PlayerCheckIn:
                     'Error stopping delivery loop of %s',
                     self._game, exc_info=True
                 )
+        if self._journal is not None:
+            self._journal.record({ 'type' : 'expire', 'table' : self.id })
         cls = type(self)
+        registry = WorkerRegistry.default()
+        if registry is not None:
+            try:
+                registry.release(self.tokens)
+            except:
+                log = logging.getLogger(type(self).__module__)
+                log.error('Error releasing tokens of %s', self, exc_info=True)
         for token in self.tokens:
             del cls.FACILITIES[token]
         assert self.id not in cls.FACILITIES
@@ -728,7 +1100,7 @@ class PlayerCheckIn:
         if active == self.id:
             delattr(cls, '_activeFacilityId')
 
-    def close(self):
+    def close(self, dealer = None, attacker = None):
         """
         Wrap up the check-in process and create the
         game model object. 
@@ -737,7 +1109,17 @@ class PlayerCheckIn:
         starts it and stores a reference in the `game` property.
         A successful call disables changes to this object's
         properties related to the game's settings. It also
-        retires this object as an `ACTIVE_FACILITY`.
+        retires this object as an `ACTIVE_FACILITY`. If this
+        object has a `MoveJournal`, the start of the game and
+        the seed of its dealer are recorded there.
+
+        Parameters
+        ----------
+        dealer : cards.Dealer, optional
+            The dealer passed to the game's ``start`` method.
+        attacker : int, optional
+            The index of the first attacker passed to the game's
+            ``start`` method.
     
         Raises
         ------
@@ -793,13 +1175,35 @@ class PlayerCheckIn:
                 'Not ready to start the game: player(s) %s are missing'
                 % [ i for i in range(len(players)) if players[i] is None ]
                 )
-        if self._game is None:
-            game = self._gameType(None, uiDispatcher=self.uiDispatcher, **settings)
-        else:
-            game = self._game.playAgain(None, uiDispatcher=self.uiDispatcher, **settings)
-        #self._settings = settings # freezes settings as a side-effect
-        game.start()
-        self._game = game
+        with self._gameLock:
+            if self._game is None:
+                game = self._gameType(None, uiDispatcher=self.uiDispatcher, **settings)
+            else:
+                game = self._game.playAgain(None, uiDispatcher=self.uiDispatcher, **settings)
+            #self._settings = settings # freezes settings as a side-effect
+            journal = self._journal if isinstance(game, WebGame) else None
+            if journal is not None and dealer is None:
+                dealer = cards.Dealer()
+            if attacker is not None:
+                game.start(dealer, attacker)
+            elif dealer is None:
+                game.start()
+            else:
+                game.start(dealer)
+            gameNo = self._gameCount + 1
+            if journal is not None:
+                journal.record({
+                    'type' : 'start',
+                    'table' : self.id,
+                    'game' : gameNo,
+                    'seed' : dealer.seed,
+                    'fast' : dealer.fast,
+                    'attacker' : game.attacker,
+                    'defendant' : game.defendant,
+                    'checkIn' : self._saveCheckInState(self._gameCount),
+                })
+                game.attachJournal(journal, self.id, gameNo)
+            self._game, self._gameCount = game, gameNo
         cls = type(self)
         if getattr(cls, '_activeFacilityId', None) == self.id:
             cls._activeFacilityId = None
@@ -1057,13 +1461,17 @@ class PlayerCheckIn:
                 # del self.FACILITIES[token] # keep old token to avoid duplicates
             self._players = self._players[0:newCapacity]
         elif i < newCapacity:
-            tokens = self.createTokens(newCapacity - i)
+            tokens = list(self.createTokens(newCapacity - i))
             for token in tokens:
                 self._tokens[token] = i
                 self._players.append((token,))
                 self.FACILITIES[token] = self
                 self.chatDispatcher.registerUser(token, False)
+                self.chatRoom.registerUser(token)
                 i += 1
+            registry = WorkerRegistry.default()
+            if registry is not None:
+                registry.claim(tokens)
         self._settings['players'] = newCapacity
         if oldCapacity != newCapacity:           
             self.uiDispatcher.postEvent(self,
@@ -1494,184 +1902,1348 @@ class PlayerCheckIn:
             yield token
             count -= 1        
 
-class DropBox:
+class ChatRoom:
     """
-    A receptacle for messages that must be processed in
-    a sequence.
-    
-    Objects of this class are intended to serve as mix-ins or
-    delegates for entities that accept messages from concurrent
-    senders and process them in the order they were received.
-    Messages are submitted via ``submitMessage`` method, either as
-    `DropBox.Message` objects, or the deferred function/method calls.
-    When this object is no longer needed, you should
-    call the `discard` method to free up resources used
-    by the message queue.
-    
-[    Parameters
-    --------------------
-    <var>[, <var>] : <type | value-list>[, optional]
-        <Description of constructor's parameter(s), except ``self``>
-    ...]
+    Routes chat messages into inboxes of their recipients and keeps
+    a bounded history of recent messages.
+
+    Messages are converted into the format sent to browsers and
+    serialized when posted, so that polls for updates only take
+    the entries waiting in the user's inbox. The object implements
+    ``pollEvents`` and ``confirmEvents`` methods of `comety.Dispatcher`,
+    but polls return a `Batch` of serialized events instead of
+    a list of event objects.
+
+    The history holds no more than `maxMessages` messages with no
+    more than `maxBytes` of serialized text in total, except for the
+    latest message, which is always kept. When a new message exceeds
+    either limit, the oldest messages are evicted from the history
+    and from the inboxes of users who haven't received them yet.
 
-[    Attributes
-    -----------------
-    <name_of_a_property_having_its_own_docstring> # or #
-    <var>[, <var>] : <type | value-list>
-        <Description of an attribute>
-    ...]
+    Parameters
+    ----------
+    maxMessages : int, optional
+        The maximum number of messages in the history,
+        `MAX_MESSAGES` by default.
+    maxBytes : int, optional
+        The maximum total length of serialized messages in the
+        history, `MAX_BYTES` by default.
 
     Methods
     -------
-    submitMessage(message)
-    submitMessage(function, *args, **kwargs)
-        Submit a message for the recipient.
-    discard(timeout):
-        Shut down delivery and dispose of the internal thread
-        and objects used to dispatch messages.
-    receiveResponse(self, message, response, exception):
-        Override this method to process responses from
-        the message recipient.
-    [<name>([<param>, ...])
-        <One-line description of a method to be emphasized among many others.>
-    ...]
-
-[    Raises
-    ----------
-    <exception_type>
-        <Description of an error that the constructor may raise and under what conditions.
-        List only errors that are non-obvious or have a large chance of getting raised.>
-    ... ]
-
-    See Also
-    --------------
-    DropBox.Message : Encapsulates messages processed herein.
+    registerUser(userId)
+        Create an inbox for a user.
+    post(sender, text, targets=None, senderId=None)
+        Deliver a message to the inboxes of its recipients.
+    pollEvents(userId, timeout, ...)
+        Wait for messages in a user's inbox.
+    confirmEvents(userId, lastId)
+        Remove messages received by a user from the user's inbox.
+    history(userId, beforeId=None, limit=None)
+        Return a page of messages from the history.
+    attachTranscript(transcript, tableId)
+        Load the history from a transcript and record new messages there.
+    fromSettings()
+        Create an object with limits configured for this application.
 
-[    Notes
-    ----------
-    <Additional information about the code, possibly including
-    a discussion of the algorithm. Follow it with a 'References'
-    section if citing any references.>
-    ]
+    Raises
+    ------
+    ValueError
+        If either limit is not a positive number.
 
-[   Examples
-    ----------------
-    <In the doctest format, illustrate how to use this class.>
-     ]
+    Examples
+    --------
+    >>> room = ChatRoom()
+    >>> room.registerUser('a'); room.registerUser('b')
+    >>> room.post(('Ann', 0), 'Hi')
+    1
+    >>> room.post(('Bob', 1), 'Psst', { 'a': ('Ann', 0) }, 'b')
+    2
+    >>> lastId, events = room.pollEvents('a', 0)
+    >>> lastId, len(events)
+    (2, 2)
+    >>> json.loads(events[1])
+    [['Bob', 1], {'event': 'message', 'targetUsers': [['Ann', 0]], 'text': 'Psst'}]
+    >>> room.pollEvents('b', 0)[0]
+    1
+    >>> room.confirmEvents('a', 1)
+    >>> json.loads(room.pollEvents('a', 0)[1].toJson(2))['events'][0][1]['text']
+    'Psst'
+    >>> room.confirmEvents('a', 2)
+    >>> room.pollEvents('a', 0)
+    (2, [])
+
+    >>> room = ChatRoom(maxMessages=3)
+    >>> room.registerUser('a')
+    >>> [ room.post(('Ann', 0), str(i)) for i in range(5) ]
+    [1, 2, 3, 4, 5]
+    >>> room.pollEvents('a', 0)[0], len(room.pollEvents('a', 0)[1])
+    (5, 3)
+    >>> firstId, page, more = room.history('a', limit=2)
+    >>> firstId, [ json.loads(event)[1]['text'] for event in page ], more
+    (4, ['3', '4'], True)
+    >>> firstId, page, more = room.history('a', firstId)
+    >>> firstId, [ json.loads(event)[1]['text'] for event in page ], more
+    (3, ['2'], False)
     """
 
-    def submitMessage(self, messageOrFunction, *args, **kwargs):
+    MESSAGE_EVENT = 'message'
+    MAX_MESSAGES = 200
+    MAX_BYTES = 256 * 1024
+    PAGE_SIZE = 20
+
+    class Batch(list):
         """
-        Submit a message for the recipient.
-        
-        The message can be formatted a `DropBox.Message` object,
-        or a function/method call with arguments.
+        A list of serialized events returned by `ChatRoom`.
         """
 
-        if callable(messageOrFunction):
-            messageOrFunction = self.Message(messageOrFunction, args, kwargs)
-        elif not isinstance(messageOrFunction, self.Message):
-            raise TypeError(
-                'Unknown type of messageOrFunction argument: %s'
-                % type(messageOrFunction).__name__
-            )
-        elif len(args) > 0 or len(kwargs) > 0:
+        def eventsJson(self):
+            """
+            Serialize the list of these events.
+
+            Returns
+            -------
+            str
+                JSON array of these events, or ``null``
+                if this batch is empty.
+            """
+
+            return '[%s]' % ', '.join(self) if self else 'null'
+
+        def toJson(self, lastId):
+            """
+            Serialize a response to a poll for these events.
+
+            Parameters
+            ----------
+            lastId : int
+                The id of the last event in this batch.
+
+            Returns
+            -------
+            str
+                JSON object with ``lastId`` and ``events``
+                properties, the latter being ``null`` if
+                this batch is empty.
+            """
+
+            return '{"lastId": %d, "events": %s}' % (
+                lastId, self.eventsJson())
+
+    def __init__(self, maxMessages=None, maxBytes=None):
+        self.maxMessages = (self.MAX_MESSAGES
+            if maxMessages is None else int(maxMessages))
+        self.maxBytes = self.MAX_BYTES if maxBytes is None else int(maxBytes)
+        if 0 >= self.maxMessages or 0 >= self.maxBytes:
             raise ValueError(
-                'Cannot submit extra arguments with a message object'
-            )
+                'Chat history limits must be positive, got %d messages'
+                ' and %d bytes' % (self.maxMessages, self.maxBytes))
+        self._condition = threading.Condition()
+        self._inboxes = {}
+        self._confirmed = {}
+        self._history = collections.deque()
+        self._historyBytes = 0
+        self._lastId = 0
+        self._transcript = None
 
-        with self._submitLock:
-            if messageOrFunction.isShutdownRequest(): 
-                self._acceptMessages = False
-            elif not self._acceptMessages or self._delivery is None:
-                raise RuntimeError(
-                   'The recipient is not accepting messages at this time'
-                )
-            self._messages.put(messageOrFunction)
+    @classmethod
+    def fromSettings(class_):
+        """
+        Create an object with the history limits configured by the
+        ``CARDS_CHAT_HISTORY_MESSAGES`` and ``CARDS_CHAT_HISTORY_BYTES``
+        settings, or with default limits if those are missing.
 
-    def receiveResponse(self, message, response, exception):
+        Returns
+        -------
+        ChatRoom
+            A new object with configured limits.
         """
-        Override this method to process responses from
-        the message recipient.
-        
-        This method must not return a value or raise exceptions.
-        Default implementation does nothing.
+
+        return class_(getattr(settings, 'CARDS_CHAT_HISTORY_MESSAGES', None),
+                      getattr(settings, 'CARDS_CHAT_HISTORY_BYTES', None))
+
+    def registerUser(self, userId):
+        """
+        Create an inbox for a user, unless the user already has one.
 
         Parameters
         ----------
-        message : DropBox.Message
-            The message to which this response is made.
-        response : object
-            Value returned by the message function, if any.
-            ``None`` here means that the function returned
-            ``None`` or that there was no result.
-        exception : BaseException | NoneType
-            The exception raised by the message function
-            or ``None`` if there was no exception.
+        userId : collections.Hashable
+            Identity of the user.
         """
 
-        pass
+        with self._condition:
+            if userId not in self._inboxes:
+                self._inboxes[userId] = collections.deque()
+                self._confirmed[userId] = 0
 
-    def discard(self, timeout=.5):
+    def post(self, sender, text, targets=None, senderId=None):
         """
-        Shut down delivery and dispose of the internal thread
-        and objects used to dispatch messages.
-        
-        Call this method to free up resources taken by this game when
-        it is no longer needed. The call will close the queue for
-        accepting actions from players.
+        Deliver a message to the inboxes of its recipients and
+        add it to the history.
 
         Parameters
         ----------
-        timeout : int | float | str | NoneType
-            The number of seconds, or fractions thereof, to wait for the
-            dispatcher thread to stop, or ``None`` to wait indefinitely.
-    
+        sender : collections.Sequence
+            The name and seat of the user who sent the message.
+        text : str
+            The text of the message.
+        targets : collections.Mapping, optional
+            Names and seats of the users who shall receive the message,
+            keyed by their identities. The message is delivered to all
+            registered users if this is ``None`` or omitted.
+        senderId : collections.Hashable, optional
+            Identity of the user who sent the message, who will see
+            the message in the history even if it's not targeted
+            to that user.
+
+        Returns
+        -------
+        int
+            The id of the new message.
+
         Raises
         ------
-        RuntimeError
-            If the dispatcher thread fails to stop within the `timeout`.
-        ValueError
-            If `timeout` is negative or cannot be converted to
-            a number.
-    
-        See Also
-        --------    
-        TODOdoc
-    
-        Examples
-        --------
-        TODOdoc
+        KeyError
+            If one of the `targets` is not a registered user.
         """
 
-        if timeout is not None:
-            timeout = float(timeout)
-            if 0 > timeout or not math.isfinite(timeout):
-                raise ValueError(
-                    'Thread disposal timeout %g must'
-                    ' be a finite positive number or zero'
-                    % timeout
-                )
-        if self._delivery is not None:
-            self.submitMessage(self.Message.SHUTDOWN_REQUEST)
-            if threading.current_thread() is not self._delivery:
-                self._delivery.join(timeout)
-                if self._delivery.is_alive():
-                    raise RuntimeError(
-                       'the dispatcher thread did not stop in %s seconds.'
-                       % timeout
-                    )
-                self._submitLock.release() # acquired by the _deliveryLoop() shutdown  
-            self._delivery = None
+        event = json.dumps([
+            list(sender),
+            {
+                'event' : self.MESSAGE_EVENT,
+                'text' : text,
+                'targetUsers' : None if targets is None
+                    else [ list(info) for info in targets.values() ]
+            }
+        ], sort_keys=True)
+        readers = None if targets is None else frozenset(
+            targets if senderId is None else tuple(targets) + (senderId,))
+        with self._condition:
+            self._lastId += 1
+            entry = (self._lastId, event)
+            if targets is None:
+                for inbox in self._inboxes.values():
+                    inbox.append(entry)
+            else:
+                for userId in targets:
+                    self._inboxes[userId].append(entry)
+            self._history.append((self._lastId, event, readers))
+            # ASCII-only JSON has as many bytes as characters
+            self._historyBytes += len(event)
+            self._evict()
+            if self._transcript is not None:
+                transcript, tableId = self._transcript
+                transcript.record(tableId, self._lastId, event, readers)
+            self._condition.notify_all()
+            return self._lastId
+
+    def attachTranscript(self, transcript, tableId):
+        """
+        Load the latest messages of a table from a transcript into
+        the history, and record new messages in that transcript.
 
-    class Message:
+        Parameters
+        ----------
+        transcript : ChatTranscript
+            The transcript of chat messages.
+        tableId : str
+            Identity of the game this object belongs to.
+
+        Raises
+        ------
+        RuntimeError
+            If messages have been posted to this object, or it
+            already has a transcript.
         """
-        Container of a message on the `DropBox` queue.
-        
-        Messages on a `DropBox` queue are function or method
-        calls with arguments. Callers add messages to the
-        queue, and the delivery loop executes them sequentially
-        in a separate thread. 
+
+        entries = transcript.load(tableId, self.maxMessages)
+        with self._condition:
+            if self._lastId or self._transcript is not None:
+                raise RuntimeError(
+                    'Cannot attach a transcript to %r after it has been'
+                    ' used' % self)
+            for id_, event, readers in entries:
+                self._history.append((id_, event, readers))
+                self._historyBytes += len(event)
+                self._lastId = id_
+            self._evict()
+            self._transcript = (transcript, tableId)
+
+    def _evict(self):
+        evictedId = None
+        while 1 < len(self._history) and (
+                self.maxMessages < len(self._history)
+                or self.maxBytes < self._historyBytes):
+            evictedId, event, readers = self._history.popleft()
+            self._historyBytes -= len(event)
+        if evictedId is not None:
+            for inbox in self._inboxes.values():
+                while inbox and inbox[0][0] <= evictedId:
+                    inbox.popleft()
+
+    def pollEvents(self, userId, timeout, *args):
+        """
+        Wait for messages in a user's inbox.
+
+        Parameters
+        ----------
+        userId : collections.Hashable
+            Identity of the user receiving messages.
+        timeout : float
+            The longest time to wait for messages, in seconds.
+        args : collections.Sequence
+            Ignored arguments of `comety.Dispatcher.pollEvents`.
+
+        Returns
+        -------
+        (int, ChatRoom.Batch)
+            The id of the last message returned, or the last
+            message confirmed by the user if there are none,
+            and a batch of serialized messages.
+        """
+
+        with self._condition:
+            inbox = self._inboxes[userId]
+            if not inbox and 0 < timeout:
+                self._condition.wait_for(lambda: inbox, timeout)
+            if inbox:
+                return inbox[-1][0], self.Batch(event for id_, event in inbox)
+            else:
+                return self._confirmed[userId], self.Batch()
+
+    def confirmEvents(self, userId, lastId):
+        """
+        Remove messages received by a user from the user's inbox.
+
+        Parameters
+        ----------
+        userId : collections.Hashable
+            Identity of the user who received messages.
+        lastId : int
+            The id of the last message received.
+        """
+
+        with self._condition:
+            inbox = self._inboxes[userId]
+            while inbox and inbox[0][0] <= lastId:
+                inbox.popleft()
+            if self._confirmed[userId] < lastId:
+                self._confirmed[userId] = lastId
+
+    def history(self, userId, beforeId=None, limit=None):
+        """
+        Return a page of messages visible to a user from the history.
+
+        Parameters
+        ----------
+        userId : collections.Hashable
+            Identity of the user requesting the history.
+        beforeId : int, optional
+            The page ends with the message preceding the one with
+            this id. The page ends with the latest message if this
+            is ``None`` or omitted.
+        limit : int, optional
+            The maximum number of messages on the page,
+            `PAGE_SIZE` by default.
+
+        Returns
+        -------
+        (int | NoneType, ChatRoom.Batch, bool)
+            The id of the first message on the page, or ``None``
+            if the page is empty, a batch of serialized messages
+            in the order they were posted, and a flag telling
+            whether there are earlier messages in the history.
+        """
+
+        if limit is None:
+            limit = self.PAGE_SIZE
+        page = []
+        more = False
+        with self._condition:
+            for id_, event, readers in reversed(self._history):
+                if beforeId is not None and id_ >= beforeId:
+                    continue
+                if readers is not None and userId not in readers:
+                    continue
+                if len(page) >= limit:
+                    more = True
+                    break
+                page.append((id_, event))
+        page.reverse()
+        return (page[0][0] if page else None,
+                self.Batch(event for id_, event in page), more)
+
+class ChatTranscript:
+    """
+    Writes chat messages to an SQLite database on a background
+    thread and loads them back.
+
+    Messages are queued by `record` and inserted by a writer thread
+    in batches of up to `batchSize` messages, or of the messages
+    received within `flushInterval` seconds from the first message
+    of a batch, whichever is smaller. The table and its indexes are
+    created when the writer connects to the database.
+
+    Parameters
+    ----------
+    path : str
+        The name of the database file.
+    batchSize : int, optional
+        The maximum number of messages inserted in one transaction,
+        `BATCH_SIZE` by default.
+    flushInterval : float, optional
+        The longest time a message waits for others to fill a batch,
+        `FLUSH_INTERVAL` by default.
+
+    Methods
+    -------
+    record(tableId, messageId, event, readers=None)
+        Queue a message to be written to the database.
+    load(tableId, limit)
+        Read the latest messages of a table from the database.
+    flush()
+        Wait until all queued messages are written.
+    close()
+        Write the queued messages and stop the writer thread.
+    default()
+        Return the transcript configured for this application.
+
+    Examples
+    --------
+    >>> import os.path, tempfile
+    >>> path = os.path.join(tempfile.mkdtemp(), 'chat.sqlite3')
+    >>> transcript = ChatTranscript(path, flushInterval=.01)
+    >>> for i in range(3):
+    ...     transcript.record('table', i + 1, '"%d"' % i,
+    ...         None if i else ('a', 'b'))
+    >>> transcript.flush()
+    >>> transcript.load('table', 2)
+    [(2, '"1"', None), (3, '"2"', None)]
+    >>> id_, event, readers = transcript.load('table', 5)[0]
+    >>> id_, event, sorted(readers)
+    (1, '"0"', ['a', 'b'])
+    >>> transcript.load('other', 5)
+    []
+    >>> transcript.close()
+    """
+
+    BATCH_SIZE = 50
+    FLUSH_INTERVAL = .5
+
+    SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS durak_ws_chat_message ('
+        ' id INTEGER PRIMARY KEY,'
+        ' table_id TEXT NOT NULL,'
+        ' message_id INTEGER NOT NULL,'
+        ' posted REAL NOT NULL,'
+        ' readers TEXT,'
+        ' event TEXT NOT NULL)',
+        'CREATE INDEX IF NOT EXISTS durak_ws_chat_message_table'
+        ' ON durak_ws_chat_message (table_id, message_id)',
+        'CREATE INDEX IF NOT EXISTS durak_ws_chat_message_posted'
+        ' ON durak_ws_chat_message (posted)',
+    )
+
+    _default = None
+    _defaultLock = threading.Lock()
+
+    def __init__(self, path, batchSize=None, flushInterval=None):
+        self.path = path
+        self.batchSize = self.BATCH_SIZE if batchSize is None else batchSize
+        self.flushInterval = (self.FLUSH_INTERVAL
+            if flushInterval is None else flushInterval)
+        self._queue = queue.Queue()
+        self._ready = threading.Event()
+        self._error = None
+        self._writer = threading.Thread(
+            target=self._writeLoop,
+            name='%s writer for %s' % (type(self).__name__, path),
+            daemon=True)
+        self._writer.start()
+        self._ready.wait()
+        if self._error is not None:
+            raise self._error
+
+    @classmethod
+    def default(class_):
+        """
+        Return the transcript configured for this application,
+        creating it when first called.
+
+        The ``CARDS_CHAT_TRANSCRIPT`` setting enables the transcript.
+        If its value is ``True``, messages are written to the default
+        database when that is an SQLite database. A string value is
+        the name of the database file to use.
+
+        Returns
+        -------
+        ChatTranscript | NoneType
+            The shared transcript of chat messages, or ``None``
+            if the transcript is not enabled.
+
+        Raises
+        ------
+        ValueError
+            If the ``CARDS_CHAT_TRANSCRIPT`` setting is ``True``
+            while the default database is not an SQLite database.
+        """
+
+        path = getattr(settings, 'CARDS_CHAT_TRANSCRIPT', None)
+        if not path:
+            return None
+        with class_._defaultLock:
+            if ChatTranscript._default is None:
+                if path is True:
+                    database = settings.DATABASES['default']
+                    if not database['ENGINE'].endswith('sqlite3'):
+                        raise ValueError(
+                            'CARDS_CHAT_TRANSCRIPT setting requires'
+                            ' an SQLite database, the default is: %s'
+                            % database['ENGINE'])
+                    path = database['NAME']
+                ChatTranscript._default = class_(path)
+                atexit.register(ChatTranscript._default.close)
+            return ChatTranscript._default
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path)
+        with connection:
+            for statement in self.SCHEMA:
+                connection.execute(statement)
+        return connection
+
+    def _writeLoop(self):
+        try:
+            connection = self._connect()
+        except Exception as error:
+            self._error = error
+            return
+        finally:
+            self._ready.set()
+        log = logging.getLogger(type(self).__module__)
+        try:
+            running = True
+            while running:
+                batch = [ self._queue.get() ]
+                deadline = time.monotonic() + self.flushInterval
+                while batch[-1] is not None and len(batch) < self.batchSize:
+                    timeout = deadline - time.monotonic()
+                    if 0 >= timeout:
+                        break
+                    try:
+                        batch.append(self._queue.get(timeout=timeout))
+                    except queue.Empty:
+                        break
+                if batch[-1] is None:
+                    running = False
+                rows = [ row for row in batch if row is not None ]
+                try:
+                    if rows:
+                        with connection:
+                            connection.executemany(
+                                'INSERT INTO durak_ws_chat_message'
+                                ' (table_id, message_id, posted, readers, event)'
+                                ' VALUES (?, ?, ?, ?, ?)', rows)
+                except:
+                    log.error('Error writing %d chat message(s) to %s',
+                              len(rows), self.path, exc_info=True)
+                finally:
+                    for row in batch:
+                        self._queue.task_done()
+        finally:
+            connection.close()
+
+    def record(self, tableId, messageId, event, readers=None):
+        """
+        Queue a message to be written to the database.
+
+        Parameters
+        ----------
+        tableId : str
+            Identity of the game the message was posted at.
+        messageId : int
+            The id of the message within its game.
+        event : str
+            The serialized message.
+        readers : collections.Iterable, optional
+            Identities of the users allowed to see the message,
+            or ``None`` if it was sent to everyone.
+        """
+
+        self._queue.put((tableId, messageId, time.time(),
+                         None if readers is None
+                         else json.dumps(sorted(readers)),
+                         event))
+
+    def load(self, tableId, limit):
+        """
+        Read the latest messages of a table from the database.
+
+        Messages still queued for writing are not returned.
+
+        Parameters
+        ----------
+        tableId : str
+            Identity of the game the messages were posted at.
+        limit : int
+            The maximum number of messages to read.
+
+        Returns
+        -------
+        list
+            Tuples of message ids, serialized messages, and frozen
+            sets of their readers, or ``None`` for messages sent
+            to everyone, in the order the messages were posted.
+        """
+
+        connection = sqlite3.connect(self.path)
+        try:
+            rows = connection.execute(
+                'SELECT message_id, event, readers'
+                ' FROM durak_ws_chat_message WHERE table_id = ?'
+                ' ORDER BY message_id DESC LIMIT ?',
+                (tableId, limit)).fetchall()
+        finally:
+            connection.close()
+        rows.reverse()
+        return [ (id_, event,
+                  None if readers is None else frozenset(json.loads(readers)))
+                 for id_, event, readers in rows ]
+
+    def flush(self):
+        """
+        Wait until all queued messages are written.
+        """
+
+        self._queue.join()
+
+    def close(self):
+        """
+        Write the queued messages and stop the writer thread.
+        """
+
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+
+class GameArchive:
+    """
+    Saves snapshots of games to an SQLite database and
+    loads them back.
+
+    Each snapshot replaces the previous snapshot of the same worker
+    process, so the archive holds the games that were in progress
+    when it was last saved. Once started, the archive saves the
+    games every `interval` seconds on a background thread, and
+    once more when stopped or when the interpreter exits.
+
+    Parameters
+    ----------
+    path : str
+        The name of the database file.
+    worker : str, optional
+        The name of the worker process that owns the saved games,
+        see `durak_ws.cluster`.
+    interval : float, optional
+        The number of seconds between snapshots, `INTERVAL` by default.
+
+    Methods
+    -------
+    save(states[, keep])
+        Replace the saved games with new snapshots.
+    load()
+        Read the saved games.
+    start(source[, journal])
+        Start saving snapshots periodically.
+    stop()
+        Stop saving periodic snapshots and save the final one.
+    default()
+        Return the archive configured for this application.
+
+    Examples
+    --------
+    >>> import os.path, tempfile
+    >>> path = os.path.join(tempfile.mkdtemp(), 'games.sqlite3')
+    >>> archive = GameArchive(path)
+    >>> archive.save({ 'abc': { 'seats': [['abc']] } })
+    >>> archive.load()
+    [('abc', {'seats': [['abc']]})]
+    >>> archive.start(lambda failed: { 'def': {} })
+    >>> archive.stop()
+    >>> archive.load()
+    [('def', {})]
+    >>> archive.save({ 'ghi': {} }, keep=('def',))
+    >>> archive.load()
+    [('def', {}), ('ghi', {})]
+    """
+
+    INTERVAL = 30.
+
+    SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS durak_ws_game_snapshot ('
+        ' table_id TEXT PRIMARY KEY,'
+        ' worker TEXT NOT NULL,'
+        ' saved REAL NOT NULL,'
+        ' state TEXT NOT NULL)',
+        'CREATE INDEX IF NOT EXISTS durak_ws_game_snapshot_worker'
+        ' ON durak_ws_game_snapshot (worker, saved)',
+    )
+
+    _default = None
+    _defaultLock = threading.Lock()
+
+    def __init__(self, path, worker='', interval=None):
+        self.path = path
+        self.worker = worker
+        self.interval = self.INTERVAL if interval is None else interval
+        self._source = self._journal = None
+        self._stopping = threading.Event()
+        self._thread = None
+        connection = sqlite3.connect(self.path)
+        try:
+            with connection:
+                for statement in self.SCHEMA:
+                    connection.execute(statement)
+        finally:
+            connection.close()
+
+    @classmethod
+    def default(class_):
+        """
+        Return the archive configured for this application,
+        creating it when first called.
+
+        The ``CARDS_SNAPSHOTS`` setting enables the archive. If its
+        value is ``True``, games are saved to the default database
+        when that is an SQLite database. A string value is the name
+        of the database file to use. The ``CARDS_SNAPSHOT_INTERVAL``
+        setting is the number of seconds between snapshots.
+
+        Returns
+        -------
+        GameArchive | NoneType
+            The shared archive of games, or ``None`` if the
+            archive is not enabled.
+
+        Raises
+        ------
+        ValueError
+            If the ``CARDS_SNAPSHOTS`` setting is ``True`` while
+            the default database is not an SQLite database.
+        """
+
+        path = getattr(settings, 'CARDS_SNAPSHOTS', None)
+        if not path:
+            return None
+        with class_._defaultLock:
+            if GameArchive._default is None:
+                if path is True:
+                    database = settings.DATABASES['default']
+                    if not database['ENGINE'].endswith('sqlite3'):
+                        raise ValueError(
+                            'CARDS_SNAPSHOTS setting requires'
+                            ' an SQLite database, the default is: %s'
+                            % database['ENGINE'])
+                    path = database['NAME']
+                registry = WorkerRegistry.default()
+                GameArchive._default = class_(path,
+                    '' if registry is None else registry.worker,
+                    getattr(settings, 'CARDS_SNAPSHOT_INTERVAL', None))
+            return GameArchive._default
+
+    def save(self, states, keep=()):
+        """
+        Replace the games saved by this worker with new snapshots.
+
+        Parameters
+        ----------
+        states : collections.Mapping
+            States of the games that can be converted to JSON,
+            keyed by the games' ids.
+        keep : collections.Iterable, optional
+            Ids of the games, such as the games that failed to record
+            their states, whose earlier snapshots must be kept unless
+            replaced by `states`.
+        """
+
+        now = time.time()
+        keep = list(keep)
+        connection = sqlite3.connect(self.path)
+        try:
+            with connection:
+                connection.execute(
+                    'DELETE FROM durak_ws_game_snapshot WHERE worker = ?'
+                    + ('' if not keep else ' AND table_id NOT IN (%s)'
+                       % ', '.join('?' * len(keep))),
+                    [ self.worker ] + keep)
+                connection.executemany(
+                    'INSERT OR REPLACE INTO durak_ws_game_snapshot'
+                    ' (table_id, worker, saved, state) VALUES (?, ?, ?, ?)',
+                    [ (id_, self.worker, now,
+                       json.dumps(state, separators=(',', ':')))
+                      for id_, state in states.items() ])
+        finally:
+            connection.close()
+
+    def load(self):
+        """
+        Read the games saved by this worker.
+
+        Returns
+        -------
+        list
+            Pairs of games' ids and their states.
+        """
+
+        connection = sqlite3.connect(self.path)
+        try:
+            rows = connection.execute(
+                'SELECT table_id, state FROM durak_ws_game_snapshot'
+                ' WHERE worker = ? ORDER BY saved, table_id',
+                (self.worker,)).fetchall()
+        finally:
+            connection.close()
+        return [ (id_, json.loads(state)) for id_, state in rows ]
+
+    def start(self, source, journal=None):
+        """
+        Start saving snapshots every `interval` seconds.
+
+        Parameters
+        ----------
+        source : callable
+            A function that returns the states of games to save,
+            as accepted by `save`. Its argument is a set that
+            receives the ids of games that failed to record their
+            states. The earlier snapshots of such games are kept.
+        journal : MoveJournal, optional
+            The journal of moves made in the saved games. A new
+            segment of the journal is started before each snapshot,
+            and the earlier segments are removed once the snapshot
+            is saved, unless any games failed to record their
+            states.
+
+        Raises
+        ------
+        RuntimeError
+            If the archive has been started already.
+        """
+
+        if self._thread is not None:
+            raise RuntimeError('%s is already started' % type(self).__name__)
+        self._source = source
+        self._journal = journal
+        self._thread = threading.Thread(
+            target=self._saveLoop,
+            name='%s for %s' % (type(self).__name__, self.path),
+            daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def _saveOnce(self):
+        try:
+            journal = self._journal
+            mark = None if journal is None else journal.checkpoint()
+            failed = set()
+            self.save(self._source(failed), failed)
+            if failed:
+                log = logging.getLogger(type(self).__module__)
+                log.warning('Kept earlier snapshots of %d game(s) in %s'
+                            ' and their journal', len(failed), self.path)
+            elif mark is not None:
+                journal.truncate(mark)
+        except:
+            log = logging.getLogger(type(self).__module__)
+            log.error('Error saving games to %s', self.path, exc_info=True)
+
+    def _saveLoop(self):
+        while not self._stopping.wait(self.interval):
+            self._saveOnce()
+
+    def stop(self):
+        """
+        Stop saving periodic snapshots and save the final one.
+        Does nothing if the archive hasn't been started or has
+        already been stopped.
+        """
+
+        thread = self._thread
+        if thread is None or self._stopping.is_set():
+            return
+        self._stopping.set()
+        thread.join()
+        self._saveOnce()
+
+class MoveJournal:
+    """
+    Appends records of games' starts and moves to files on a
+    background thread, and reads them back for recovery.
+
+    Records are written to segment files in a directory, one JSON
+    object per line. The writer thread writes all records queued
+    while it was busy, then flushes and synchronizes the file
+    to disk once for the whole batch, so that callers of `record`
+    never wait for the disk. A record that was not completely
+    written before a crash is skipped when the journal is loaded.
+
+    Segments are rotated by `checkpoint` and removed by `truncate`
+    once the games are saved elsewhere, e.g. to a `GameArchive`.
+
+    Parameters
+    ----------
+    directory : str
+        The directory that contains the segment files. It is created
+        if missing.
+    worker : str, optional
+        The name of the worker process that owns the journal,
+        see `durak_ws.cluster`.
+
+    Methods
+    -------
+    record(entry)
+        Queue a record to be appended to the journal.
+    load()
+        Read the records of all games from the journal.
+    checkpoint()
+        Start a new segment of the journal.
+    truncate(mark)
+        Remove the segments that precede a checkpoint.
+    flush()
+        Wait until all queued records are synchronized to disk.
+    close()
+        Write the queued records and stop the writer thread.
+    default()
+        Return the journal configured for this application.
+
+    Examples
+    --------
+    >>> import os, tempfile
+    >>> directory = tempfile.mkdtemp()
+    >>> journal = MoveJournal(directory)
+    >>> journal.record({ 'table': 'abc', 'type': 'start' })
+    >>> mark = journal.checkpoint()
+    >>> journal.record({ 'table': 'abc', 'type': 'move' })
+    >>> journal.record({ 'table': 'def', 'type': 'start' })
+    >>> journal.flush()
+    >>> sorted(journal.load().items())
+    [('abc', [{'table': 'abc', 'type': 'start'}, {'table': 'abc', 'type': 'move'}]), ('def', [{'table': 'def', 'type': 'start'}])]
+    >>> journal.truncate(mark)
+    >>> journal.flush()
+    >>> [ len(entries) for entries in journal.load().values() ]
+    [1, 1]
+    >>> len(os.listdir(directory))
+    1
+    >>> journal.close()
+    """
+
+    PREFIX = 'journal-'
+
+    _default = None
+    _defaultLock = threading.Lock()
+
+    def __init__(self, directory, worker=''):
+        self.directory = directory
+        self.worker = worker
+        os.makedirs(directory, exist_ok=True)
+        self._prefix = self.PREFIX + (worker + '-' if worker else '')
+        self._lock = threading.Lock()
+        segments = self._segments()
+        self._segment = segments[-1] + 1 if segments else 1
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(
+            target=self._writeLoop,
+            name='%s writer for %s' % (type(self).__name__, directory),
+            daemon=True)
+        self._writer.start()
+
+    @classmethod
+    def default(class_):
+        """
+        Return the journal configured for this application,
+        creating it when first called.
+
+        The ``CARDS_JOURNAL`` setting enables the journal, which
+        also requires the default `GameArchive`, so that segments
+        of the journal are removed once the games are saved. If the
+        setting's value is ``True``, segments are kept in a directory
+        next to the archive's database file, with the file's name
+        followed by ``.journal``. A string value is the name of the
+        directory to use.
+
+        Returns
+        -------
+        MoveJournal | NoneType
+            The shared journal of games, or ``None`` if the
+            journal or the archive is not enabled.
+        """
+
+        directory = getattr(settings, 'CARDS_JOURNAL', None)
+        archive = GameArchive.default() if directory else None
+        if archive is None:
+            return None
+        with class_._defaultLock:
+            if MoveJournal._default is None:
+                if directory is True:
+                    directory = archive.path + '.journal'
+                MoveJournal._default = class_(directory, archive.worker)
+                atexit.register(MoveJournal._default.close)
+            return MoveJournal._default
+
+    def _segments(self):
+        numbers = []
+        for name in os.listdir(self.directory):
+            number = name[len(self._prefix):-len('.log')]
+            if name.startswith(self._prefix) and name.endswith('.log') \
+                    and number.isdigit():
+                numbers.append(int(number))
+        return sorted(numbers)
+
+    def _pathOf(self, segment):
+        return os.path.join(self.directory, '%s%08d.log'
+                            % (self._prefix, segment))
+
+    def _writeLoop(self):
+        log = logging.getLogger(type(self).__module__)
+        segment = self._segment
+        file_ = open(self._pathOf(segment), 'a', encoding='utf-8')
+        try:
+            running = True
+            while running:
+                batch = [ self._queue.get() ]
+                while True:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                try:
+                    for item in batch:
+                        if item is None:
+                            running = False
+                        elif isinstance(item, str):
+                            file_.write(item)
+                        elif 0 < item:
+                            file_.flush()
+                            os.fsync(file_.fileno())
+                            file_.close()
+                            segment = item
+                            file_ = open(self._pathOf(segment), 'a',
+                                         encoding='utf-8')
+                        else:
+                            for old in self._segments():
+                                if old < -item:
+                                    os.remove(self._pathOf(old))
+                    file_.flush()
+                    os.fsync(file_.fileno())
+                except:
+                    log.error('Error writing %d item(s) to the journal in %s',
+                              len(batch), self.directory, exc_info=True)
+                finally:
+                    for item in batch:
+                        self._queue.task_done()
+        finally:
+            file_.close()
+
+    def record(self, entry):
+        """
+        Queue a record to be appended to the journal.
+
+        Parameters
+        ----------
+        entry : collections.Mapping
+            The record, which must be convertible to JSON and
+            have the id of its game keyed by ``'table'``.
+        """
+
+        self._queue.put(json.dumps(entry, separators=(',', ':')) + '\n')
+
+    def checkpoint(self):
+        """
+        Start a new segment of the journal for records queued
+        after this call.
+
+        Returns
+        -------
+        int
+            The mark of the new segment for `truncate`.
+        """
+
+        with self._lock:
+            self._segment += 1
+            self._queue.put(self._segment)
+            return self._segment
+
+    def truncate(self, mark):
+        """
+        Remove the segments that precede a checkpoint.
+
+        Parameters
+        ----------
+        mark : int
+            The value returned by `checkpoint`.
+        """
+
+        self._queue.put(-mark)
+
+    def load(self):
+        """
+        Read the records of all games from the journal.
+
+        Returns
+        -------
+        collections.OrderedDict
+            Lists of records in the order they were written,
+            keyed by the ids of their games, in the order
+            the games first appear in the journal.
+        """
+
+        entries = collections.OrderedDict()
+        log = logging.getLogger(type(self).__module__)
+        for segment in self._segments():
+            path = self._pathOf(segment)
+            with open(path, encoding='utf-8') as file_:
+                for line in file_:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        log.warning('Skipped a damaged record in %s: %r',
+                                    path, line)
+                        continue
+                    entries.setdefault(entry['table'], []).append(entry)
+        return entries
+
+    def flush(self):
+        """
+        Wait until all queued records are synchronized to disk.
+        """
+
+        self._queue.join()
+
+    def close(self):
+        """
+        Write the queued records and stop the writer thread.
+        """
+
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+
+class DropBox:
+    """
+    A receptacle for messages that must be processed in
+    a sequence.
+    
+    Objects of this class are intended to serve as mix-ins or
+    delegates for entities that accept messages from concurrent
+    senders and process them in the order they were received.
+    Messages are submitted via ``submitMessage`` method, either as
+    `DropBox.Message` objects, or the deferred function/method calls.
+    When this object is no longer needed, you should
+    call the `discard` method to free up resources used
+    by the message queue.
+    
+    Parameters
+    ----------
+    scheduler : DeliveryScheduler, optional
+        The strategy that runs the delivery of messages to this
+        object. Defaults to the `DeliveryScheduler.default`
+        scheduler.
+
+[    Attributes
+    -----------------
+    <name_of_a_property_having_its_own_docstring> # or #
+    <var>[, <var>] : <type | value-list>
+        <Description of an attribute>
+    ...]
+
+    Methods
+    -------
+    submitMessage(message)
+    submitMessage(function, *args, **kwargs)
+        Submit a message for the recipient.
+    stats
+        Statistics of message delivery to this object.
+    discard(timeout):
+        Shut down delivery and dispose of the objects used to
+        dispatch messages.
+    receiveResponse(self, message, response, exception):
+        Override this method to process responses from
+        the message recipient.
+    [<name>([<param>, ...])
+        <One-line description of a method to be emphasized among many others.>
+    ...]
+
+[    Raises
+    ----------
+    <exception_type>
+        <Description of an error that the constructor may raise and under what conditions.
+        List only errors that are non-obvious or have a large chance of getting raised.>
+    ... ]
+
+    See Also
+    --------------
+    DropBox.Message : Encapsulates messages processed herein.
+    DeliveryScheduler : Runs the delivery of messages.
+
+[    Notes
+    ----------
+    <Additional information about the code, possibly including
+    a discussion of the algorithm. Follow it with a 'References'
+    section if citing any references.>
+    ]
+
+[   Examples
+    ----------------
+    <In the doctest format, illustrate how to use this class.>
+     ]
+    """
+
+    def submitMessage(self, messageOrFunction, *args, **kwargs):
+        """
+        Submit a message for the recipient.
+        
+        The message can be formatted a `DropBox.Message` object,
+        or a function/method call with arguments.
+
+        Returns
+        -------
+        concurrent.futures.Future
+            A future that completes with the value returned by the
+            message function, or with the exception it raised, once
+            the message has been delivered and `receiveResponse`
+            has processed the outcome. Futures of messages discarded
+            on shutdown are cancelled.
+
+        Raises
+        ------
+        RuntimeError
+            If the recipient is not accepting messages.
+        """
+
+        if callable(messageOrFunction):
+            messageOrFunction = self.Message(messageOrFunction, args, kwargs)
+        elif not isinstance(messageOrFunction, self.Message):
+            raise TypeError(
+                'Unknown type of messageOrFunction argument: %s'
+                % type(messageOrFunction).__name__
+            )
+        elif len(args) > 0 or len(kwargs) > 0:
+            raise ValueError(
+                'Cannot submit extra arguments with a message object'
+            )
+
+        with self._submitLock:
+            if messageOrFunction.isShutdownRequest(): 
+                self._acceptMessages = False
+            elif not self._acceptMessages or self._delivery is None:
+                raise RuntimeError(
+                   'The recipient is not accepting messages at this time'
+                )
+            future = concurrent.futures.Future()
+            self._messages.put((messageOrFunction, future, time.monotonic()))
+            self._stats.recordSubmit(self._messages.qsize())
+            if not self._scheduled:
+                self._scheduled = True
+                self._scheduler.schedule(self)
+        return future
+
+    @property
+    def stats(self):
+        """
+        Read-only property with the statistics of message
+        delivery to this object.
+
+        Returns
+        -------
+        DeliveryStats
+            The statistics object updated as messages are
+            submitted and delivered.
+        """
+
+        return self._stats
+
+    def receiveResponse(self, message, response, exception):
+        """
+        Override this method to process responses from
+        the message recipient.
+        
+        This method must not return a value or raise exceptions.
+        Default implementation does nothing.
+
+        Parameters
+        ----------
+        message : DropBox.Message
+            The message to which this response is made.
+        response : object
+            Value returned by the message function, if any.
+            ``None`` here means that the function returned
+            ``None`` or that there was no result.
+        exception : BaseException | NoneType
+            The exception raised by the message function
+            or ``None`` if there was no exception.
+        """
+
+        pass
+
+    def discard(self, timeout=.5):
+        """
+        Shut down delivery and dispose of the objects used to
+        dispatch messages.
+        
+        Call this method to free up resources taken by this game when
+        it is no longer needed. The call will close the queue for
+        accepting actions from players.
+
+        Parameters
+        ----------
+        timeout : int | float | str | NoneType
+            The number of seconds, or fractions thereof, to wait for the
+            dispatcher thread to stop, or ``None`` to wait indefinitely.
+    
+        Raises
+        ------
+        RuntimeError
+            If the delivery fails to stop within the `timeout`.
+        ValueError
+            If `timeout` is negative or cannot be converted to
+            a number.
+    
+        See Also
+        --------    
+        DeliveryScheduler : Runs the delivery of messages to
+            this object.
+    
+        Examples
+        --------
+        TODOdoc
+        """
+
+        if timeout is not None:
+            timeout = float(timeout)
+            if 0 > timeout or not math.isfinite(timeout):
+                raise ValueError(
+                    'Thread disposal timeout %g must'
+                    ' be a finite positive number or zero'
+                    % timeout
+                )
+        if self._delivery is not None:
+            self.submitMessage(self.Message.SHUTDOWN_REQUEST)
+            if threading.current_thread() is not self._deliveringThread:
+                if not self._stopped.wait(timeout):
+                    raise RuntimeError(
+                       'the message delivery did not stop in %s seconds.'
+                       % timeout
+                    )
+            self._delivery = None
+
+    class Message:
+        """
+        Container of a message on the `DropBox` queue.
+        
+        Messages on a `DropBox` queue are function or method
+        calls with arguments. Callers add messages to the
+        queue, and the delivery loop executes them sequentially
+        in a separate thread. 
         
         Constructor parameters of this class' instances are
         the same as their attributes listed below.
@@ -1728,37 +3300,503 @@ class DropBox:
 
     Message.SHUTDOWN_REQUEST = Message(None, None, None)
 
-    def _deliveryLoop(self):
-        while True:
-            message = self._messages.get()
-            if message.isShutdownRequest():
-                if self._delivery is not None:
-                    # request submitted from another thread - lock until joined
-                    self._submitLock.acquire()
+    def _deliverMessage(self, entry):
+        """
+        Deliver a message taken from the queue of this object
+        and complete its future.
+
+        Parameters
+        ----------
+        entry : (DropBox.Message, concurrent.futures.Future, float)
+            The message to deliver, its future, and the
+            `time.monotonic` reading when it was submitted.
+
+        Returns
+        -------
+        bool
+            ``False`` if the message was a shutdown request, and
+            the delivery must stop, ``True`` otherwise.
+        """
+
+        message, future, submitted = entry
+        if not future.set_running_or_notify_cancel():
+            self._messages.task_done()
+            self._stats.recordDiscarded()
+            return True
+        elif message.isShutdownRequest():
+            self._messages.task_done()
+            count = 1
+            while not self._messages.empty():
+                self._messages.get(False)[1].cancel()
                 self._messages.task_done()
-                while not self._messages.empty():
-                    self._messages.get(False)
-                    self._messages.task_done()
-                break
-            else:
-                response, exception = None, None
-                try:
-                    response = message._deliver()
-                except:
-                    exception = sys.exc_info()[1]
+                count += 1
+            self._stats.recordDiscarded(count)
+            self._stopped.set()
+            future.set_result(None)
+            return False
+        else:
+            response, exception = None, None
+            started = time.monotonic()
+            try:
+                response = message._deliver()
+            except:
+                exception = sys.exc_info()[1]
+            try:
                 self.receiveResponse(message, response, exception)
+            except:
+                log = logging.getLogger(type(self).__module__)
+                log.error('Error processing the response to %s',
+                          message, exc_info=True)
+            finally:
                 self._messages.task_done()
+                self._stats.recordDelivery(started - submitted,
+                    time.monotonic() - started, exception is not None)
+                if exception is None:
+                    future.set_result(response)
+                else:
+                    future.set_exception(exception)
+            return True
 
-    def __init__(self):
+    def _deliveryLoop(self):
+        self._deliveringThread = threading.current_thread()
+        while self._deliverMessage(self._messages.get()):
+            pass
+
+    def _deliverPending(self, limit=None):
+        """
+        Deliver messages waiting on the queue of this object on the
+        current thread, and schedule the remaining messages for
+        another run.
+
+        Parameters
+        ----------
+        limit : int, optional
+            The maximum number of messages to deliver during this
+            call. There is no limit if omitted.
+        """
+
+        count = 0
+        self._deliveringThread = threading.current_thread()
+        try:
+            while limit is None or count < limit:
+                try:
+                    entry = self._messages.get(False)
+                except queue.Empty:
+                    break
+                if not self._deliverMessage(entry):
+                    return
+                count += 1
+        finally:
+            self._deliveringThread = None
+            with self._submitLock:
+                if self._messages.empty():
+                    self._scheduled = False
+                else:
+                    self._scheduler.schedule(self)
+
+    def __init__(self, scheduler=None):
         self._submitLock = threading.Lock()
         self._messages = queue.Queue()
         self._acceptMessages = True
-        self._delivery = threading.Thread(
-            target=self._deliveryLoop,
-            name=type(self).__name__
+        self._scheduled = False
+        self._stopped = threading.Event()
+        self._deliveringThread = None
+        self._stats = DeliveryStats()
+        if scheduler is None:
+            scheduler = DeliveryScheduler.default()
+        # the scheduler that runs the delivery; `_delivery` is cleared
+        # when this object is discarded, but the delivery may still
+        # need to reschedule the messages already accepted
+        self._scheduler = scheduler.attach(self)
+        self._delivery = self._scheduler
+
+class DeliveryScheduler:
+    """
+    Base class of the strategies that run the delivery of
+    messages to `DropBox` objects.
+
+    A scheduler is attached to each `DropBox` when it is created,
+    and is notified when messages arrive at an idle `DropBox`.
+    Whatever threads a scheduler uses, it must deliver messages
+    to each `DropBox` on one thread at a time, in the order they
+    were submitted.
+
+    Methods
+    -------
+    attach(dropBox)
+        Prepare for the delivery of messages to a `DropBox`.
+    schedule(dropBox)
+        Arrange for the delivery of pending messages to a `DropBox`.
+    default()
+        Return the scheduler configured for this application.
+
+    See Also
+    --------
+    ThreadPerDropBox : Runs a dedicated thread for each `DropBox`.
+    DeliveryPool : Shares a bounded pool of threads between all
+        `DropBox` objects.
+
+    Notes
+    -----
+    The `default` scheduler is chosen by the ``CARDS_DELIVERY``
+    setting, which may be ``'pool'`` (the default) or ``'thread'``.
+    The ``CARDS_DELIVERY_WORKERS`` setting limits the number of
+    threads in the shared pool.
+    """
+
+    _default = None
+    _defaultLock = threading.Lock()
+
+    DEFAULT_WORKERS = 4
+
+    def attach(self, dropBox):
+        """
+        Prepare for the delivery of messages to a `DropBox`.
+
+        Parameters
+        ----------
+        dropBox : DropBox
+            The object being initialized.
+
+        Returns
+        -------
+        DeliveryScheduler
+            The scheduler that will run the delivery, usually this
+            object.
+        """
+
+        return self
+
+    def schedule(self, dropBox):
+        """
+        Arrange for the delivery of pending messages to a `DropBox`.
+
+        The `DropBox` calls this method with its submission lock
+        held, when a message arrives while its queue is idle.
+
+        Parameters
+        ----------
+        dropBox : DropBox
+            The object with messages waiting for delivery.
+        """
+
+        raise NotImplementedError(
+            '%s must implement schedule()' % type(self).__name__)
+
+    @classmethod
+    def default(class_):
+        """
+        Return the scheduler configured for this application,
+        creating it when first called.
+
+        Returns
+        -------
+        DeliveryScheduler
+            The shared scheduler used by `DropBox` objects unless
+            they are given another one.
+
+        Raises
+        ------
+        ValueError
+            If the ``CARDS_DELIVERY`` or ``CARDS_DELIVERY_WORKERS``
+            settings are not valid.
+        """
+
+        with class_._defaultLock:
+            if DeliveryScheduler._default is None:
+                kind = getattr(settings, 'CARDS_DELIVERY', 'pool')
+                if kind == 'pool':
+                    DeliveryScheduler._default = DeliveryPool(
+                        getattr(settings, 'CARDS_DELIVERY_WORKERS',
+                                class_.DEFAULT_WORKERS))
+                elif kind == 'thread':
+                    DeliveryScheduler._default = ThreadPerDropBox()
+                else:
+                    raise ValueError(
+                        'CARDS_DELIVERY setting must be "pool" or'
+                        ' "thread", got: %r' % (kind,))
+            return DeliveryScheduler._default
+
+class ThreadPerDropBox(DeliveryScheduler):
+    """
+    Delivers messages to each `DropBox` on a dedicated daemon
+    thread that waits for messages for the life of the `DropBox`.
+    """
+
+    def attach(self, dropBox):
+        thread = threading.Thread(
+            target=dropBox._deliveryLoop,
+            name=type(dropBox).__name__
         )
-        self._delivery.daemon = True
-        self._delivery.start()
+        thread.daemon = True
+        thread.start()
+        return self
+
+    def schedule(self, dropBox):
+        pass
+
+class DeliveryPool(DeliveryScheduler):
+    """
+    Delivers messages to all attached `DropBox` objects on a
+    bounded pool of daemon threads.
+
+    Each `DropBox` with pending messages is put on the pool's
+    queue once, and is served by a single worker at a time, so
+    the messages to it are delivered in order. A worker delivers
+    at most `batchSize` messages before moving the `DropBox` to the
+    back of the queue. Worker threads are started when the first
+    `DropBox` is attached.
+
+    Parameters
+    ----------
+    workers : int | str
+        The number of worker threads in the pool.
+    batchSize : int, optional
+        The number of messages a worker delivers to a `DropBox`
+        before serving the others.
+
+    Raises
+    ------
+    ValueError
+        If `workers` or `batchSize` are not positive numbers.
+    """
+
+    def __init__(self, workers, batchSize=8):
+        workers = int(workers)
+        if 0 >= workers:
+            raise ValueError(
+                'Number of delivery workers must be positive, got %d'
+                % workers)
+        if 0 >= batchSize:
+            raise ValueError(
+                'Delivery batch size must be positive, got %d'
+                % batchSize)
+        self.workers = workers
+        self.batchSize = batchSize
+        self._ready = queue.Queue()
+        self._threads = None
+        self._lock = threading.Lock()
+
+    def attach(self, dropBox):
+        with self._lock:
+            if self._threads is None:
+                self._threads = []
+                for i in range(self.workers):
+                    thread = threading.Thread(
+                        target=self._work,
+                        name='%s-%d' % (type(self).__name__, i)
+                    )
+                    thread.daemon = True
+                    thread.start()
+                    self._threads.append(thread)
+        return self
+
+    def schedule(self, dropBox):
+        self._ready.put(dropBox)
+
+    def _work(self):
+        while True:
+            dropBox = self._ready.get()
+            try:
+                dropBox._deliverPending(self.batchSize)
+            except:
+                log = logging.getLogger(type(self).__module__)
+                log.error('Error delivering messages to %s',
+                          dropBox, exc_info=True)
+
+class DeliveryStats:
+    """
+    Thread-safe counters and histograms of message delivery
+    to a `DropBox`.
+
+    Times spent by messages in the queue and in delivery are
+    counted in histograms with buckets whose bounds grow as powers
+    of two. Bucket number ``n`` counts the times between ``2**(n-1)``
+    inclusive and ``2**n`` microseconds exclusive, bucket ``0``
+    counts times shorter than a microsecond, and the last bucket
+    counts all longer times.
+
+    Methods
+    -------
+    recordSubmit(depth)
+        Count a submitted message.
+    recordDelivery(wait, elapsed, failed)
+        Count a delivered message.
+    recordDiscarded(count)
+        Count messages that were not delivered.
+    recordRejected()
+        Count a move rejected by the recipient.
+    summary()
+        Return the current values of all statistics.
+    merge(summary)
+        Add statistics from a summary to this object.
+
+    Examples
+    --------
+    >>> stats = DeliveryStats()
+    >>> stats.recordSubmit(1)
+    >>> stats.recordSubmit(2)
+    >>> stats.recordDelivery(.000003, .0015, False)
+    >>> stats.recordDelivery(.01, .0000005, True)
+    >>> summary = stats.summary()
+    >>> summary['maxDepth'], summary['submitted'], summary['delivered']
+    (2, 2, 2)
+    >>> summary['depth'], summary['failed'], summary['rejected']
+    (0, 1, 0)
+    >>> summary['waitHistogram'][2], summary['waitHistogram'][14]
+    (1, 1)
+    >>> summary['execHistogram'][0], summary['execHistogram'][11]
+    (1, 1)
+    """
+
+    BUCKETS = 32
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.submitted = self.delivered = self.failed = 0
+        self.discarded = self.rejected = self.maxDepth = 0
+        self.waitTotal = self.execTotal = 0.
+        self.waitHistogram = [ 0 ] * self.BUCKETS
+        self.execHistogram = [ 0 ] * self.BUCKETS
+
+    @classmethod
+    def bucketOf(class_, seconds):
+        """
+        Find the histogram bucket that counts a time interval.
+
+        Parameters
+        ----------
+        seconds : float
+            The length of an interval in seconds.
+
+        Returns
+        -------
+        int
+            The number of the histogram bucket for the interval.
+
+        Examples
+        --------
+        >>> DeliveryStats.bucketOf(0), DeliveryStats.bucketOf(.000001)
+        (0, 1)
+        >>> DeliveryStats.bucketOf(.001), DeliveryStats.bucketOf(1e6)
+        (10, 31)
+        """
+
+        return min(int(seconds * 1000000).bit_length(), class_.BUCKETS - 1)
+
+    def recordSubmit(self, depth):
+        """
+        Count a message submitted to the `DropBox`.
+
+        Parameters
+        ----------
+        depth : int
+            The number of messages in the queue after submission.
+        """
+
+        with self._lock:
+            self.submitted += 1
+            if self.maxDepth < depth:
+                self.maxDepth = depth
+
+    def recordDelivery(self, wait, elapsed, failed):
+        """
+        Count a message delivered by the `DropBox`.
+
+        Parameters
+        ----------
+        wait : float
+            The number of seconds the message spent in the queue.
+        elapsed : float
+            The number of seconds spent delivering the message and
+            processing the response.
+        failed : bool
+            Whether the message function raised an exception.
+        """
+
+        with self._lock:
+            self.delivered += 1
+            if failed:
+                self.failed += 1
+            self.waitTotal += wait
+            self.execTotal += elapsed
+            self.waitHistogram[self.bucketOf(wait)] += 1
+            self.execHistogram[self.bucketOf(elapsed)] += 1
+
+    def recordDiscarded(self, count=1):
+        """
+        Count messages removed from the queue without delivery.
+
+        Parameters
+        ----------
+        count : int, optional
+            The number of messages removed, one by default.
+        """
+
+        with self._lock:
+            self.discarded += count
+
+    def recordRejected(self):
+        """
+        Count a move that the recipient rejected, in whole or in part.
+        """
+
+        with self._lock:
+            self.rejected += 1
+
+    def summary(self):
+        """
+        Return the current values of all statistics.
+
+        Returns
+        -------
+        dict
+            Values of this object's counters and copies of its
+            histograms keyed by attribute names, and the number
+            of messages waiting for delivery keyed by ``'depth'``.
+        """
+
+        with self._lock:
+            return {
+                'depth' : self.submitted - self.delivered - self.discarded,
+                'maxDepth' : self.maxDepth,
+                'submitted' : self.submitted,
+                'delivered' : self.delivered,
+                'failed' : self.failed,
+                'discarded' : self.discarded,
+                'rejected' : self.rejected,
+                'waitTotal' : self.waitTotal,
+                'execTotal' : self.execTotal,
+                'waitHistogram' : list(self.waitHistogram),
+                'execHistogram' : list(self.execHistogram),
+            }
+
+    def merge(self, summary):
+        """
+        Add statistics from a summary to this object.
+
+        Counters and histograms are added up, except for the
+        maximum depth, which becomes the greater of the two.
+
+        Parameters
+        ----------
+        summary : collections.Mapping
+            A summary returned by `summary` method of this class.
+        """
+
+        with self._lock:
+            self.submitted += summary['submitted']
+            self.delivered += summary['delivered']
+            self.failed += summary['failed']
+            self.discarded += summary['discarded']
+            self.rejected += summary['rejected']
+            self.maxDepth = max(self.maxDepth, summary['maxDepth'])
+            self.waitTotal += summary['waitTotal']
+            self.execTotal += summary['execTotal']
+            for i, count in enumerate(summary['waitHistogram']):
+                self.waitHistogram[i] += count
+            for i, count in enumerate(summary['execHistogram']):
+                self.execHistogram[i] += count
 
 class WebGame(cards.durak.Game, DropBox):
     """
@@ -1782,6 +3820,13 @@ class WebGame(cards.durak.Game, DropBox):
     Attributes
     -----------------
     uiDispatcher
+    currentSnapshot
+    SNAPSHOT_HISTORY : int
+        The number of latest snapshots kept for `snapshotAt`.
+    SeatView : type
+        Named tuple with a player's ``hand``, as a tuple of cards in
+        the order of `cards.durak.Player.hand`, and the player's
+        ``legalMoves`` when a snapshot was published.
     [ <name_of_a_property_having_its_own_docstring> # or #
     <var>[, <var>] : <type | value-list>
         <Description of an attribute>
@@ -1833,10 +3878,20 @@ class WebGame(cards.durak.Game, DropBox):
         super().__init__(playerFactory, **userSettings)
         DropBox.__init__(self)
         self._comety = uiDispatcher 
+        self._snapshot = None
+        self._history = ()
+        self._journal = self._tableId = self._gameNo = None
 
     PLAY_EVENT = 'play'
     GAME_OVER_EVENT = 'game-over'
 
+    SNAPSHOT_HISTORY = 16
+
+    TableSnapshot = collections.namedtuple('TableSnapshot',
+        cards.durak.Game.Snapshot._fields + ('ranksOnTable', 'seats'))
+
+    SeatView = collections.namedtuple('SeatView', ('hand', 'legalMoves'))
+
     @classmethod
     def getPlayerClass(class_):
         """
@@ -1881,10 +3936,200 @@ class WebGame(cards.durak.Game, DropBox):
 
     uiDispatcher = property(getUiDispatcher)
 
+    @property
+    def currentSnapshot(self):
+        """
+        Read-only property with the latest published snapshot of
+        this game's state.
+
+        Snapshots are published when the game starts and after
+        each accepted move that changes the game's state. Since a
+        snapshot is immutable and is replaced with a single
+        assignment, views and events can read it without
+        synchronizing with the message delivery thread.
+
+        Besides the fields of `cards.durak.Game.Snapshot`, each
+        snapshot contains the ``ranksOnTable`` and a tuple of
+        ``seats`` with a `SeatView` of each player, so that the
+        state seen by players never mixes different versions.
+
+        Returns
+        -------
+        WebGame.TableSnapshot | NoneType
+            The latest snapshot of this game, or ``None`` if the game
+            hasn't been started yet.
+
+        See Also
+        --------
+        cards.durak.Game.snapshot : Describes the snapshot's contents.
+        """
+
+        return self._snapshot
+
+    def _publishSnapshot(self):
+        """
+        Replace `currentSnapshot` with a new one if the state version
+        has changed since it was taken.
+
+        Must be called on the thread that makes moves in this game,
+        or before the moves begin.
+
+        Returns
+        -------
+        WebGame.TableSnapshot
+            The snapshot of the current state of this game.
+        """
+
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.version != self.stateVersion:
+            snapshot = self.TableSnapshot(*(self.snapshot() + (
+                self.ranksOnTable,
+                tuple(self.SeatView(tuple(player.hand),
+                                    self.legalMoves(player))
+                      for player in self.players)
+            )))
+            self._history = \
+                self._history[1 - self.SNAPSHOT_HISTORY:] + (snapshot,)
+            self._snapshot = snapshot
+        return snapshot
+
+    def snapshotAt(self, version):
+        """
+        Find a recently published snapshot of this game's state.
+
+        Up to `SNAPSHOT_HISTORY` latest snapshots are kept, so that
+        clients can learn what has changed since the version
+        they have seen.
+
+        Parameters
+        ----------
+        version : int
+            The state version of the snapshot.
+
+        Returns
+        -------
+        WebGame.TableSnapshot | NoneType
+            The snapshot published with that `version`, or ``None``
+            if there is no such snapshot in the history.
+        """
+
+        for snapshot in reversed(self._history):
+            if snapshot.version == version:
+                return snapshot
+            elif snapshot.version < version:
+                break
+        return None
+
+    def start(self, dealer=None, attacker=None):
+        """
+        Start the game and publish its initial snapshot.
+
+        Parameters
+        ----------
+        dealer : cards.Dealer, optional
+            Passed to the superclass's method.
+        attacker : int, optional
+            Passed to the superclass's method.
+
+        Returns
+        -------
+        WebGame
+            This object.
+
+        See Also
+        --------
+        cards.durak.Game.start : Describes the starting procedure.
+        """
+
+        super().start(dealer, attacker)
+        self._publishSnapshot()
+        return self
+
+    def attachJournal(self, journal, tableId, gameNo):
+        """
+        Record the moves accepted by this game in a journal.
+
+        Parameters
+        ----------
+        journal : MoveJournal | NoneType
+            The journal that receives records of moves, or ``None``
+            to stop recording them.
+        tableId : str
+            The id of the `PlayerCheckIn` object of this game.
+        gameNo : int
+            The number of this game among the games played at
+            its table.
+        """
+
+        self._tableId, self._gameNo = tableId, gameNo
+        self._journal = journal
+
+    def _journalMove(self, message, response, snapshot):
+        """
+        Record a move that changed the state of this game
+        in the attached journal.
+        """
+
+        player = message.args[0]
+        if not isinstance(player, cards.game.Player):
+            return
+        cards_ = message.args[1] if 1 < len(message.args) else ()
+        if isinstance(cards_, collections.Mapping):
+            cards_ = [ [ target.code, card.code ]
+                       for target, card in cards_.items() ]
+        else:
+            cards_ = [ card.code for card in cards_ ]
+        self._journal.record({
+            'type' : 'move',
+            'table' : self._tableId,
+            'game' : self._gameNo,
+            'version' : snapshot.version,
+            'seat' : player.seat,
+            'move' : message.function.__name__,
+            'cards' : cards_,
+            'result' : None if response is None
+                else sorted(card.code for card in response),
+        })
+
+    def restoreState(self, state):
+        """
+        Restore a saved game and publish its snapshot.
+
+        Delivery of messages to a restored game that is over
+        is shut down, as it would be by `gameOver`.
+
+        Parameters
+        ----------
+        state : collections.Mapping
+            Passed to the superclass's method.
+
+        Returns
+        -------
+        WebGame
+            This object.
+
+        See Also
+        --------
+        cards.durak.Game.restoreState : Describes the restoring procedure.
+        """
+
+        super().restoreState(state)
+        self._publishSnapshot()
+        if not self.playing:
+            self.discard()
+        return self
+
     def receiveResponse(self, message, response, exception):
         """
         Process action responses from the game model and
         notify players of changes in the game.
+
+        Moves that raised an exception, or had some of their
+        cards rejected, are counted in the `stats` of this object.
+        Moves that changed the game's state are recorded in the
+        journal attached to this object, if any. Messages without
+        arguments, such as requests to save the game's state,
+        don't notify players.
         
         This method does not return a value.
 
@@ -1901,7 +4146,21 @@ class WebGame(cards.durak.Game, DropBox):
             or ``None`` if there was no exception.
         """
 
-        if exception is None and self.playing:
+        if exception is None:
+            try:
+                previous = self._snapshot
+                snapshot = self._publishSnapshot()
+                if 1 < len(message.args) and response is not None \
+                        and len(response) < len(message.args[1]):
+                    self._stats.recordRejected()
+                if self._journal is not None and message.args \
+                        and snapshot is not previous:
+                    self._journalMove(message, response, snapshot)
+            except:
+                exception = sys.exc_info()[1]
+        else:
+            self._stats.recordRejected()
+        if exception is None and snapshot.playing and message.args:
             try:
                 target = message.args[0]
                 cards_ = message.args[1] if 1 < len(message.args) else None
@@ -1914,7 +4173,8 @@ class WebGame(cards.durak.Game, DropBox):
                 self.uiDispatcher.postEvent(self,
                     event = self.PLAY_EVENT,
                     move = message.function.__name__,
-                    cardsOnTable = self.cardsOnTable(),
+                    cardsOnTable = snapshot.cardsOnTable,
+                    version = snapshot.version,
                     **eAttrs 
                 )
             except:
@@ -2036,10 +4296,8 @@ class WebPlayer(cards.durak.Player, RemoteEntity):
 
         This method translates a player's action requested by
         the front end and attempts to submit it to the model's
-        message queue for processing.
-
-        This method does not return a value. If there is a
-        problem with message submission, it raises an exception.
+        message queue for processing. If there is a problem with
+        message submission, it raises an exception.
 
         Parameters
         ----------
@@ -2049,6 +4307,13 @@ class WebPlayer(cards.durak.Player, RemoteEntity):
         args : object, optional
             Python object (e.g. a collection) that contains the
             action's arguments, such as cards played. 
+
+        Returns
+        -------
+        concurrent.futures.Future
+            The future of the submitted message, which completes
+            with the cards accepted by the game, or with the
+            error that made the game reject the move.
     
         Raises
         ------
@@ -2098,7 +4363,7 @@ class WebPlayer(cards.durak.Player, RemoteEntity):
                 'Arguments %s are not valid for action "%s" by player #%d, %s'
                 % (args, action, self.seat + 1, sys.exc_info()[0].__name__)
             ).with_traceback(sys.exc_info()[2])
-        game.submitMessage(message[0], *message[1], **message[2])
+        return game.submitMessage(message[0], *message[1], **message[2])
 
 WebPlayer.ATTACK_MESSAGE = ( WebPlayer.attack,
         lambda player, args: (player,
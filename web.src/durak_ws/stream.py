@@ -0,0 +1,408 @@
+# vim:fileencoding=UTF-8
+#
+# Copyright © 2019 Stan Livitski
+#
+# Licensed under the Apache License, Version 2.0 with modifications
+# and the "Commons Clause" Condition, (the "License"); you may not
+# use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#  https://raw.githubusercontent.com/StanLivitski/cards.webapp/master/LICENSE
+#
+# The grant of rights under the License will not include, and the License
+# does not grant to you, the right to Sell the Software, or use it for
+# gambling, with the exception of certain additions or modifications
+# to the Software submitted to the Licensor by third parties.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import collections
+import json
+import logging
+import re
+import time
+
+import django
+from django.http.response import \
+    HttpResponseForbidden, StreamingHttpResponse
+from django.views.generic import View
+
+from comety.django.views import JSONEncoder
+
+"""
+    Server-Sent Events transport for the application's
+    `comety` events.
+
+    Pages that support ``EventSource`` receive events over
+    a single persistent response per client, instead of
+    a new long-poll request after every batch of events.
+    Long-poll views remain available as a fallback. Streams
+    hold a server thread each unless they are served over ASGI
+    by Django 4.2 or newer, see `EventStreamView`.
+
+    Key elements
+    ------------
+    EventStreamView : streams events from the dispatcher of
+        a view with events as Server-Sent Events.
+    MultiplexStreamView : streams events from the dispatchers of
+        several views with events over one response.
+    astream : asynchronous bodies of the streams served over ASGI.
+"""
+
+class EventStreamView(View):
+    """
+    Streams `comety` events to an admitted user as Server-Sent
+    Events.
+
+    The view delegates admission, user identification and the
+    choice of dispatcher to an instance of its `source` view in
+    update mode. A source view with the ``eventSourceFor`` method
+    supplies an object that replaces the dispatcher for polling
+    and confirming events, and may return batches of events
+    that serialize themselves with a ``toJson`` method.
+    If the source view has ``eventFilterFor`` and
+    ``externalizeEvents`` methods, they are used to filter
+    and convert the events sent to the user. If it has an
+    ``afterEvents`` method, that method is called with the
+    request after each batch of events is sent.
+
+    Each batch is sent as an ``comety`` event with the batch's
+    last id as the event id, and the data formatted like the
+    response to a long-poll request. The batch is confirmed with
+    the dispatcher once it is written. A reconnecting client
+    confirms the events it has received with the ``Last-Event-ID``
+    header.
+
+    Attributes
+    ----------
+    source : type
+        A subclass of `comety.django.views.ViewWithEvents`
+        with the ``updateMode`` attribute, which serves
+        long-poll requests for the same events.
+    POLL_SLICE : float
+        The number of seconds to wait for events before sending
+        a comment to keep the connection alive.
+    ASYNC_POLL_SLICE : float
+        The number of seconds between checks for events in
+        an asynchronous stream.
+    ASYNC_STREAMS : bool
+        Tells whether the installed Django can stream asynchronous
+        bodies of responses to ASGI servers.
+    MAX_DURATION : float
+        The number of seconds after which the stream is closed
+        for the client to reconnect.
+    RETRY_DELAY : int
+        The number of milliseconds a client should wait before
+        reconnecting.
+
+    Notes
+    -----
+    Over WSGI, and over ASGI with Django older than 4.2, the body
+    of a stream is a generator that waits for events in a worker
+    thread. Each open stream then holds a worker thread of the
+    server for up to `MAX_DURATION` seconds, so servers must have
+    a thread for every client with an open page in addition to the
+    threads that serve other requests. Over ASGI with Django 4.2
+    or newer, the body is an asynchronous generator from `astream`
+    that holds no thread while it waits, but delays events by up
+    to `ASYNC_POLL_SLICE` seconds.
+    """
+
+    http_method_names = ['get']
+
+    source = None
+    POLL_SLICE = 15.
+    ASYNC_POLL_SLICE = .25
+    MAX_DURATION = 600.
+    RETRY_DELAY = 2000
+
+    Channel = collections.namedtuple('Channel',
+        ('name', 'view', 'dispatcher', 'userId',
+         'eventFilter', 'externalize', 'afterEvents'))
+
+    def get(self, request, *args, **kwargs):
+        channel = self._openChannel('comety', self.source,
+                                    request, args, kwargs)
+        if channel is None:
+            return HttpResponseForbidden()
+        lastId = request.META.get('HTTP_LAST_EVENT_ID')
+        try:
+            lastId = None if not lastId else int(lastId)
+        except ValueError:
+            lastId = None
+        return self._streamingResponse(request, 'stream', channel, lastId)
+
+    ASYNC_STREAMS = django.VERSION >= (4, 2)
+
+    def _streamingResponse(self, request, body, *args):
+        """
+        Make a response that streams events.
+
+        Parameters
+        ----------
+        request : django.http.HttpRequest
+            The web request being processed.
+        body : str
+            The name of the function in `astream`, and of this view's
+            method without the leading underscore, that generates the
+            body of the response.
+        args : tuple
+            The arguments of the generator following the request.
+
+        Returns
+        -------
+        django.http.StreamingHttpResponse
+            A response with an asynchronous body if the request has
+            come from an ASGI server that supports it, or with
+            a synchronous body otherwise.
+        """
+
+        if (self.ASYNC_STREAMS
+                and getattr(request, 'scope', None) is not None):
+            from . import astream
+            body = getattr(astream, body)(self, request, *args)
+        else:
+            body = getattr(self, '_' + body)(request, *args)
+        response = StreamingHttpResponse(body,
+                                         content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    @classmethod
+    def _openChannel(class_, name, source, request, args, kwargs):
+        """
+        Set up a source view in update mode to serve events
+        for a request.
+
+        Parameters
+        ----------
+        name : str
+            The name of the channel, used as the type of its events.
+        source : type
+            The class of the source view.
+        request : django.http.HttpRequest
+            The web request being processed.
+        args : collections.Sequence
+            Positional arguments passed to this view.
+        kwargs : collections.Mapping
+            Keyword arguments passed to this view.
+
+        Returns
+        -------
+        EventStreamView.Channel | NoneType
+            The view's dispatcher, user's id, and the view's hooks
+            for processing events, or ``None`` if the request is
+            not admitted by the view.
+        """
+
+        view = source(updateMode=True)
+        view.request, view.args, view.kwargs = request, args, kwargs
+        if not view._isRequestAdmitted(request):
+            return None
+        userId = view.identifyUser(request, *args, **kwargs)
+        dispatcher = getattr(view, 'eventSourceFor',
+                             view.cometyDispatcherFor)(request, *args, **kwargs)
+        if userId is None or dispatcher is None:
+            return None
+        eventFilter = getattr(view, 'eventFilterFor', None)
+        return class_.Channel(name, view, dispatcher, userId,
+            None if eventFilter is None else eventFilter(userId),
+            getattr(view, 'externalizeEvents', None),
+            getattr(view, 'afterEvents', None))
+
+    def _stream(self, request, channel, lastId):
+        """
+        Generate the body of an event stream.
+
+        Parameters
+        ----------
+        request : django.http.HttpRequest
+            The web request being processed.
+        channel : EventStreamView.Channel
+            The source of events to stream.
+        lastId : int | NoneType
+            The id of the last event received by the client
+            before reconnecting, if any.
+
+        Yields
+        ------
+        str
+            Fragments of the event stream.
+        """
+
+        deadline = time.monotonic() + self.MAX_DURATION
+        try:
+            if lastId is not None:
+                channel.dispatcher.confirmEvents(channel.userId, lastId)
+            yield 'retry: %d\n\n' % self.RETRY_DELAY
+            while time.monotonic() < deadline:
+                batch = self._pollChannel(request, channel, self.POLL_SLICE)
+                if batch is None:
+                    yield ':\n\n'
+                else:
+                    yield self._formatEvent(str(batch[0]), channel.name,
+                                            batch[0], batch[1])
+                    self._confirmBatch(request, channel, batch[0])
+        except GeneratorExit:
+            raise
+        except:
+            log = logging.getLogger(type(self).__module__)
+            log.error('Error streaming events of %s to user "%s"',
+                      type(channel.view).__name__, channel.userId,
+                      exc_info=True)
+        finally:
+            channel.view.trackHeartbeat(request)
+
+    @staticmethod
+    def _pollChannel(request, channel, timeout):
+        """
+        Wait for events on a channel.
+
+        Parameters
+        ----------
+        request : django.http.HttpRequest
+            The web request being processed.
+        channel : EventStreamView.Channel
+            The source of events.
+        timeout : float
+            The number of seconds to wait for events.
+
+        Returns
+        -------
+        (int, list) | NoneType
+            The last id and the list of events, converted by the
+            source view if applicable, or ``None`` if there were
+            no events within the `timeout`.
+        """
+
+        channel.view.heartbeat(channel.userId)
+        lastId, events = channel.dispatcher.pollEvents(
+            channel.userId, timeout, channel.eventFilter, True)
+        if not events:
+            return None
+        if channel.externalize is not None:
+            events = channel.externalize(channel.userId, events)
+        return lastId, events
+
+    @staticmethod
+    def _confirmBatch(request, channel, lastId):
+        channel.dispatcher.confirmEvents(channel.userId, lastId)
+        if channel.afterEvents is not None:
+            channel.afterEvents(request)
+
+    @staticmethod
+    def _formatEvent(id_, type_, lastId, events):
+        toJson = getattr(events, 'toJson', None)
+        return 'id: %s\nevent: %s\ndata: %s\n\n' % (
+            id_, type_,
+            toJson(lastId) if toJson is not None else
+            json.dumps({ 'lastId': lastId, 'events': events },
+                       cls=JSONEncoder)
+        )
+
+class MultiplexStreamView(EventStreamView):
+    """
+    Streams `comety` events from several source views to an
+    admitted user over one Server-Sent Events response.
+
+    Events from each source are sent with the channel's name
+    as the event type. The event id lists the last ids of all
+    channels that have sent events, such as ``table:12;chat:7``,
+    so that a reconnecting client confirms the events it has
+    received on each channel with the ``Last-Event-ID`` header.
+    The first channel is polled for `MUX_SLICE` seconds at a
+    time, and the others are polled without waiting in between.
+
+    Attributes
+    ----------
+    sources : collections.Sequence
+        Pairs of channel names and source view classes, as
+        described for the `source` of `EventStreamView`.
+    MUX_SLICE : float
+        The longest delay of events on channels other than
+        the first, in seconds.
+    """
+
+    sources = ()
+    MUX_SLICE = 1.
+
+    ID_PATTERN = re.compile(r'^(\w+):(\d+)$')
+
+    def get(self, request, *args, **kwargs):
+        channels = []
+        for name, source in self.sources:
+            channel = self._openChannel(name, source, request, args, kwargs)
+            if channel is None:
+                return HttpResponseForbidden()
+            channels.append(channel)
+        lastIds = {}
+        for part in request.META.get('HTTP_LAST_EVENT_ID', '').split(';'):
+            match = self.ID_PATTERN.match(part.strip())
+            if match is not None:
+                lastIds[match.group(1)] = int(match.group(2))
+        return self._streamingResponse(request, 'multiplex',
+                                       channels, lastIds)
+
+    def _multiplex(self, request, channels, lastIds):
+        """
+        Generate the body of a multiplexed event stream.
+
+        Parameters
+        ----------
+        request : django.http.HttpRequest
+            The web request being processed.
+        channels : collections.Sequence
+            `EventStreamView.Channel` objects with sources of
+            events to stream.
+        lastIds : collections.MutableMapping
+            The ids of the last events received by the client on
+            each channel before reconnecting, keyed by channel names.
+
+        Yields
+        ------
+        str
+            Fragments of the event stream.
+        """
+
+        deadline = time.monotonic() + self.MAX_DURATION
+        try:
+            for channel in channels:
+                if channel.name in lastIds:
+                    channel.dispatcher.confirmEvents(
+                        channel.userId, lastIds[channel.name])
+            yield 'retry: %d\n\n' % self.RETRY_DELAY
+            written = time.monotonic()
+            while written < deadline:
+                timeout = self.MUX_SLICE
+                for channel in channels:
+                    batch = self._pollChannel(request, channel, timeout)
+                    timeout = 0
+                    if batch is None:
+                        continue
+                    lastIds[channel.name] = batch[0]
+                    yield self._formatEvent(
+                        ';'.join('%s:%d' % (other.name, lastIds[other.name])
+                                 for other in channels
+                                 if other.name in lastIds),
+                        channel.name, batch[0], batch[1])
+                    self._confirmBatch(request, channel, batch[0])
+                    written = time.monotonic()
+                if written + self.POLL_SLICE < time.monotonic():
+                    yield ':\n\n'
+                    written = time.monotonic()
+        except GeneratorExit:
+            raise
+        except:
+            log = logging.getLogger(type(self).__module__)
+            log.error('Error streaming events of %s to user "%s"',
+                      ', '.join(name for name, source in self.sources),
+                      channels[0].userId if channels else None,
+                      exc_info=True)
+        finally:
+            for channel in channels:
+                channel.view.trackHeartbeat(request)
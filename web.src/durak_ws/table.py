@@ -20,16 +20,20 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # 
+import concurrent.futures
+import itertools
 import json
 import logging
 
 import django.urls
 from django.http.response import \
     HttpResponseForbidden, HttpResponseRedirect, HttpResponseServerError,\
-    HttpResponseNotFound, HttpResponse
+    HttpResponseBadRequest, HttpResponseNotFound, HttpResponse, HttpResponseNotModified, \
+    JsonResponse
 from django.shortcuts import render
+from django.utils.cache import patch_cache_control
 from django.utils.translation import ugettext_lazy as _
-from django.utils.translation import ugettext
+from django.utils.translation import ugettext, get_language
 
 from comety.django.views import ViewWithEvents
 
@@ -55,7 +59,10 @@ class TableView(ViewWithEvents):
     GAME_IN_SESSION = IntroView.GAME_IN_SESSION
     PLAYER_IN_SESSION = IntroView.PLAYER_IN_SESSION
 
+    MOVE_RESULT_TIMEOUT = .5
+
     updateMode = False
+    stateMode = False
 
     def post(self, request, *args, **kwargs):
         if not self._isRequestAdmitted(request):
@@ -63,7 +70,8 @@ class TableView(ViewWithEvents):
                 django.urls.reverse('intro')
             )
         elif self.updateMode:
-            return HttpResponse('OK') if self._admittedPost(request) \
+            future = self._admittedPost(request)
+            return self._moveResult(future) if future \
                 else HttpResponseServerError('REJECTED')
         else:
             self._admittedPost(request)
@@ -71,18 +79,39 @@ class TableView(ViewWithEvents):
 
     def get(self, request, *args, **kwargs):
         if not self._isRequestAdmitted(request):
-            return (HttpResponseForbidden() if self.updateMode
+            return (HttpResponseForbidden()
+                if self.updateMode or self.stateMode
                 else HttpResponseRedirect(
                     django.urls.reverse('intro')
                 ))
+        elif self.stateMode:
+            return self._admittedState(request)
         elif self.updateMode:
             response = super().get(request, *args, **kwargs)
-            if self.checkIn.game and not self.checkIn.game.playing:
-                request.session[IntroView.SHOW_RESULT_IN_SESSION] = True
+            self.afterEvents(request, False)
             return response
         else:
             return self._admittedGet(request)
 
+    def afterEvents(self, request, save=True):
+        """
+        Arrange for the intro page to show the results of a game
+        that is over after sending events to a player.
+
+        Parameters
+        ----------
+        request : django.http.HttpRequest
+            The web request that received the events.
+        save : bool, optional
+            Whether to save the session right away, which is
+            necessary when the response is already being sent.
+        """
+
+        if self.checkIn.game and not self.checkIn.game.playing:
+            request.session[IntroView.SHOW_RESULT_IN_SESSION] = True
+            if save:
+                request.session.save()
+
     def _isRequestAdmitted(self, request):
         """
         Determines whether this session belongs to an admitted player and
@@ -113,7 +142,7 @@ class TableView(ViewWithEvents):
             playerId is not None and
             playerId in checkIn.tokens
         )
-        if passed and not self.updateMode:
+        if passed and not (self.updateMode or self.stateMode):
             passed = checkIn.game and checkIn.game.playing
         if passed:
             self.checkIn = checkIn
@@ -131,8 +160,9 @@ class TableView(ViewWithEvents):
 
         Returns
         -------
-        boolean
-            Success status of processing. 
+        concurrent.futures.Future | NoneType
+            The future of the move submitted to the game, or ``None``
+            if the move could not be submitted.
         """
 
         userId = request.session[self.PLAYER_IN_SESSION]
@@ -143,13 +173,55 @@ class TableView(ViewWithEvents):
             action = request.POST['action']
             args = request.POST.get('args', False)
             args = json.loads(args if args else 'null')
-            player.attemptMove(action, args)
-            return True
+            return player.attemptMove(action, args)
         except:
             log = logging.getLogger(type(self).__module__)
             log.error('Error processing action by user "%s"',
                       userId, exc_info=True)
-            return False
+            return None
+
+    def _moveResult(self, future):
+        """
+        Wait for the game to process a move and report the outcome
+        to the player.
+
+        The wait is limited by `MOVE_RESULT_TIMEOUT` seconds.
+
+        Parameters
+        ----------
+        future : concurrent.futures.Future
+            The future of the submitted move.
+
+        Returns
+        -------
+        django.http.JsonResponse
+            A response with ``status`` of ``'accepted'`` and a sorted
+            list of ``accepted`` card codes, if any; or a response
+            with ``409`` code, ``'rejected'`` status and the ``error``
+            message if the game rejected the move; or a response with
+            ``202`` code and ``'pending'`` status if the move has not
+            been processed in time.
+        """
+
+        try:
+            result = future.result(self.MOVE_RESULT_TIMEOUT)
+        except concurrent.futures.TimeoutError:
+            return JsonResponse({ 'status' : 'pending' }, status=202)
+        except concurrent.futures.CancelledError:
+            return JsonResponse({
+                'status' : 'rejected',
+                'error' : ugettext('The game is over'),
+            }, status=409)
+        except Exception as error:
+            return JsonResponse({
+                'status' : 'rejected',
+                'error' : str(error),
+            }, status=409)
+        return JsonResponse({
+            'status' : 'accepted',
+            'accepted' : None if result is None
+                else sorted(card.code for card in result),
+        })
 
     def _admittedGet(self, request):
         """
@@ -178,20 +250,45 @@ class TableView(ViewWithEvents):
                     content_type='text/plain; charset=utf-8'
                 )
             position = checkIn.tokens[userId]
+            game = checkIn.game
+            snapshot = game.currentSnapshot
+            etag = self._entityTag(game, snapshot, position, layout)
+            if etag is not None and etag in (
+                    tag.strip() for tag in
+                    request.META.get('HTTP_IF_NONE_MATCH', '').split(',')):
+                response = HttpResponseNotModified()
+                response['ETag'] = etag
+                self.clearDelayStats(request.session)
+                self.trackHeartbeat(request, True)
+                return response
             opponents = checkIn.opponentMap(position, self.SEATING_CAPACITY)
+            seat = snapshot.seats[position]
+            handBySuit = [ (suit, list(cards_)) for suit, cards_ in
+                itertools.groupby(seat.hand, lambda card: card.suit) ]
             contextVars = {
                 'bodyClass' : "table-background",
                 'backImage' : '01',
-                'game' : checkIn.game,
+                'game' : game,
                 'gameApp' : 'durak',
+                'handBySuit' : handBySuit,
                 'layoutTemplate' : 'durak/table/%s.html' % layout,
+                'legalMoves' : json.dumps(self._externalizeMoves(
+                    seat.legalMoves)),
+                'maxSuitLength' : max([ 0 ] +
+                    [ len(cards_) for suit, cards_ in handBySuit ]),
                 'opponents' : opponents,
-                'player' : checkIn.game.players[position],
+                'playerStatus' : snapshot.statuses[position],
                 'position' : position,
+                'ranksOnTable' : snapshot.ranksOnTable,
+                'snapshot' : snapshot,
+                'stateVersion' : snapshot.version,
                 'statum' : self.STATUS_ICONS,
                 'tableLayout' : layout,
             }
             response = render(request, 'durak/table.html', contextVars)
+            if etag is not None:
+                response['ETag'] = etag
+                patch_cache_control(response, private=True, no_cache=True)
             self.clearDelayStats(request.session)
             self.trackHeartbeat(request, True)
             return response
@@ -201,6 +298,189 @@ class TableView(ViewWithEvents):
                       userId, exc_info=True)
             return HttpResponseServerError()
 
+    def _admittedState(self, request):
+        """
+        Describe changes in the game's state since the version
+        a player has seen.
+
+        The version is passed as ``since`` request parameter. If
+        it is omitted or too old to be found in the game's
+        snapshot history, the response describes the full state.
+
+        Parameters
+        ----------
+        request : django.http.HttpRequest
+            The web request being processed.
+
+        Returns
+        -------
+        django.http.JsonResponse
+            A response with the current ``version`` of the game's
+            state, the ``full`` flag that is set when the changes
+            are not relative to the requested version, and the
+            ``changes`` of the state as described by
+            `_stateChanges`; or a response with ``400`` code if
+            ``since`` is not an integer; or a response with ``409``
+            code and the ``error`` message if no game has been
+            started yet.
+        """
+
+        userId = request.session[self.PLAYER_IN_SESSION]
+        since = request.GET.get('since')
+        if since is not None:
+            try:
+                since = int(since)
+            except ValueError:
+                return HttpResponseBadRequest(
+                    ugettext('Invalid state version: "%s"') % since,
+                    content_type='text/plain; charset=utf-8'
+                )
+        try:
+            game = self.checkIn.game
+            current = None if game is None else game.currentSnapshot
+            if current is None:
+                return JsonResponse({
+                    'error' : ugettext('The game has not started yet'),
+                }, status=409)
+            position = self.checkIn.tokens[userId]
+            base = None if since is None else game.snapshotAt(since)
+            changes = self._stateChanges(base, current, position,
+                                         game.rankKeys)
+            self.trackHeartbeat(request, True)
+            return JsonResponse({
+                'version' : current.version,
+                'full' : base is None,
+                'changes' : changes,
+            })
+        except:
+            log = logging.getLogger(type(self).__module__)
+            log.error('Error serving %s to user "%s"', type(self).__name__,
+                      userId, exc_info=True)
+            return HttpResponseServerError()
+
+    @classmethod
+    def _stateChanges(class_, base, current, position, rankKeys):
+        """
+        Compare two snapshots of a game and describe the differences
+        as seen by a player.
+
+        Only the snapshots are read, so that the description is
+        consistent even while the game receives moves.
+
+        Parameters
+        ----------
+        base : durak_ws.models.WebGame.TableSnapshot | NoneType
+            The snapshot the player has seen, or ``None`` to describe
+            the full state.
+        current : durak_ws.models.WebGame.TableSnapshot
+            The latest snapshot of the game.
+        position : int
+            The seat of the player viewing the game.
+        rankKeys : collections.Mapping
+            Maps card ranks to their indexes, see
+            `cards.durak.Game.rankKeys`.
+
+        Returns
+        -------
+        dict
+            A JSON-compatible dictionary with the fields of `current`
+            snapshot that differ from the `base`, with the trump card
+            converted to its code, and the pairs of ``cardsOnTable``
+            converted to lists of objects with ``code``, ``rank``
+            and ``suit`` of each card. Unless the snapshots are the same,
+            it also contains the player's ``legalMoves`` as returned
+            by `_externalizeMoves`, and the indexes of ``ranksOnTable``.
+            The player's ``hand`` is included as a sorted list of
+            codes when the player's card count or the stock count has
+            changed, since no move can change the hand otherwise.
+        """
+
+        changes = {}
+        if base is current:
+            return changes
+        for field in current._fields:
+            value = getattr(current, field)
+            if field in ('version', 'ranksOnTable', 'seats') or (
+                    base is not None and getattr(base, field) == value):
+                continue
+            elif field == 'cardsOnTable':
+                value = [
+                    [ { 'code' : card.code, 'rank' : card.rank,
+                        'suit' : card.suit } for card in pair ]
+                    for pair in value
+                ]
+            elif field == 'trumpCard':
+                value = value.code
+            changes[field] = value
+        seat = current.seats[position]
+        if base is None or 'stockCount' in changes or (
+                base.cardCounts[position] != current.cardCounts[position]):
+            changes['hand'] = sorted(card.code for card in seat.hand)
+        changes['legalMoves'] = class_._externalizeMoves(seat.legalMoves)
+        changes['ranksOnTable'] = sorted(
+            rankKeys[rank] for rank in current.ranksOnTable)
+        return changes
+
+    @staticmethod
+    def _entityTag(game, snapshot, position, layout):
+        """
+        Compute the entity tag of a table page from the version of
+        the game's published snapshot.
+
+        Parameters
+        ----------
+        game : WebGame
+            The game shown on the page.
+        snapshot : WebGame.TableSnapshot | NoneType
+            The snapshot of the game rendered on the page.
+        position : int
+            The seat of the player viewing the page.
+        layout : str | NoneType
+            The table layout requested.
+
+        Returns
+        -------
+        str | NoneType
+            A quoted entity tag, or ``None`` if the game has no
+            published snapshot.
+        """
+
+        if snapshot is None:
+            return None
+        return '"%x-%d-%d-%s-%s"' % (
+            id(game), snapshot.version, position, layout, get_language())
+
+    @staticmethod
+    def _externalizeMoves(moves):
+        """
+        Convert legal moves of a player into a JSON-compatible
+        ``dict`` with card codes.
+
+        Parameters
+        ----------
+        moves : cards.durak.Game.LegalMoves
+            Legal moves returned by the game.
+
+        Returns
+        -------
+        dict
+            A dictionary with ``attack`` and ``throwIn`` lists of
+            card codes, a ``defense`` map of unbeaten card codes to
+            lists of codes of cards that beat them, the ``quitTurn``
+            flag, and the ``cardLimit`` number.
+        """
+
+        return {
+            'attack' : [ card.code for card in moves.attack ],
+            'throwIn' : [ card.code for card in moves.throwIn ],
+            'defense' : dict(
+                (card.code, [ beat.code for beat in beaters ])
+                for card, beaters in moves.defense.items()
+            ),
+            'quitTurn' : moves.quitTurn,
+            'cardLimit' : moves.cardLimit,
+        }
+
     def cometyDispatcherFor(self, request, *args, **kwargs): # TODO: share with the intro view
         """
         Locate the Comety dispatcher for a request by querying
@@ -0,0 +1,105 @@
+{% comment %}
+{# Copyright © 2019 Stan Livitski #}
+
+{# Licensed under the Apache License, Version 2.0 with modifications #}
+{# and the "Commons Clause" Condition, (the "License"); you may not #}
+{# use this file except in compliance with the License. You may obtain #}
+{# a copy of the License at #}
+
+{#  https://raw.githubusercontent.com/StanLivitski/cards.webapp/master/LICENSE #}
+
+{# The grant of rights under the License will not include, and the License #}
+{# does not grant to you, the right to Sell the Software, or use it for #}
+{# gambling, with the exception of certain additions or modifications #}
+{# to the Software submitted to the Licensor by third parties. #}
+
+{# Unless required by applicable law or agreed to in writing, software #}
+{# distributed under the License is distributed on an "AS IS" BASIS, #}
+{# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. #}
+{# See the License for the specific language governing permissions and #}
+{# limitations under the License. #}
+{% endcomment %}
+{% comment %}
+	Script module that receives Comety events from a Server-Sent
+	Events stream at `url`. Events of the stream's `comety` type are
+	passed to `comety.defaults.handler` the way the long-poll loop
+	does. Streams that multiplex several channels deliver their
+	events by type to functions in the optional `channels` object,
+	which receive arrays of events.
+	Once the stream is open, `comety.startUpdates` and
+	`comety.stopUpdates` open and close the stream. When the browser
+	doesn't support `EventSource`, or the stream fails, updates fall
+	back to long polling, and the optional `fallback` function
+	is called.
+	Returns `true` if the stream has been opened.
+{% endcomment %}
+function cometyStream(url, channels, fallback)
+{
+	if (!('EventSource' in window))
+		return false;
+	if (null == channels)
+		channels = {
+			comety: function(events)
+			{
+				cometyDeliver(comety.defaults.handler, events);
+			}
+		};
+	var source;
+	var startUpdates = comety.startUpdates;
+	var stopUpdates = comety.stopUpdates;
+	function open()
+	{
+		source = new EventSource(url);
+		$.each(channels, function(channel, deliver)
+		{
+			source.addEventListener(channel, function(message)
+			{
+				var events = JSON.parse(message.data).events;
+				if (null != events && 0 < events.length)
+					deliver(events);
+			});
+		});
+		source.onerror = function()
+		{
+			if (EventSource.CLOSED != source.readyState)
+				return;
+			source = undefined;
+			comety.startUpdates = startUpdates;
+			comety.stopUpdates = stopUpdates;
+			startUpdates.call(comety);
+			if (null != fallback)
+				fallback();
+		};
+	}
+	stopUpdates.call(comety);
+	comety.startUpdates = function()
+	{
+		if (undefined == source)
+			open();
+	};
+	comety.stopUpdates = function()
+	{
+		if (undefined != source)
+		{
+			source.close();
+			source = undefined;
+		}
+	};
+	open();
+	return true;
+}
+
+{% comment %}
+	Pass `events` to a Comety `handler` until it has handled them all,
+	or returns a value other than a positive number of events handled.
+{% endcomment %}
+function cometyDeliver(handler, events)
+{
+	while (0 < events.length)
+	{
+		var handled = handler(events, {});
+		if (!(0 < handled))
+			break;
+		events = events.slice(handled);
+	}
+}
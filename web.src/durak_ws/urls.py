@@ -37,7 +37,7 @@ Including another URLconf
     2. Add a URL to urlpatterns:  url(r'^blog/', include(blog_urls))
 """
 from django.conf.urls import url
-from . import intro, chat, graphics, table
+from . import intro, chat, graphics, stream, table
 
 PARAM_STYLE_PATTERN = r'[^">]*'
 PARAM_BACK_IMAGE_PATTERN = r'\w{1,16}'
@@ -48,8 +48,15 @@ urlpatterns = [
     url('^join/' + r'([a-z]*)$',
         intro.IntroView.as_view(), name='intro'),
     url('^intro$', intro.IntroView.as_view(updateMode=True), name='intro-updates'),
+    url('^intro/stream$', stream.EventStreamView.as_view(source=intro.IntroView),
+        name='intro-stream'),
     url('^chat$', chat.ChatView.as_view(), name='chat'),
     url('^messages$', chat.ChatView.as_view(updateMode=True), name='chat-messages'),
+    url('^messages/history$', chat.ChatView.as_view(historyMode=True,
+        http_method_names=['get']),
+        name='chat-history'),
+    url('^messages/stream$', stream.EventStreamView.as_view(source=chat.ChatView),
+        name='chat-stream'),
     #url(r'^comety/events.js$', TemplateView.as_view(template_name='comety/events.js'), name='test'),
     url(r'^table$', table.TableView.as_view(), name='table'),
     url(r'^table/dimmer/(?P<style>%s)$' % PARAM_STYLE_PATTERN,
@@ -59,4 +66,10 @@ urlpatterns = [
     url(r'^table/stock/side/(?P<gap>%s)$' % PARAM_GAP_PATTERN,
         graphics.StockSideView.as_view(), name='stock_side'),
     url(r'^game$', table.TableView.as_view(updateMode=True), name='table-updates'),
+    url(r'^game/state$', table.TableView.as_view(stateMode=True), name='table-state'),
+    url(r'^game/stream$', stream.EventStreamView.as_view(source=table.TableView),
+        name='table-stream'),
+    url(r'^game/player-stream$', stream.MultiplexStreamView.as_view(
+        sources=(('table', table.TableView), ('chat', chat.ChatView))),
+        name='player-stream'),
 ]